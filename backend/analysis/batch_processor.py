@@ -1,61 +1,130 @@
 import os
+import sys
+import time
+import argparse
 import psycopg2
 from dotenv import load_dotenv
-from sentiment_eng import ToneAnalyzer
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+from schema import migrate  # noqa: E402
+import scoring_jobs  # noqa: E402
+from profiler import profile  # noqa: E402
 
 load_dotenv()
 
-def process_transcript_sentences():
-    analyzer = ToneAnalyzer()
-    try:
-        connection = psycopg2.connect(os.getenv("DATABASE_URL"))
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return
+BATCH_LIMIT = 20
+
+
+def load_analyzer():
+    # Imported here so callers with nothing to score never import torch
+    from sentiment_eng import ToneAnalyzer
+    return ToneAnalyzer()
+
+
+def process_transcript_sentences(connection=None, get_analyzer=load_analyzer, limit=BATCH_LIMIT, worker=None):
+    """
+    Claim and score up to `limit` pending scoring jobs.
+
+    Each transcript is committed on its own (see scoring_jobs), so a crash
+    loses at most the transcript in flight, and several processes can run
+    this at once. The analyzer is only built once there is work, via
+    get_analyzer(). A connection passed in is left open for the caller.
+
+    Returns (claimed, scored_ids): how many jobs this call worked on, and
+    the ids of the transcripts that were scored. A batch can claim jobs and
+    score none of them (every one failed or had no sentences), so callers
+    that drain the queue should stop when claimed is 0, not scored_ids.
+    Jobs handed back because the model failed to load are not counted.
+    """
+    owns_connection = connection is None
+    if owns_connection:
+        try:
+            connection = psycopg2.connect(os.getenv("DATABASE_URL"))
+        except Exception as e:
+            print(f"Database connection failed: {e}")
+            return 0, []
 
+    worker = worker or scoring_jobs.worker_id()
+    claimed = 0
+    scored_ids = []
     try:
-        with connection:
-            with connection.cursor() as cur:
-                fetch_query = """
-                    SELECT t.id, t.content
-                    FROM transcripts t
-                    LEFT JOIN transcript_sentences s ON t.id = s.transcript_id
-                    WHERE s.id IS NULL
-                    LIMIT 20;
-                """
-                cur.execute(fetch_query)
-                paragraphs = cur.fetchall()
-
-                if not paragraphs:
-                    print("No transcripts left to process!")
-                    return
-
-                for p_id, content in paragraphs:
-                    print(f"Processing transcript ID: {p_id}")
-                    
-                    analysis_result = analyzer.analyze_paragraph(content)
-                    
-                    if not analysis_result or not analysis_result.sentences:
-                        continue
-
-                    insert_sql = """
-                        INSERT INTO transcript_sentences 
-                        (transcript_id, sentence_text, topic, stance_score, impact_weight, reasoning)
-                        VALUES (%s, %s, %s, %s, %s, %s);
-                    """
-                    
-                    sentence_data = [
-                        (p_id, s.text, s.topic, s.score, s.weight, s.reasoning)
-                        for s in analysis_result.sentences
-                    ]
-                    
-                    cur.executemany(insert_sql, sentence_data)
-                    print(f"Successfully inserted {len(sentence_data)} sentences for ID {p_id}")
+        with metrics.timed("finsent_db_query_seconds", endpoint="batch_processor"):
+            scoring_jobs.enqueue_unscored(connection)
+            jobs = scoring_jobs.claim(connection, limit, worker)
+
+        if not jobs:
+            print("No transcripts left to process!")
+            return 0, []
+
+        try:
+            analyzer = get_analyzer()
+        except Exception:
+            scoring_jobs.release(connection, [p_id for p_id, _ in jobs], worker)
+            raise
+        model_version = analyzer.loaded.version
+        claimed = len(jobs)
+
+        for p_id, content in jobs:
+            print(f"Processing transcript ID: {p_id}")
+            start = time.perf_counter()
+            try:
+                analysis_result = analyzer.analyze_paragraph(content or "", normalized=True)
+                if not analysis_result or not analysis_result.sentences:
+                    # Deterministic for a given model: retrying would give the same nothing
+                    scoring_jobs.fail(connection, p_id, "no sentences", worker, permanent=True)
+                    print(f"No sentences for ID {p_id}, marked failed")
+                    continue
+
+                sentence_data = [
+                    (s.text, s.topic, s.score, s.weight, s.reasoning, s.start, s.end)
+                    for s in analysis_result.sentences
+                ]
+                with metrics.timed("finsent_db_query_seconds", endpoint="batch_processor"):
+                    stored = scoring_jobs.complete(connection, p_id, sentence_data, model_version, worker)
+            except Exception as e:
+                connection.rollback()
+                print(f"Error scoring transcript {p_id}: {e}")
+                scoring_jobs.fail(connection, p_id, e, worker)
+                continue
+
+            if not stored:
+                print(f"Lease on ID {p_id} was taken over by another worker, result discarded")
+                continue
+            metrics.observe("finsent_transcript_score_seconds", time.perf_counter() - start)
+            scored_ids.append(p_id)
+            print(f"Successfully inserted {len(sentence_data)} sentences for ID {p_id}")
 
     except Exception as e:
+        # Jobs still leased are picked up again once their lease expires
         print(f"An error occurred during processing: {e}")
     finally:
-        connection.close()
+        if owns_connection:
+            connection.close()
+
+    return claimed, scored_ids
 
 if __name__ == "__main__":
-    process_transcript_sentences()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Score pending transcripts (one batch of scoring jobs)")
+    parser.add_argument("--limit", type=int, default=BATCH_LIMIT)
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="put failed jobs back in the queue before scoring")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample stacks for this run and save a folded flamegraph file")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    try:
+        migrate(conn)
+        if args.retry_failed:
+            print(f"Re-queued {scoring_jobs.retry_failed(conn)} failed jobs")
+        with profile("batch_processor", enabled=args.profile):
+            process_transcript_sentences(conn, limit=args.limit)
+        print(f"Jobs: {scoring_jobs.status(conn)}")
+    finally:
+        conn.close()
+    print("Timings:")
+    print(metrics.summary())
@@ -1,5 +1,6 @@
 import os, sys, psycopg2, traceback
 from dotenv import load_dotenv
+import scoring_jobs
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 DB_URL = os.getenv('DATABASE_URL')
@@ -9,10 +10,9 @@ print(f"DB_URL found: {bool(DB_URL)}", file=sys.stderr)
 conn = psycopg2.connect(DB_URL, connect_timeout=10)
 cur = conn.cursor()
 cur.execute("""
-    SELECT t.id, LENGTH(t.content) as clen FROM transcripts t
-    LEFT JOIN transcript_sentences s ON t.id = s.transcript_id
-    WHERE s.id IS NULL
-    ORDER BY t.id
+    SELECT id, LENGTH(content) as clen FROM transcripts
+    WHERE scored_at IS NULL
+    ORDER BY id
     LIMIT 5
 """)
 rows = cur.fetchall()
@@ -24,23 +24,23 @@ if not rows:
     print("Nothing to process", file=sys.stderr)
     sys.exit(0)
 
-# Step 2: Try to score just ONE transcript
-tid, clen = rows[0]
-print(f"\nProcessing transcript ID={tid} (content_len={clen})...", file=sys.stderr)
-
+# Step 2: Try to score just ONE transcript (claimed like any worker would)
 conn = psycopg2.connect(DB_URL, connect_timeout=10)
-cur = conn.cursor()
-cur.execute("SELECT content FROM transcripts WHERE id = %s", (tid,))
-content = cur.fetchone()[0]
-cur.close()
+scoring_jobs.enqueue_unscored(conn)
+claimed = scoring_jobs.claim(conn, 1)
 conn.close()
-print(f"Content fetched: {len(content)} chars", file=sys.stderr)
+if not claimed:
+    print("No claimable job (another worker holds them)", file=sys.stderr)
+    sys.exit(0)
+tid, content = claimed[0]
+content = content or ""
+print(f"\nProcessing transcript ID={tid} (content_len={len(content)})...", file=sys.stderr)
 
 # Import and run model
 try:
     from sentiment_eng import ToneAnalyzer
     analyzer = ToneAnalyzer()
-    result = analyzer.analyze_paragraph(content)
+    result = analyzer.analyze_paragraph(content, normalized=True)
     print(f"Sentences produced: {len(result.sentences) if result else 0}", file=sys.stderr)
     
     if result and result.sentences:
@@ -49,16 +49,11 @@ try:
         
         # Insert
         conn = psycopg2.connect(DB_URL, connect_timeout=10)
-        cur = conn.cursor()
-        data = [(tid, s.text, s.topic, s.score, s.weight, s.reasoning) for s in result.sentences]
-        cur.executemany("""
-            INSERT INTO transcript_sentences 
-            (transcript_id, sentence_text, topic, stance_score, impact_weight, reasoning)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, data)
-        conn.commit()
-        print(f"Inserted {len(data)} sentences for ID={tid}", file=sys.stderr)
-        cur.close()
+        data = [(s.text, s.topic, s.score, s.weight, s.reasoning, s.start, s.end) for s in result.sentences]
+        if scoring_jobs.complete(conn, tid, data, analyzer.loaded.version):
+            print(f"Inserted {len(data)} sentences for ID={tid}", file=sys.stderr)
+        else:
+            print(f"Lease on ID={tid} was taken over by another worker, result discarded", file=sys.stderr)
         conn.close()
 except Exception:
     traceback.print_exc(file=sys.stderr)
@@ -0,0 +1,284 @@
+"""
+Pre-tokenised, memory-mapped snapshots of the labelled training data.
+
+Only externally labelled sentences are training data: rows whose
+model_version is NULL, i.e. labels that did not come from this model.
+Every sentence the model scores or rescores gets its version stamped, so
+neither full nor incremental runs ever learn from the model's own
+predictions.
+
+A snapshot is pulled from Postgres and tokenised once, then written as flat
+.npy arrays under model/cache/<hash>/:
+
+    ids.npy             int64   (N,)      transcript_sentences.id
+    input_ids.npy       int64   (N, L)
+    attention_mask.npy  int64   (N, L)
+    scores.npy          float32 (N,)
+    topic_ids.npy       int64   (N,)
+    tokenizer/                            tokenizer used to build it
+    manifest.json
+
+The directory name is a content hash of the rows, the tokenizer and the
+sequence length, so identical data always maps to the same snapshot. A
+LATEST file points at the most recent build, which lets repeat training
+runs start without touching the database or the tokenizer at all.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import datetime
+import numpy as np
+import psycopg2
+import torch
+from torch.utils.data import Dataset
+
+from distilbert_model import TOPIC_LABELS, normalize_topic
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+from schema import SENTENCE_TEXT_SQL  # noqa: E402
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+TOKENIZER_NAME = "distilbert-base-uncased"
+MAX_SEQ_LEN = 128
+TOKENIZE_CHUNK = 1024
+VAL_BUCKETS = 5     # 1 in 5 sentences is held out for validation
+
+ARRAYS = ("ids", "input_ids", "attention_mask", "scores", "topic_ids")
+
+
+# ---------------------------------------------------------------------------
+# Data loading
+# ---------------------------------------------------------------------------
+def load_training_data():
+    """Pull externally labelled sentences from the database, in id order."""
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT ts.id, ts.text, ts.stance_score, ts.topic
+        FROM (
+            SELECT ts.id, ts.stance_score, ts.topic, {SENTENCE_TEXT_SQL} AS text
+            FROM transcript_sentences ts
+            JOIN transcripts t ON t.id = ts.transcript_id
+            WHERE ts.model_version IS NULL
+        ) ts
+        WHERE ts.text IS NOT NULL
+          AND ts.stance_score IS NOT NULL
+          AND ts.topic IS NOT NULL
+        ORDER BY ts.id
+        """
+    )
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+
+    ids, texts, scores, topics = [], [], [], []
+    topic_to_id = {t: i for i, t in enumerate(TOPIC_LABELS)}
+
+    skipped = 0
+    for row_id, text, score, topic in rows:
+        canonical = normalize_topic(topic)
+        if canonical is None:
+            skipped += 1
+            continue
+        ids.append(row_id)
+        texts.append(text)
+        scores.append(float(score))
+        topics.append(topic_to_id[canonical])
+
+    print(f"Loaded {len(texts)} labelled sentences from database (skipped {skipped})")
+    return ids, texts, scores, topics
+
+
+def content_hash(ids, texts, scores, topics, tokenizer_name, max_len):
+    h = hashlib.sha256()
+    h.update(f"{tokenizer_name}|{max_len}\n".encode())
+    for row in zip(ids, texts, scores, topics):
+        h.update(json.dumps(row).encode())
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+class Snapshot:
+    """Read-only view over one cached snapshot directory."""
+
+    def __init__(self, path):
+        self._open(path)
+
+    def _open(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        # copy-on-write maps: zero-copy reads that torch accepts as writable
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c"))
+
+    # DataLoader workers started with spawn/forkserver receive a pickled
+    # copy; ship the path and re-map instead of copying the arrays
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self._open(state["path"])
+
+    @property
+    def key(self):
+        return self.manifest["hash"]
+
+    @property
+    def tokenizer_dir(self):
+        return os.path.join(self.path, "tokenizer")
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _latest_path(cache_dir):
+    return os.path.join(cache_dir, "LATEST")
+
+
+def open_snapshot(key="latest", cache_dir=CACHE_DIR):
+    """Open a snapshot by hash, or the latest build; None if there is none."""
+    if key == "latest":
+        try:
+            with open(_latest_path(cache_dir)) as f:
+                key = f.read().strip()
+        except OSError:
+            return None
+    path = os.path.join(cache_dir, key)
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        return None
+    return Snapshot(path)
+
+
+def build_snapshot(max_len=MAX_SEQ_LEN, tokenizer_name=TOKENIZER_NAME, cache_dir=CACHE_DIR):
+    """Pull labelled rows from the DB and tokenise them into a new snapshot."""
+    ids, texts, scores, topics = load_training_data()
+    key = content_hash(ids, texts, scores, topics, tokenizer_name, max_len)
+
+    existing = open_snapshot(key, cache_dir)
+    if existing is not None:
+        print(f"Snapshot {key} already built, reusing it")
+    else:
+        from transformers import DistilBertTokenizerFast
+
+        tokenizer = DistilBertTokenizerFast.from_pretrained(tokenizer_name)
+        n = len(texts)
+        tmp = os.path.join(cache_dir, f".{key}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        np.save(os.path.join(tmp, "ids.npy"), np.asarray(ids, dtype=np.int64))
+        np.save(os.path.join(tmp, "scores.npy"), np.asarray(scores, dtype=np.float32))
+        np.save(os.path.join(tmp, "topic_ids.npy"), np.asarray(topics, dtype=np.int64))
+        input_ids = np.lib.format.open_memmap(
+            os.path.join(tmp, "input_ids.npy"), mode="w+", dtype=np.int64, shape=(n, max_len))
+        attention = np.lib.format.open_memmap(
+            os.path.join(tmp, "attention_mask.npy"), mode="w+", dtype=np.int64, shape=(n, max_len))
+
+        for start in range(0, n, TOKENIZE_CHUNK):
+            enc = tokenizer(
+                texts[start:start + TOKENIZE_CHUNK],
+                max_length=max_len,
+                padding="max_length",
+                truncation=True,
+                return_tensors="np",
+            )
+            input_ids[start:start + len(enc["input_ids"])] = enc["input_ids"]
+            attention[start:start + len(enc["input_ids"])] = enc["attention_mask"]
+        input_ids.flush()
+        attention.flush()
+        del input_ids, attention
+
+        tokenizer.save_pretrained(os.path.join(tmp, "tokenizer"))
+        manifest = {
+            "hash": key,
+            "rows": n,
+            "max_len": max_len,
+            "tokenizer": tokenizer_name,
+            "max_sentence_id": int(max(ids)) if ids else None,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(cache_dir, key))
+        print(f"Built snapshot {key} ({n} rows) in {cache_dir}")
+
+    with open(_latest_path(cache_dir), "w") as f:
+        f.write(key)
+    return open_snapshot(key, cache_dir)
+
+
+def load_snapshot(key="latest", refresh=False, cache_dir=CACHE_DIR):
+    """
+    Return a snapshot without touching the DB when one is cached.
+
+    refresh=True always re-reads the database (and only re-tokenises if the
+    labelled data actually changed).
+    """
+    if not refresh:
+        snapshot = open_snapshot(key, cache_dir)
+        if snapshot is not None:
+            print(f"Using cached snapshot {snapshot.key} ({len(snapshot)} rows)")
+            return snapshot
+        if key != "latest":
+            raise FileNotFoundError(f"No snapshot {key} in {cache_dir}")
+    return build_snapshot(cache_dir=cache_dir)
+
+
+def is_validation(ids):
+    """
+    True for rows held out for validation, decided by sentence id alone.
+
+    About one row in VAL_BUCKETS lands in validation. The rule depends on
+    nothing but the id, so full and incremental runs agree and a row keeps
+    its side of the split across rescores, deletes and new labels.
+    """
+    # Fibonacci hashing spreads consecutive ids evenly over the buckets
+    mixed = np.asarray(ids).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return (mixed >> np.uint64(32)) % np.uint64(VAL_BUCKETS) == 0
+
+
+def split_indices(snapshot):
+    """Train/validation row indices, split per sentence id by is_validation."""
+    if len(snapshot) < 10:
+        raise RuntimeError(
+            f"Only {len(snapshot)} samples found — need more labelled data to train."
+        )
+    val = is_validation(snapshot.ids)
+    if val.all() or not val.any():
+        raise RuntimeError("Validation split came out empty — need more labelled data to train.")
+    return np.flatnonzero(~val), np.flatnonzero(val)
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+class MemmapSentenceDataset(Dataset):
+    """Serves rows of a snapshot as tensors that view the memory map directly."""
+
+    def __init__(self, snapshot, indices):
+        self.snapshot = snapshot
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        j = self.indices[idx]
+        snap = self.snapshot
+        return {
+            "input_ids": torch.from_numpy(snap.input_ids[j]),
+            "attention_mask": torch.from_numpy(snap.attention_mask[j]),
+            "score": torch.tensor(snap.scores[j], dtype=torch.float),
+            "topic_id": torch.tensor(snap.topic_ids[j], dtype=torch.long),
+        }
@@ -1,6 +1,7 @@
+import os
 import torch
 import torch.nn as nn
-from transformers import DistilBertModel
+from transformers import DistilBertConfig, DistilBertModel
 
 TOPIC_LABELS = ["Inflation", "Growth", "Employment", "Guidance", "Boilerplate"]
 
@@ -29,6 +30,24 @@ TOPIC_ALIAS = {
     "Dovish": "Guidance",
 }
 
+# Distilled student: half the layers, half the width of distilbert-base
+STUDENT_LAYERS = 3
+STUDENT_DIM = 384
+STUDENT_HEADS = 6
+
+# Exported checkpoints: "teacher" (export/model.pt), distilled "student" (export/student/)
+VARIANTS = ("teacher", "student")
+
+
+def variant_paths(variant, export_dir):
+    """(weights, backbone config or None) for an exported variant."""
+    if variant == "teacher":
+        return os.path.join(export_dir, "model.pt"), None
+    if variant == "student":
+        student_dir = os.path.join(export_dir, "student")
+        return os.path.join(student_dir, "model.pt"), os.path.join(student_dir, "config.json")
+    raise ValueError(f"Unknown model variant: {variant!r} (expected one of {VARIANTS})")
+
 
 def normalize_topic(raw_topic: str) -> str | None:
     """Map a raw GPT topic label to one of the 5 canonical labels."""
@@ -52,11 +71,18 @@ class MultiTaskDistilBERT(nn.Module):
       - Classification: topic (Inflation, Growth, Employment, Guidance, Boilerplate)
 
     Both heads share the [CLS] token representation from the DistilBERT backbone.
+
+    With no config the backbone starts from pretrained distilbert-base-uncased;
+    passing a DistilBertConfig builds a randomly initialised backbone of that
+    shape instead (used for the distilled student).
     """
 
-    def __init__(self, num_topics=len(TOPIC_LABELS), dropout=0.3):
+    def __init__(self, num_topics=len(TOPIC_LABELS), dropout=0.3, config=None):
         super().__init__()
-        self.distilbert = DistilBertModel.from_pretrained("distilbert-base-uncased")
+        if config is None:
+            self.distilbert = DistilBertModel.from_pretrained("distilbert-base-uncased")
+        else:
+            self.distilbert = DistilBertModel(config)
         hidden_size = self.distilbert.config.hidden_size  # 768
 
         self.score_head = nn.Sequential(
@@ -84,3 +110,31 @@ class MultiTaskDistilBERT(nn.Module):
         topic_logits = self.topic_head(cls_output)  # (batch, num_topics)
 
         return score, topic_logits
+
+
+def student_config(n_layers=STUDENT_LAYERS, dim=STUDENT_DIM, n_heads=STUDENT_HEADS):
+    """Backbone config for the smaller student model (same vocab as the teacher)."""
+    return DistilBertConfig(n_layers=n_layers, dim=dim, hidden_dim=4 * dim, n_heads=n_heads)
+
+
+@torch.no_grad()
+def init_student_from_teacher(student, teacher):
+    """
+    Seed the student's embeddings with a projection of the teacher's.
+
+    The widths differ, so the teacher's word and position embeddings are
+    projected onto their top principal directions. The student then starts
+    from the teacher's token geometry rather than from noise.
+    """
+    t_emb = teacher.distilbert.embeddings
+    s_emb = student.distilbert.embeddings
+    dim = s_emb.word_embeddings.weight.shape[1]
+
+    words = t_emb.word_embeddings.weight.float()
+    mean = words.mean(dim=0, keepdim=True)
+    _, _, v = torch.linalg.svd(words - mean, full_matrices=False)
+    proj = v[:dim].T  # (teacher_dim, student_dim)
+
+    s_emb.word_embeddings.weight.copy_((words - mean) @ proj)
+    n_pos = s_emb.position_embeddings.weight.shape[0]
+    s_emb.position_embeddings.weight.copy_(t_emb.position_embeddings.weight[:n_pos].float() @ proj)
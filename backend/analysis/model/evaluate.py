@@ -0,0 +1,230 @@
+"""
+Evaluate exported checkpoints against a cached data snapshot.
+
+Scores the teacher (export/model.pt) and/or the distilled student
+(export/student/) on a snapshot's validation split, without retraining,
+and records the results under "evaluations" in metadata.json.
+
+Inference runs in large batches straight off the snapshot's memory maps,
+sorted by length so each batch only carries the padding it needs. All
+metrics are computed on whole arrays at once.
+
+    python backend/analysis/model/evaluate.py [--variant all] [--snapshot latest] [--split val]
+"""
+
+import os
+import json
+import time
+import datetime
+import argparse
+import numpy as np
+import torch
+from transformers import DistilBertConfig
+
+from distilbert_model import MultiTaskDistilBERT, TOPIC_LABELS, VARIANTS, variant_paths
+from dataset_cache import load_snapshot, split_indices
+
+EXPORT_DIR = os.path.join(os.path.dirname(__file__), "export")
+EVAL_BATCH_SIZE = 64
+LATENCY_SENTENCES = 200
+LATENCY_BATCH = 32
+
+
+# ---------------------------------------------------------------------------
+# metadata.json
+# ---------------------------------------------------------------------------
+def read_metadata():
+    path = os.path.join(EXPORT_DIR, "metadata.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def update_metadata(updates):
+    """Merge keys into export/metadata.json, keeping what other runs wrote."""
+    metadata = read_metadata()
+    metadata.update(updates)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    with open(os.path.join(EXPORT_DIR, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+def load_model(variant, device):
+    weights_path, config_path = variant_paths(variant, EXPORT_DIR)
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"No {variant} checkpoint at {weights_path}")
+    if config_path:
+        model = MultiTaskDistilBERT(config=DistilBertConfig.from_json_file(config_path))
+    else:
+        model = MultiTaskDistilBERT()
+    model.load_state_dict(torch.load(weights_path, map_location=device, weights_only=True))
+    return model.to(device).eval()
+
+
+# ---------------------------------------------------------------------------
+# Batched inference
+# ---------------------------------------------------------------------------
+@torch.inference_mode()
+def predict(model, snapshot, indices, device, batch_size=EVAL_BATCH_SIZE, amp_dtype=None):
+    """
+    (scores, topic_logits) for snapshot rows `indices`, in that order.
+
+    Rows are run shortest-first and each batch is cut to its longest
+    attention mask, so short sentences don't pay for 128 positions.
+    """
+    model.eval()
+    indices = np.asarray(indices, dtype=np.int64)
+    lengths = snapshot.attention_mask[indices].sum(axis=1)
+    order = np.argsort(lengths, kind="stable")
+
+    scores = np.empty(len(indices), dtype=np.float32)
+    logits = np.empty((len(indices), len(TOPIC_LABELS)), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        pos = order[start:start + batch_size]
+        rows = indices[pos]
+        width = max(int(lengths[pos].max()), 1)
+        input_ids = torch.from_numpy(snapshot.input_ids[rows, :width]).to(device)
+        attention_mask = torch.from_numpy(snapshot.attention_mask[rows, :width]).to(device)
+        with torch.autocast(device_type=device.type, dtype=amp_dtype, enabled=amp_dtype is not None):
+            s, l = model(input_ids, attention_mask)
+        scores[pos] = s.float().cpu().numpy()
+        logits[pos] = l.float().cpu().numpy()
+    return scores, logits
+
+
+@torch.inference_mode()
+def measure_latency(model, snapshot, indices, device, batch_size):
+    """Mean milliseconds per sentence at the given batch size."""
+    model.eval()
+    idx = np.sort(np.asarray(indices)[:LATENCY_SENTENCES])
+    input_ids = torch.from_numpy(snapshot.input_ids[idx]).to(device)
+    attention_mask = torch.from_numpy(snapshot.attention_mask[idx]).to(device)
+    model(input_ids[:batch_size], attention_mask[:batch_size])  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(idx), batch_size):
+        model(input_ids[i:i + batch_size], attention_mask[i:i + batch_size])
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) * 1000 / len(idx)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+def cross_entropy(logits, targets):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    log_probs = shifted - np.log(np.exp(shifted).sum(axis=1, keepdims=True))
+    return float(-log_probs[np.arange(len(targets)), targets].mean())
+
+
+def compute_metrics(true_scores, pred_scores, true_topics, topic_logits):
+    """Regression and per-topic classification metrics from whole arrays."""
+    n_topics = len(TOPIC_LABELS)
+    err = pred_scores - true_scores
+    pred_topics = topic_logits.argmax(axis=1)
+
+    confusion = np.bincount(
+        true_topics * n_topics + pred_topics, minlength=n_topics * n_topics
+    ).reshape(n_topics, n_topics)
+    tp = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    return {
+        "samples": int(len(true_scores)),
+        "mae": round(float(np.abs(err).mean()), 4),
+        "rmse": round(float(np.sqrt((err ** 2).mean())), 4),
+        "mse": round(float((err ** 2).mean()), 4),
+        "topic_cross_entropy": round(cross_entropy(topic_logits, true_topics), 4),
+        "topic_accuracy": round(float(tp.sum() / max(len(true_topics), 1)), 4),
+        "macro_f1": round(float(f1[support > 0].mean()) if support.any() else 0.0, 4),
+        "per_topic": {
+            label: {
+                "precision": round(float(precision[i]), 4),
+                "recall": round(float(recall[i]), 4),
+                "f1": round(float(f1[i]), 4),
+                "support": int(support[i]),
+            }
+            for i, label in enumerate(TOPIC_LABELS)
+        },
+        "confusion_matrix": confusion.tolist(),
+    }
+
+
+def format_report(metrics):
+    lines = [f"{'':>12s} {'precision':>9s} {'recall':>9s} {'f1':>9s} {'support':>9s}"]
+    for label, m in metrics["per_topic"].items():
+        lines.append(
+            f"{label:>12s} {m['precision']:9.2f} {m['recall']:9.2f} {m['f1']:9.2f} {m['support']:9d}"
+        )
+    lines.append("")
+    lines.append(f"{'accuracy':>12s} {metrics['topic_accuracy']:29.2f} {metrics['samples']:9d}")
+    lines.append(f"{'macro f1':>12s} {metrics['macro_f1']:29.2f}")
+    lines.append(f"MAE={metrics['mae']:.4f}  RMSE={metrics['rmse']:.4f}")
+    return "\n".join(lines)
+
+
+def evaluate_model(model, snapshot, indices, device, batch_size=EVAL_BATCH_SIZE, amp_dtype=None):
+    scores, logits = predict(model, snapshot, indices, device, batch_size, amp_dtype)
+    return compute_metrics(snapshot.scores[indices], scores, snapshot.topic_ids[indices], logits)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(args):
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    snapshot = load_snapshot(args.snapshot)
+    if args.split == "val":
+        _, indices = split_indices(snapshot)
+    else:
+        indices = np.arange(len(snapshot))
+
+    variants = VARIANTS if args.variant == "all" else (args.variant,)
+    evaluations = read_metadata().get("evaluations", {})
+    for variant in variants:
+        try:
+            model = load_model(variant, device)
+        except FileNotFoundError as e:
+            print(e)
+            continue
+
+        start = time.perf_counter()
+        metrics = evaluate_model(model, snapshot, indices, device, args.batch_size)
+        elapsed = time.perf_counter() - start
+        metrics.update({
+            "snapshot": snapshot.key,
+            "split": args.split,
+            "eval_seconds": round(elapsed, 2),
+            "latency_ms_per_sentence": round(measure_latency(model, snapshot, indices, device, 1), 3),
+            f"latency_ms_per_sentence_batch{LATENCY_BATCH}": round(
+                measure_latency(model, snapshot, indices, device, LATENCY_BATCH), 3),
+            "evaluated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        })
+        evaluations[variant] = metrics
+
+        print(f"\n=== {variant} on {snapshot.key}/{args.split} ({len(indices)} rows, {elapsed:.1f}s) ===")
+        print(format_report(metrics))
+
+    if evaluations and not args.no_write:
+        update_metadata({"evaluations": evaluations})
+        print(f"\nResults written to {os.path.join(EXPORT_DIR, 'metadata.json')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate exported checkpoints on a data snapshot")
+    parser.add_argument("--variant", choices=VARIANTS + ("all",), default="all")
+    parser.add_argument("--snapshot", default="latest", help="cached data snapshot hash")
+    parser.add_argument("--split", choices=["val", "all"], default="val",
+                        help="held-out validation rows (same split as training) or every row")
+    parser.add_argument("--batch-size", type=int, default=EVAL_BATCH_SIZE)
+    parser.add_argument("--no-write", action="store_true", help="print only, leave metadata.json alone")
+    main(parser.parse_args())
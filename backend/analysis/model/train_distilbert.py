@@ -5,27 +5,73 @@ Distillation approach: uses GPT-4o-mini labels already stored in the
 transcript_sentences table as ground-truth targets so the smaller
 DistilBERT model learns to replicate them.
 
+Labelled data is read through a pre-tokenised snapshot (dataset_cache.py);
+only the first run, or --refresh-data, queries the database.
+
+--fast turns on the high-throughput settings for a nightly retrain on a
+many-core CPU box: parallel DataLoader workers, bf16 autocast where the
+CPU supports it natively, and all remaining cores for torch. Combine with
+--accum-steps for a larger effective batch. Samples/sec is reported per
+epoch.
+
+--distill trains a smaller student (3 layers, 384 hidden by default)
+against the soft outputs of the exported model, mixed with the GPT labels,
+and records accuracy and latency for both under "variants" in
+metadata.json. Set TONE_MODEL_VARIANT=student to score with it.
+
+--incremental resumes from export/model.pt (and export/optimizer.pt when
+present) and trains only on sentences labelled after the last run's
+last_labelled_id, plus a replay sample of older rows, stopping early on
+validation loss. The export is only replaced if it beats the current
+checkpoint on the same validation rows.
+
+Validation runs through evaluate.py's batched inference path; the
+classification report and the "evaluations" entry describe the best
+checkpoint. evaluate.py also scores exported checkpoints on its own.
+
 Outputs:
     backend/analysis/model/export/
         model.pt          – state dict
+        optimizer.pt      – optimizer state for --incremental (not committed)
         tokenizer/        – saved HF tokenizer
         metadata.json     – label maps, training metrics
+        student/          – distilled student (model.pt + config.json)
 """
 
 import os
-import json
+import time
+import shutil
 import argparse
+import contextlib
 import numpy as np
-import psycopg2
 import torch
 import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
-from transformers import DistilBertTokenizer
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, mean_absolute_error
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
 from dotenv import load_dotenv
 
-from distilbert_model import MultiTaskDistilBERT, TOPIC_LABELS, normalize_topic
+from distilbert_model import (
+    MultiTaskDistilBERT,
+    TOPIC_LABELS,
+    STUDENT_LAYERS,
+    STUDENT_DIM,
+    STUDENT_HEADS,
+    student_config,
+    init_student_from_teacher,
+)
+from dataset_cache import load_snapshot, split_indices, is_validation, MemmapSentenceDataset
+from evaluate import (
+    EXPORT_DIR,
+    EVAL_BATCH_SIZE,
+    LATENCY_BATCH,
+    read_metadata,
+    update_metadata,
+    predict,
+    measure_latency,
+    cross_entropy,
+    compute_metrics,
+    format_report,
+)
 
 # .env lives in backend/ — resolve from this file's location
 _BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -37,81 +83,229 @@ load_dotenv(os.path.join(_BACKEND_DIR, ".env"))
 BATCH_SIZE = 16
 LEARNING_RATE = 2e-5
 EPOCHS = 10
+INCREMENTAL_EPOCHS = 4
+EARLY_STOP_PATIENCE = 2
+REPLAY_RATIO = 1.0   # replayed old samples per new sample
+REPLAY_MIN = 256
 MAX_SEQ_LEN = 128
 SCORE_LOSS_WEIGHT = 1.0
 TOPIC_LOSS_WEIGHT = 1.0
 GRAD_CLIP = 1.0
 
-EXPORT_DIR = os.path.join(os.path.dirname(__file__), "export")
+# Throughput (see --fast)
+NUM_WORKERS = 0
+ACCUM_STEPS = 1
+PREFETCH_FACTOR = 4
+
+# Distillation (see --distill)
+STUDENT_LR = 1e-4
+DISTILL_TEMPERATURE = 2.0
+DISTILL_ALPHA = 0.7
+
+STUDENT_DIR = os.path.join(EXPORT_DIR, "student")
 
 
 # ---------------------------------------------------------------------------
-# Dataset
+# Runtime tuning
 # ---------------------------------------------------------------------------
-class SentenceDataset(Dataset):
-    """Wraps tokenised sentences with regression + classification targets."""
+def bf16_supported(device):
+    """True when bf16 autocast runs natively rather than being emulated."""
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    cpu = getattr(torch, "cpu", None)
+    checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    return any(getattr(cpu, name, lambda: False)() for name in checks)
+
+
+def configure_runtime(args, device):
+    """Fill in --fast defaults, set torch threads and pick the autocast dtype."""
+    cpus = os.cpu_count() or 1
+    if args.fast:
+        if args.num_workers is None:
+            args.num_workers = min(4, max(cpus // 4, 1)) if cpus > 1 else 0
+        if args.precision is None:
+            args.precision = "bf16"
+        if args.threads is None:
+            args.threads = max(cpus - args.num_workers, 1)
+    if args.num_workers is None:
+        args.num_workers = NUM_WORKERS
+    if args.precision is None:
+        args.precision = "fp32"
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+        torch.set_num_interop_threads(max(args.threads // 4, 1))
+
+    amp_dtype = None
+    if args.precision == "bf16":
+        if bf16_supported(device):
+            amp_dtype = torch.bfloat16
+        else:
+            print("bf16 not natively supported on this device, training in fp32")
+            args.precision = "fp32"
 
-    def __init__(self, texts, scores, topic_ids, tokenizer, max_len=MAX_SEQ_LEN):
-        self.texts = texts
-        self.scores = scores
-        self.topic_ids = topic_ids
-        self.tokenizer = tokenizer
-        self.max_len = max_len
+    print(
+        f"Runtime: threads={torch.get_num_threads()} workers={args.num_workers} "
+        f"precision={args.precision} accum_steps={args.accum_steps} "
+        f"effective_batch={args.batch_size * args.accum_steps}"
+    )
+    return amp_dtype
 
-    def __len__(self):
-        return len(self.texts)
 
-    def __getitem__(self, idx):
-        encoding = self.tokenizer(
-            self.texts[idx],
-            max_length=self.max_len,
-            padding="max_length",
-            truncation=True,
-            return_tensors="pt",
-        )
-        return {
-            "input_ids": encoding["input_ids"].squeeze(0),
-            "attention_mask": encoding["attention_mask"].squeeze(0),
-            "score": torch.tensor(self.scores[idx], dtype=torch.float),
-            "topic_id": torch.tensor(self.topic_ids[idx], dtype=torch.long),
+def autocast(device, amp_dtype):
+    if amp_dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device.type, dtype=amp_dtype)
+
+
+def _worker_init(_):
+    # Workers only slice the memory map; leave the cores to the main process
+    torch.set_num_threads(1)
+
+
+def make_loader(dataset, args, device, shuffle=False):
+    kwargs = {}
+    if args.num_workers > 0:
+        kwargs = {
+            "persistent_workers": True,
+            "prefetch_factor": PREFETCH_FACTOR,
+            "worker_init_fn": _worker_init,
         }
+    return DataLoader(
+        dataset,
+        batch_size=args.batch_size,
+        shuffle=shuffle,
+        num_workers=args.num_workers,
+        pin_memory=device.type == "cuda",
+        **kwargs,
+    )
 
 
 # ---------------------------------------------------------------------------
-# Data loading
+# Shared loop pieces
 # ---------------------------------------------------------------------------
-def load_training_data():
-    """Pull GPT-labelled sentences from the database."""
-    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT sentence_text, stance_score, topic
-        FROM transcript_sentences
-        WHERE sentence_text IS NOT NULL
-          AND stance_score IS NOT NULL
-          AND topic IS NOT NULL
-        """
+score_criterion = nn.MSELoss()
+topic_criterion = nn.CrossEntropyLoss()
+
+
+def supervised_loss(pred_score, pred_topic_logits, batch, device):
+    """Ground-truth loss against the GPT labels."""
+    target_score = batch["score"].to(device, non_blocking=True)
+    target_topic = batch["topic_id"].to(device, non_blocking=True)
+    loss_score = score_criterion(pred_score, target_score)
+    loss_topic = topic_criterion(pred_topic_logits, target_topic)
+    return SCORE_LOSS_WEIGHT * loss_score + TOPIC_LOSS_WEIGHT * loss_topic
+
+
+def train_epoch(model, loader, optimizer, args, device, amp_dtype, loss_fn):
+    """One pass over loader; returns (mean loss, samples/sec)."""
+    model.train()
+    total_loss, seen = 0.0, 0
+    start = time.perf_counter()
+    n_batches = len(loader)
+    optimizer.zero_grad(set_to_none=True)
+    for step, batch in enumerate(loader, 1):
+        input_ids = batch["input_ids"].to(device, non_blocking=True)
+        attention_mask = batch["attention_mask"].to(device, non_blocking=True)
+
+        with autocast(device, amp_dtype):
+            pred_score, pred_topic_logits = model(input_ids, attention_mask)
+        # Losses in fp32 whatever the forward pass ran in
+        loss = loss_fn(pred_score.float(), pred_topic_logits.float(), batch, device)
+
+        # Average over the batches actually in this group; the last group
+        # of an epoch can be short
+        group_start = (step - 1) // args.accum_steps * args.accum_steps
+        (loss / min(args.accum_steps, n_batches - group_start)).backward()
+        if step % args.accum_steps == 0 or step == n_batches:
+            nn.utils.clip_grad_norm_(model.parameters(), GRAD_CLIP)
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+
+        total_loss += loss.item() * input_ids.size(0)
+        seen += input_ids.size(0)
+
+    return total_loss / seen, seen / (time.perf_counter() - start)
+
+
+def validate(model, snapshot, val_idx, device, amp_dtype):
+    """Ground-truth loss and metrics for the validation rows, in one batched pass."""
+    scores, logits = predict(model, snapshot, val_idx, device, EVAL_BATCH_SIZE, amp_dtype)
+    true_scores, true_topics = snapshot.scores[val_idx], snapshot.topic_ids[val_idx]
+    val_loss = (
+        SCORE_LOSS_WEIGHT * float(((scores - true_scores) ** 2).mean())
+        + TOPIC_LOSS_WEIGHT * cross_entropy(logits, true_topics)
     )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    return val_loss, compute_metrics(true_scores, scores, true_topics, logits)
+
 
-    texts, scores, topics = [], [], []
-    topic_to_id = {t: i for i, t in enumerate(TOPIC_LABELS)}
+def runtime_summary(args, throughput):
+    return {
+        "threads": torch.get_num_threads(),
+        "num_workers": args.num_workers,
+        "precision": args.precision,
+        "effective_batch_size": args.batch_size * args.accum_steps,
+        "samples_per_sec": [round(x, 1) for x in throughput],
+    }
 
-    skipped = 0
-    for text, score, topic in rows:
-        canonical = normalize_topic(topic)
-        if canonical is None:
-            skipped += 1
-            continue
-        texts.append(text)
-        scores.append(float(score))
-        topics.append(topic_to_id[canonical])
 
-    print(f"Loaded {len(texts)} labelled sentences from database (skipped {skipped})")
-    return texts, scores, topics
+def incremental_split(snapshot, last_labelled_id, replay_ratio, seed=42):
+    """
+    Train/val rows for an incremental run.
+
+    Validation rows come from the same per-sentence rule split_indices
+    uses, so rows the previous runs validated on never leak into training.
+    Training uses every new non-validation row plus a random replay sample
+    of older training rows to limit forgetting.
+    """
+    val = is_validation(snapshot.ids)
+    is_new = snapshot.ids > last_labelled_id
+    new_train = np.flatnonzero(is_new & ~val)
+    old_train = np.flatnonzero(~is_new & ~val)
+
+    rng = np.random.default_rng(seed)
+    n_replay = min(len(old_train), max(int(len(new_train) * replay_ratio), REPLAY_MIN))
+    replay = rng.choice(old_train, size=n_replay, replace=False)
+
+    train_idx = np.concatenate([new_train, replay])
+    val_idx = np.flatnonzero(val)
+    return train_idx, val_idx, {"new_samples": int(len(new_train)), "replay_samples": int(n_replay)}
+
+
+def resume(model, optimizer, device, lr):
+    """Load the exported weights and, when present, the optimizer state."""
+    state = torch.load(os.path.join(EXPORT_DIR, "model.pt"), map_location=device, weights_only=True)
+    model.load_state_dict(state)
+    opt_path = os.path.join(EXPORT_DIR, "optimizer.pt")
+    if os.path.exists(opt_path):
+        optimizer.load_state_dict(torch.load(opt_path, map_location=device, weights_only=True))
+        for group in optimizer.param_groups:
+            group["lr"] = lr
+        print("Resumed model and optimizer state from export/")
+    else:
+        print("No export/optimizer.pt, resuming weights with a fresh optimizer")
+
+
+def atomic_save(obj, path):
+    """
+    torch.save to a temp file in the same directory, then rename over path.
+
+    Scorers memory-map model.pt, so overwriting it in place could crash
+    them; a rename leaves their mapping on the old file.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        torch.save(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_checkpoint(model, optimizer):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    atomic_save(model.state_dict(), os.path.join(EXPORT_DIR, "model.pt"))
+    atomic_save(optimizer.state_dict(), os.path.join(EXPORT_DIR, "optimizer.pt"))
 
 
 # ---------------------------------------------------------------------------
@@ -120,145 +314,303 @@ def load_training_data():
 def train(args):
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Device: {device}")
+    amp_dtype = configure_runtime(args, device)
 
     # ---- data ----
-    texts, scores, topic_ids = load_training_data()
-    if len(texts) < 10:
-        raise RuntimeError(
-            f"Only {len(texts)} samples found — need more labelled data to train."
-        )
-
-    tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
-
-    (
-        train_texts, val_texts,
-        train_scores, val_scores,
-        train_topics, val_topics,
-    ) = train_test_split(
-        texts, scores, topic_ids,
-        test_size=0.2,
-        random_state=42,
-        stratify=topic_ids,
-    )
-
-    train_ds = SentenceDataset(train_texts, train_scores, train_topics, tokenizer)
-    val_ds = SentenceDataset(val_texts, val_scores, val_topics, tokenizer)
-    train_dl = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True)
-    val_dl = DataLoader(val_ds, batch_size=args.batch_size)
+    # Incremental runs need the newest labels, so they re-read the DB
+    # unless pinned to a specific snapshot
+    refresh = args.refresh_data or (args.incremental and args.snapshot == "latest")
+    snapshot = load_snapshot(args.snapshot, refresh=refresh)
+    patience = args.patience
+
+    if args.incremental:
+        last_id = read_metadata().get("last_labelled_id")
+        if last_id is None:
+            raise RuntimeError("metadata.json has no last_labelled_id — run a full training first.")
+        if not (snapshot.ids > last_id).any():
+            print(f"No sentences labelled since id {last_id}, model is up to date.")
+            return
+        train_idx, val_idx, plan = incremental_split(snapshot, last_id, args.replay_ratio)
+        print(f"Incremental: {plan['new_samples']} new + {plan['replay_samples']} replayed samples")
+        epochs = args.epochs or INCREMENTAL_EPOCHS
+        patience = patience or EARLY_STOP_PATIENCE
+    else:
+        train_idx, val_idx = split_indices(snapshot)
+        epochs = args.epochs or EPOCHS
+
+    train_ds = MemmapSentenceDataset(snapshot, train_idx)
+    train_dl = make_loader(train_ds, args, device, shuffle=True)
 
     # ---- model ----
     model = MultiTaskDistilBERT().to(device)
     optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
 
-    score_criterion = nn.MSELoss()
-    topic_criterion = nn.CrossEntropyLoss()
-
     best_val_loss = float("inf")
     best_metrics = {}
+    throughput = []
+    stale_epochs = 0
+
+    if args.incremental:
+        resume(model, optimizer, device, args.lr)
+        # Only overwrite the export if training actually beats it
+        best_val_loss, _ = validate(model, snapshot, val_idx, device, amp_dtype)
+        print(f"Current checkpoint val_loss={best_val_loss:.4f}")
+
+    for epoch in range(1, epochs + 1):
+        train_loss, samples_per_sec = train_epoch(
+            model, train_dl, optimizer, args, device, amp_dtype, supervised_loss
+        )
+        throughput.append(samples_per_sec)
 
-    for epoch in range(1, args.epochs + 1):
-        # --- train ---
-        model.train()
-        train_loss = 0.0
-        for batch in train_dl:
-            input_ids = batch["input_ids"].to(device)
-            attention_mask = batch["attention_mask"].to(device)
-            target_score = batch["score"].to(device)
-            target_topic = batch["topic_id"].to(device)
+        val_loss, metrics = validate(model, snapshot, val_idx, device, amp_dtype)
 
-            pred_score, pred_topic_logits = model(input_ids, attention_mask)
+        print(
+            f"Epoch {epoch}/{epochs}  "
+            f"train_loss={train_loss:.4f}  val_loss={val_loss:.4f}  MAE={metrics['mae']:.4f}  "
+            f"{samples_per_sec:.1f} samples/s"
+        )
 
-            loss_score = score_criterion(pred_score, target_score)
-            loss_topic = topic_criterion(pred_topic_logits, target_topic)
-            loss = SCORE_LOSS_WEIGHT * loss_score + TOPIC_LOSS_WEIGHT * loss_topic
+        if val_loss < best_val_loss:
+            best_val_loss = val_loss
+            best_metrics = {**metrics, "val_loss": val_loss, "epoch": epoch}
+            stale_epochs = 0
+            save_checkpoint(model, optimizer)
+        else:
+            stale_epochs += 1
+            if patience and stale_epochs >= patience and epoch < epochs:
+                print(f"Early stopping: no val_loss improvement for {patience} epochs")
+                break
+
+    if not best_metrics:
+        print("\nNo epoch beat the current checkpoint, export left unchanged.")
+        return
 
-            optimizer.zero_grad()
-            loss.backward()
-            nn.utils.clip_grad_norm_(model.parameters(), GRAD_CLIP)
-            optimizer.step()
+    # ---- final report ----
+    print("\n=== Best Model (epoch {}) ===".format(best_metrics.get("epoch", "?")))
+    print(f"  MAE:      {best_metrics.get('mae', '?'):.4f}")
+    print(f"  Val Loss: {best_metrics.get('val_loss', '?'):.4f}")
+    print(f"  Throughput: {np.mean(throughput):.1f} samples/s (mean over {len(throughput)} epochs)")
+
+    print("\n=== Classification Report (best checkpoint) ===")
+    print(format_report(best_metrics))
+
+    # ---- save tokenizer + metadata ----
+    shutil.copytree(snapshot.tokenizer_dir, os.path.join(EXPORT_DIR, "tokenizer"), dirs_exist_ok=True)
+    updates = {
+        "last_labelled_id": snapshot.manifest["max_sentence_id"],
+        "snapshot": snapshot.key,
+        "training_runtime": runtime_summary(args, throughput),
+    }
+    if args.incremental:
+        updates["last_incremental_run"] = {
+            **plan,
+            "epochs_run": len(throughput),
+            "best_epoch": best_metrics["epoch"],
+            "mae": best_metrics["mae"],
+            "val_loss": round(best_metrics["val_loss"], 4),
+            "val_samples": len(val_idx),
+        }
+    else:
+        updates.update({
+            "topic_labels": TOPIC_LABELS,
+            "max_seq_len": MAX_SEQ_LEN,
+            "best_epoch": best_metrics.get("epoch"),
+            "best_mae": best_metrics["mae"],
+            "best_val_loss": round(best_metrics["val_loss"], 4),
+            "train_samples": len(train_ds),
+            "val_samples": len(val_idx),
+        })
+        # Same split evaluate.py --split val uses, so the numbers compare
+        evaluations = read_metadata().get("evaluations", {})
+        evaluations["teacher"] = {
+            **{k: v for k, v in best_metrics.items() if k not in ("val_loss", "epoch")},
+            "snapshot": snapshot.key,
+            "split": "val",
+        }
+        updates["evaluations"] = evaluations
+    update_metadata(updates)
+    print(f"\nModel artefacts saved to {EXPORT_DIR}")
 
-            train_loss += loss.item() * input_ids.size(0)
 
-        train_loss /= len(train_ds)
+# ---------------------------------------------------------------------------
+# Teacher → student distillation
+# ---------------------------------------------------------------------------
+class DistillDataset(MemmapSentenceDataset):
+    """Snapshot rows plus the teacher's cached outputs for each row."""
+
+    def __init__(self, snapshot, indices, teacher_scores, teacher_logits):
+        super().__init__(snapshot, indices)
+        self.teacher_scores = teacher_scores
+        self.teacher_logits = teacher_logits
 
-        # --- validate ---
-        model.eval()
-        val_loss = 0.0
-        all_true_scores, all_pred_scores = [], []
-        all_true_topics, all_pred_topics = [], []
+    def __getitem__(self, idx):
+        item = super().__getitem__(idx)
+        j = self.indices[idx]
+        item["teacher_score"] = torch.tensor(self.teacher_scores[j])
+        item["teacher_logits"] = torch.from_numpy(self.teacher_logits[j])
+        return item
+
+
+def distillation_loss(temperature, alpha):
+    def loss_fn(pred_score, pred_topic_logits, batch, device):
+        teacher_score = batch["teacher_score"].to(device, non_blocking=True)
+        teacher_logits = batch["teacher_logits"].to(device, non_blocking=True)
+        # Soft targets: KL on temperature-scaled topic distributions (scaled
+        # by T^2 to keep gradient size comparable) plus the teacher's score
+        soft_topic = F.kl_div(
+            F.log_softmax(pred_topic_logits / temperature, dim=1),
+            F.softmax(teacher_logits / temperature, dim=1),
+            reduction="batchmean",
+        ) * temperature ** 2
+        soft = SCORE_LOSS_WEIGHT * score_criterion(pred_score, teacher_score) + TOPIC_LOSS_WEIGHT * soft_topic
+        hard = supervised_loss(pred_score, pred_topic_logits, batch, device)
+        return alpha * soft + (1 - alpha) * hard
+    return loss_fn
+
+
+def load_teacher(device):
+    path = os.path.join(EXPORT_DIR, "model.pt")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No teacher at {path} — train it first without --distill")
+    teacher = MultiTaskDistilBERT()
+    teacher.load_state_dict(torch.load(path, map_location=device, weights_only=True))
+    return teacher.to(device).eval()
+
+
+def variant_report(model, snapshot, val_idx, device, path):
+    """Accuracy and latency of one model variant on the validation split."""
+    _, metrics = validate(model, snapshot, val_idx, device, None)
+    return {
+        "path": path,
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "mae": metrics["mae"],
+        "topic_accuracy": metrics["topic_accuracy"],
+        "macro_f1": metrics["macro_f1"],
+        "latency_ms_per_sentence": round(measure_latency(model, snapshot, val_idx, device, 1), 3),
+        f"latency_ms_per_sentence_batch{LATENCY_BATCH}": round(
+            measure_latency(model, snapshot, val_idx, device, LATENCY_BATCH), 3),
+    }
+
+
+def distill(args):
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"Device: {device}")
+    amp_dtype = configure_runtime(args, device)
 
-        with torch.no_grad():
-            for batch in val_dl:
-                input_ids = batch["input_ids"].to(device)
-                attention_mask = batch["attention_mask"].to(device)
-                target_score = batch["score"].to(device)
-                target_topic = batch["topic_id"].to(device)
+    snapshot = load_snapshot(args.snapshot, refresh=args.refresh_data)
+    train_idx, val_idx = split_indices(snapshot)
+    teacher = load_teacher(device)
 
-                pred_score, pred_topic_logits = model(input_ids, attention_mask)
+    # The teacher is frozen, so its outputs are computed once up front
+    # instead of running it alongside the student every epoch
+    teacher_scores, teacher_logits = predict(
+        teacher, snapshot, np.arange(len(snapshot)), device, EVAL_BATCH_SIZE, amp_dtype
+    )
 
-                loss_score = score_criterion(pred_score, target_score)
-                loss_topic = topic_criterion(pred_topic_logits, target_topic)
-                loss = SCORE_LOSS_WEIGHT * loss_score + TOPIC_LOSS_WEIGHT * loss_topic
-                val_loss += loss.item() * input_ids.size(0)
+    train_ds = DistillDataset(snapshot, train_idx, teacher_scores, teacher_logits)
+    train_dl = make_loader(train_ds, args, device, shuffle=True)
 
-                all_true_scores.extend(target_score.cpu().numpy())
-                all_pred_scores.extend(pred_score.cpu().numpy())
-                all_true_topics.extend(target_topic.cpu().numpy())
-                all_pred_topics.extend(pred_topic_logits.argmax(dim=1).cpu().numpy())
+    config = student_config(args.student_layers, args.student_dim, args.student_heads)
+    student = MultiTaskDistilBERT(config=config)
+    init_student_from_teacher(student, teacher)
+    student.to(device)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.student_lr)
+    loss_fn = distillation_loss(args.temperature, args.alpha)
 
-        val_loss /= len(val_ds)
-        mae = mean_absolute_error(all_true_scores, all_pred_scores)
+    os.makedirs(STUDENT_DIR, exist_ok=True)
+    student_path = os.path.join(STUDENT_DIR, "model.pt")
+    best_val_loss = float("inf")
+    best_epoch = None
+    throughput = []
 
+    epochs = args.epochs or EPOCHS
+    for epoch in range(1, epochs + 1):
+        train_loss, samples_per_sec = train_epoch(
+            student, train_dl, optimizer, args, device, amp_dtype, loss_fn
+        )
+        throughput.append(samples_per_sec)
+        val_loss, metrics = validate(student, snapshot, val_idx, device, amp_dtype)
         print(
-            f"Epoch {epoch}/{args.epochs}  "
-            f"train_loss={train_loss:.4f}  val_loss={val_loss:.4f}  MAE={mae:.4f}"
+            f"Epoch {epoch}/{epochs}  "
+            f"distill_loss={train_loss:.4f}  val_loss={val_loss:.4f}  MAE={metrics['mae']:.4f}  "
+            f"{samples_per_sec:.1f} samples/s"
         )
-
         if val_loss < best_val_loss:
-            best_val_loss = val_loss
-            best_metrics = {"mae": mae, "val_loss": val_loss, "epoch": epoch}
-            # save checkpoint
-            os.makedirs(EXPORT_DIR, exist_ok=True)
-            torch.save(model.state_dict(), os.path.join(EXPORT_DIR, "model.pt"))
+            best_val_loss, best_epoch = val_loss, epoch
+            atomic_save(student.state_dict(), student_path)
 
-    # ---- final report ----
-    print("\n=== Best Model (epoch {}) ===".format(best_metrics.get("epoch", "?")))
-    print(f"  MAE:      {best_metrics.get('mae', '?'):.4f}")
-    print(f"  Val Loss: {best_metrics.get('val_loss', '?'):.4f}")
+    config.to_json_file(os.path.join(STUDENT_DIR, "config.json"))
+    student.load_state_dict(torch.load(student_path, map_location=device, weights_only=True))
 
-    print("\n=== Classification Report (last epoch) ===")
-    print(
-        classification_report(
-            all_true_topics,
-            all_pred_topics,
-            target_names=TOPIC_LABELS,
-            zero_division=0,
+    # ---- side-by-side report ----
+    variants = {
+        "teacher": variant_report(teacher, snapshot, val_idx, device, "model.pt"),
+        "student": variant_report(student, snapshot, val_idx, device, "student/model.pt"),
+    }
+    variants["student"].update({
+        "best_epoch": best_epoch,
+        "temperature": args.temperature,
+        "alpha": args.alpha,
+        "training_runtime": runtime_summary(args, throughput),
+    })
+
+    print(f"\n{'variant':10s} {'params':>12s} {'MAE':>8s} {'topic acc':>10s} {'ms/sent':>9s} {'ms/sent@' + str(LATENCY_BATCH):>11s}")
+    for name, r in variants.items():
+        print(
+            f"{name:10s} {r['parameters']:12,d} {r['mae']:8.4f} {r['topic_accuracy']:10.4f} "
+            f"{r['latency_ms_per_sentence']:9.2f} {r[f'latency_ms_per_sentence_batch{LATENCY_BATCH}']:11.2f}"
         )
-    )
 
-    # ---- save tokenizer + metadata ----
-    tokenizer.save_pretrained(os.path.join(EXPORT_DIR, "tokenizer"))
-    metadata = {
-        "topic_labels": TOPIC_LABELS,
-        "max_seq_len": MAX_SEQ_LEN,
-        "best_epoch": best_metrics.get("epoch"),
-        "best_mae": round(best_metrics.get("mae", 0), 4),
-        "best_val_loss": round(best_metrics.get("val_loss", 0), 4),
-        "train_samples": len(train_ds),
-        "val_samples": len(val_ds),
-    }
-    with open(os.path.join(EXPORT_DIR, "metadata.json"), "w") as f:
-        json.dump(metadata, f, indent=2)
-    print(f"\nModel artefacts saved to {EXPORT_DIR}")
+    update_metadata({"variants": variants})
+    print(f"\nStudent saved to {STUDENT_DIR}")
 
 
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Train multi-task DistilBERT")
-    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--epochs", type=int, default=None,
+                        help=f"max epochs (default {EPOCHS}, or {INCREMENTAL_EPOCHS} with --incremental)")
     parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
     parser.add_argument("--lr", type=float, default=LEARNING_RATE)
+    parser.add_argument("--snapshot", default="latest", help="cached data snapshot hash to train on")
+    parser.add_argument("--refresh-data", action="store_true", help="re-read labelled data from the database")
+    parser.add_argument("--fast", action="store_true",
+                        help="high-throughput preset: loader workers, bf16 autocast, all cores")
+    parser.add_argument("--num-workers", type=int, default=None, help="DataLoader worker processes")
+    parser.add_argument("--accum-steps", type=positive_int, default=ACCUM_STEPS,
+                        help="batches per optimizer step (effective batch = batch size x steps)")
+    parser.add_argument("--precision", choices=["fp32", "bf16"], default=None)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="stop after this many epochs without val_loss improvement")
+
+    incremental_args = parser.add_argument_group("incremental fine-tuning")
+    incremental_args.add_argument("--incremental", action="store_true",
+                                  help="resume export/model.pt on sentences labelled since the last run")
+    incremental_args.add_argument("--replay-ratio", type=float, default=REPLAY_RATIO,
+                                  help="old samples replayed per new sample")
+
+    distill_args = parser.add_argument_group("distillation")
+    distill_args.add_argument("--distill", action="store_true",
+                              help="train a smaller student against export/model.pt")
+    distill_args.add_argument("--student-layers", type=int, default=STUDENT_LAYERS)
+    distill_args.add_argument("--student-dim", type=int, default=STUDENT_DIM)
+    distill_args.add_argument("--student-heads", type=int, default=STUDENT_HEADS)
+    distill_args.add_argument("--student-lr", type=float, default=STUDENT_LR)
+    distill_args.add_argument("--temperature", type=float, default=DISTILL_TEMPERATURE)
+    distill_args.add_argument("--alpha", type=float, default=DISTILL_ALPHA,
+                              help="weight of the teacher's soft targets vs. the GPT labels")
     args = parser.parse_args()
-    train(args)
+    if args.distill:
+        distill(args)
+    else:
+        train(args)
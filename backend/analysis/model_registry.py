@@ -0,0 +1,169 @@
+"""
+Process-wide registry for the tone model.
+
+Everything that scores text in one process (batch_processor, rescore_all,
+the pipeline, the API) shares a single loaded copy per model variant
+instead of each building its own ToneAnalyzer from scratch.
+
+Loading is cheap because:
+  - the module tree is built on the meta device, so no random init and no
+    distilbert-base-uncased download just to overwrite the weights
+  - model.pt is memory-mapped (torch.load(mmap=True)) and assigned into the
+    model as-is, so pages are read lazily instead of copied up front
+  - the fast (Rust) tokenizer is used
+
+After the first get_model() call every later call returns in microseconds.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+import numpy as np
+import torch
+from transformers import DistilBertConfig, DistilBertTokenizerFast
+
+_ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (_ANALYSIS_DIR, os.path.dirname(_ANALYSIS_DIR)):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+import metrics  # noqa: E402
+from model.distilbert_model import MultiTaskDistilBERT, variant_paths  # noqa: E402
+
+MODEL_DIR = os.path.join(_ANALYSIS_DIR, "model", "export")
+MAX_SEQ_LEN = 128
+PREDICT_BATCH_SIZE = int(os.getenv("MODEL_PREDICT_BATCH_SIZE", "64"))
+
+# "teacher" (export/model.pt) or the distilled "student" (export/student/)
+MODEL_VARIANT = os.getenv("TONE_MODEL_VARIANT", "teacher")
+
+
+class LoadedModel:
+    """A model, its tokenizer and the batched prediction path around them."""
+
+    def __init__(self, variant, model, tokenizer, device, weights_path, version, load_seconds):
+        self.variant = variant
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.weights_path = weights_path
+        self.version = version
+        self.load_seconds = load_seconds
+
+    @torch.inference_mode()
+    def predict(self, texts, batch_size=PREDICT_BATCH_SIZE):
+        """(scores, topic_ids) numpy arrays for a list of sentences."""
+        scores = np.empty(len(texts), dtype=np.float32)
+        topics = np.empty(len(texts), dtype=np.int64)
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            with metrics.timed("finsent_tokenize_seconds", variant=self.variant):
+                enc = self.tokenizer(
+                    chunk,
+                    max_length=MAX_SEQ_LEN,
+                    padding=True,
+                    truncation=True,
+                    return_tensors="pt",
+                )
+            with metrics.timed("finsent_forward_seconds", variant=self.variant):
+                score, topic_logits = self.model(
+                    enc["input_ids"].to(self.device), enc["attention_mask"].to(self.device)
+                )
+            metrics.observe("finsent_model_batch_size", len(chunk), variant=self.variant)
+            scores[start:start + len(chunk)] = score.float().cpu().numpy()
+            topics[start:start + len(chunk)] = topic_logits.argmax(dim=1).cpu().numpy()
+        metrics.inc("finsent_sentences_scored_total", len(texts), variant=self.variant)
+        return scores, topics
+
+
+def weights_version(variant, weights_path):
+    """
+    Stable id for a weights file: variant plus a hash of its size and mtime.
+
+    Checkpoints are only ever replaced whole (os.replace), so a new file
+    always gets a new stat and the id changes with the weights, without
+    reading the file.
+    """
+    st = os.stat(weights_path)
+    digest = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+    return f"{variant}-{digest[:12]}"
+
+
+def _build_model(weights_path, config_path):
+    config = DistilBertConfig.from_json_file(config_path) if config_path else DistilBertConfig()
+    # Shapes only: parameters are replaced by the checkpoint's tensors below
+    with torch.device("meta"):
+        model = MultiTaskDistilBERT(config=config)
+
+    state_dict = torch.load(weights_path, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+
+    # position_ids is a non-persistent buffer, so the checkpoint doesn't have it
+    embeddings = model.distilbert.embeddings
+    embeddings.register_buffer(
+        "position_ids",
+        torch.arange(config.max_position_embeddings).expand((1, -1)),
+        persistent=False,
+    )
+    leftover = [n for n, t in list(model.named_parameters()) + list(model.named_buffers()) if t.is_meta]
+    if leftover:
+        raise RuntimeError(f"Checkpoint {weights_path} is missing tensors: {leftover[:5]}")
+    return model
+
+
+def _load(variant):
+    start = time.perf_counter()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    weights_path, config_path = variant_paths(variant, MODEL_DIR)
+    if variant != "teacher" and not os.path.exists(weights_path):
+        print(f"No {variant} model at {weights_path}, falling back to the teacher")
+        return get_model("teacher")
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(os.path.join(MODEL_DIR, "tokenizer"))
+    # Before mapping the file, so the id can't describe a newer checkpoint
+    version = weights_version(variant, weights_path)
+    model = _build_model(weights_path, config_path).to(device)
+    model.eval()
+
+    elapsed = time.perf_counter() - start
+    print(f"DistilBERT sentiment model ({variant}) loaded in {elapsed * 1000:.0f} ms")
+    return LoadedModel(variant, model, tokenizer, device, weights_path, version, elapsed)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+_models = {}
+_lock = threading.RLock()  # reentrant: a missing student falls back to get_model("teacher")
+
+
+def get_model(variant=None):
+    """The process-wide model for `variant`, loading it on first use."""
+    variant = variant or MODEL_VARIANT
+    loaded = _models.get(variant)
+    if loaded is not None:
+        return loaded
+    with _lock:
+        if variant not in _models:
+            _models[variant] = _load(variant)
+        return _models[variant]
+
+
+def is_ready(variant=None):
+    return (variant or MODEL_VARIANT) in _models
+
+
+def warm_up(variant=None):
+    """Load the model and run one forward pass so the first real call is fast."""
+    loaded = get_model(variant)
+    loaded.predict(["Inflation remains elevated."])
+    return loaded
+
+
+def reset():
+    """Drop every loaded model (next get_model() reloads from disk)."""
+    with _lock:
+        _models.clear()
@@ -1,9 +1,25 @@
-"""Batch re-score all unprocessed transcripts. Logs to rescore.log.
-This version fetches ALL content first, then processes offline, then inserts."""
+"""Backfill: score every pending transcript through the scoring_jobs queue. Logs to rescore.log.
+Jobs are claimed a batch at a time, scored with no DB connection held during
+inference, and each transcript is committed as soon as its batch is done.
+A crash or Ctrl-C loses at most one batch of leases, which expire and are
+claimed again, so rerunning resumes where it stopped; several copies can run
+at once (FOR UPDATE SKIP LOCKED).
+Pass --retry-failed to re-queue failed jobs first and --profile to save a
+sampled flamegraph of the run (see profiler.py)."""
 import os, sys, psycopg2, traceback
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+if "--profile" in sys.argv:
+    from profiler import profile_until_exit
+    profile_until_exit("rescore_all")
+
+from schema import migrate
+import scoring_jobs
+
 LOGFILE = os.path.join(os.path.dirname(__file__), "rescore.log")
+BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "20"))
 
 def log(msg):
     with open(LOGFILE, "a") as f:
@@ -12,23 +28,23 @@ def log(msg):
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 DB_URL = os.getenv("DATABASE_URL")
+WORKER = scoring_jobs.worker_id()
 
-# Step 1: Fetch ALL unscored transcript content in ONE query, then close connection
-log("Fetching unscored transcripts...")
-conn = psycopg2.connect(DB_URL, connect_timeout=15)
-cur = conn.cursor()
-cur.execute("""
-    SELECT t.id, t.content FROM transcripts t
-    LEFT JOIN transcript_sentences s ON t.id = s.transcript_id
-    WHERE s.id IS NULL AND t.content IS NOT NULL AND LENGTH(t.content) > 10
-    ORDER BY t.id
-""")
-transcripts = cur.fetchall()
-cur.close()
-conn.close()  # Close immediately — no more connection needed during inference
-log(f"Fetched {len(transcripts)} transcripts into memory")
+def connect():
+    return psycopg2.connect(DB_URL, connect_timeout=15)
 
-if not transcripts:
+# Step 1: Bring the job queue up to date, then close the connection
+log(f"[{WORKER}] Checking scoring jobs...")
+conn = connect()
+migrate(conn)
+if "--retry-failed" in sys.argv:
+    log(f"Re-queued {scoring_jobs.retry_failed(conn)} failed jobs")
+scoring_jobs.enqueue_unscored(conn)
+pending = scoring_jobs.pending_count(conn)
+conn.close()
+log(f"{pending} transcripts pending")
+
+if not pending:
     log("Nothing to process")
     sys.exit(0)
 
@@ -37,46 +53,47 @@ log("Loading model...")
 try:
     from sentiment_eng import ToneAnalyzer
     analyzer = ToneAnalyzer()
-    log("Model loaded")
+    model_version = analyzer.loaded.version
+    log(f"Model loaded ({model_version})")
 except Exception as e:
     log(f"FAILED to load model: {e}")
     sys.exit(1)
 
-# Step 3: Process each transcript OFFLINE (no DB connection during inference)
-all_results = []
-for i, (tid, content) in enumerate(transcripts):
-    try:
-        result = analyzer.analyze_paragraph(content)
-        if result and result.sentences:
-            data = [(tid, s.text, s.topic, s.score, s.weight, s.reasoning) for s in result.sentences]
-            all_results.append((tid, data))
-            log(f"  [{i+1}/{len(transcripts)}] ID={tid}: {len(data)} sentences")
-        else:
-            log(f"  [{i+1}/{len(transcripts)}] ID={tid}: no sentences")
-    except Exception as e:
-        log(f"  [{i+1}/{len(transcripts)}] ID={tid}: ERROR - {e}")
-
-log(f"\nInference complete. {len(all_results)} transcripts to insert")
+# Step 3: Claim a batch, score it OFFLINE (no DB connection during inference), commit it
+done, failed, total = 0, 0, 0
+while True:
+    conn = connect()
+    jobs = scoring_jobs.claim(conn, BATCH_SIZE, WORKER)
+    conn.close()
+    if not jobs:
+        break
 
-# Step 4: Insert all results in one fresh connection
-if all_results:
-    conn = psycopg2.connect(DB_URL, connect_timeout=15)
-    cur = conn.cursor()
-    total = 0
-    for tid, data in all_results:
+    results = []
+    for tid, content in jobs:
         try:
-            cur.executemany("""
-                INSERT INTO transcript_sentences 
-                (transcript_id, sentence_text, topic, stance_score, impact_weight, reasoning)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, data)
-            conn.commit()
-            total += len(data)
+            result = analyzer.analyze_paragraph(content or "", normalized=True)
+            data = [(s.text, s.topic, s.score, s.weight, s.reasoning, s.start, s.end) for s in result.sentences] if result else []
+            results.append((tid, data, None if data else "no sentences"))
         except Exception as e:
+            results.append((tid, None, f"{type(e).__name__}: {e}"))
+
+    conn = connect()
+    for tid, data, error in results:
+        try:
+            if error:
+                scoring_jobs.fail(conn, tid, error, WORKER, permanent=(error == "no sentences"))
+                failed += 1
+                log(f"  ID={tid}: FAILED - {error}")
+            elif scoring_jobs.complete(conn, tid, data, model_version, WORKER):
+                done += 1
+                total += len(data)
+                log(f"  ID={tid}: {len(data)} sentences")
+            else:
+                log(f"  ID={tid}: lease lost to another worker, skipped")
+        except Exception:
             conn.rollback()
-            log(f"  Insert error for ID={tid}: {e}")
-    cur.close()
+            log(f"  Insert error for ID={tid}: {traceback.format_exc(limit=1)}")
     conn.close()
-    log(f"DONE: inserted {total} sentences")
-else:
-    log("DONE: nothing to insert")
+    log(f"Batch committed: {done} done, {failed} failed so far")
+
+log(f"DONE: scored {done} transcripts ({total} sentences), {failed} failed")
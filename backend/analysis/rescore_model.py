@@ -0,0 +1,177 @@
+"""
+Re-score stored sentences with a new model, writing only what changed.
+
+After retraining, existing sentences are streamed in id order (keyset
+pages of RESCORE_CHUNK rows), scored in batches with the current model and
+compared with what is stored. Only rows whose rounded score or topic
+differ are bulk-updated (stance_score, topic, impact_weight, reasoning,
+model_version), and transcript_scores is refreshed for just the
+transcripts those rows belong to, in the same transaction. Unchanged rows
+and their transcripts' aggregates are never written, so anything cached
+off them stays valid.
+
+Progress is checkpointed per model version in rescore_progress after every
+page, so an interrupted run carries on from the last committed sentence.
+Sentences are kept as they were split (text or span); transcripts are not
+re-segmented.
+
+transcript_sentences.model_version is the model that last changed a row.
+Once a pass completes, every done scoring job is stamped with the new
+version.
+
+    python backend/analysis/rescore_model.py [--variant student] [--chunk 2048] [--dry-run] [--restart]
+"""
+
+import os
+import sys
+import time
+import argparse
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+from schema import migrate, SENTENCE_TEXT_SQL  # noqa: E402
+from scoring_jobs import refresh_scores  # noqa: E402
+
+load_dotenv()
+
+RESCORE_CHUNK = int(os.getenv("RESCORE_CHUNK", "2048"))
+
+
+def load_progress(conn, model_version, restart=False):
+    """(last_sentence_id, scanned, changed, finished) for this model's pass."""
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO rescore_progress (model_version) VALUES (%s)
+            ON CONFLICT (model_version) DO NOTHING;
+        """, (model_version,))
+        if restart:
+            cur.execute("""
+                UPDATE rescore_progress
+                SET last_sentence_id = 0, scanned = 0, changed = 0, started_at = now(), finished_at = NULL
+                WHERE model_version = %s;
+            """, (model_version,))
+        cur.execute("""
+            SELECT last_sentence_id, scanned, changed, finished_at IS NOT NULL
+            FROM rescore_progress WHERE model_version = %s;
+        """, (model_version,))
+        return cur.fetchone()
+
+
+def fetch_page(cur, after_id, limit):
+    cur.execute(f"""
+        SELECT ts.id, ts.transcript_id, {SENTENCE_TEXT_SQL}, ts.stance_score, ts.topic
+        FROM transcript_sentences ts
+        JOIN transcripts t ON t.id = ts.transcript_id
+        WHERE ts.id > %s
+        ORDER BY ts.id
+        LIMIT %s;
+    """, (after_id, limit))
+    return cur.fetchall()
+
+
+def diff(rows, analyses):
+    """Rows whose rounded score or topic changed: (updates, affected transcript ids)."""
+    updates, transcripts = [], set()
+    for (sid, tid, _, old_score, old_topic), new in zip(rows, analyses):
+        if old_score is not None and round(old_score, 3) == new.score and old_topic == new.topic:
+            continue
+        updates.append((sid, new.score, new.topic, new.weight, new.reasoning))
+        transcripts.add(tid)
+    return updates, transcripts
+
+
+def apply_updates(cur, updates, model_version):
+    execute_values(cur, """
+        UPDATE transcript_sentences s
+        SET stance_score = v.score, topic = v.topic, impact_weight = v.weight,
+            reasoning = v.reasoning, model_version = v.model_version
+        FROM (VALUES %s) AS v(id, score, topic, weight, reasoning, model_version)
+        WHERE s.id = v.id;
+    """, [(*u, model_version) for u in updates], page_size=1000)
+
+
+def rescore(conn, analyzer, chunk=RESCORE_CHUNK, dry_run=False, restart=False):
+    """One pass over every stored sentence; returns {scanned, changed, transcripts}."""
+    version = analyzer.loaded.version
+    if dry_run:
+        last_id, scanned, changed, finished = 0, 0, 0, False
+    else:
+        last_id, scanned, changed, finished = load_progress(conn, version, restart)
+        if finished:
+            print(f"Sentences already rescored with {version} (use --restart to redo)")
+            return {"scanned": scanned, "changed": changed, "transcripts": 0}
+        if last_id:
+            print(f"Resuming {version} after sentence {last_id} ({scanned} scanned, {changed} changed)")
+
+    touched = set()
+    start = time.perf_counter()
+    while True:
+        with conn, conn.cursor() as cur:
+            rows = fetch_page(cur, last_id, chunk)
+        if not rows:
+            break
+
+        with metrics.timed("finsent_rescore_page_seconds"):
+            analyses = analyzer.predict_batch([r[2] or "" for r in rows])
+            updates, transcripts = diff(rows, analyses)
+
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        changed += len(updates)
+        touched |= transcripts
+        metrics.inc("finsent_rescore_rows_total", len(rows) - len(updates), result="unchanged")
+        metrics.inc("finsent_rescore_rows_total", len(updates), result="changed")
+
+        if not dry_run:
+            with conn, conn.cursor() as cur:
+                if updates:
+                    apply_updates(cur, updates, version)
+                    refresh_scores(cur, sorted(transcripts))
+                cur.execute("""
+                    UPDATE rescore_progress SET last_sentence_id = %s, scanned = %s, changed = %s
+                    WHERE model_version = %s;
+                """, (last_id, scanned, changed, version))
+
+        rate = scanned / max(time.perf_counter() - start, 1e-9)
+        print(f"  up to sentence {last_id}: {scanned} scanned, {changed} changed ({rate:.0f} sentences/s)")
+
+    if not dry_run:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE scoring_jobs SET model_version = %s WHERE state = 'done';", (version,))
+            cur.execute("UPDATE rescore_progress SET finished_at = now() WHERE model_version = %s;", (version,))
+    return {"scanned": scanned, "changed": changed, "transcripts": len(touched)}
+
+
+def main(args):
+    from sentiment_eng import ToneAnalyzer
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    try:
+        migrate(conn)
+        analyzer = ToneAnalyzer(args.variant)
+        print(f"Rescoring stored sentences with {analyzer.loaded.version}{' (dry run)' if args.dry_run else ''}")
+        stats = rescore(conn, analyzer, args.chunk, args.dry_run, args.restart)
+    finally:
+        conn.close()
+
+    pct = 100 * stats["changed"] / stats["scanned"] if stats["scanned"] else 0.0
+    print(f"{stats['changed']} of {stats['scanned']} sentences changed ({pct:.1f}%) "
+          f"across {stats['transcripts']} transcripts")
+    print("Timings:")
+    print(metrics.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score stored sentences, updating only changed rows")
+    parser.add_argument("--variant", choices=["teacher", "student"], default=None,
+                        help="model variant (default TONE_MODEL_VARIANT)")
+    parser.add_argument("--chunk", type=int, default=RESCORE_CHUNK, help="sentences per page/commit")
+    parser.add_argument("--dry-run", action="store_true", help="count what would change, write nothing")
+    parser.add_argument("--restart", action="store_true", help="start this model's pass from the beginning")
+    main(parser.parse_args())
@@ -0,0 +1,192 @@
+"""
+Per-transcript scoring jobs (the scoring_jobs table, schema.py version 4).
+
+Every transcript has one job row that moves through
+
+    pending -> in_progress -> done
+                           -> pending   (error, attempts left)
+                           -> failed    (error on the last attempt, or no sentences)
+
+Workers claim a batch with FOR UPDATE SKIP LOCKED and hold it under a
+lease, so any number of batch_processor / rescore_all processes can run
+side by side without scoring the same transcript twice. A worker that
+dies leaves its lease to expire; the next claim() picks those jobs up
+again. Each transcript's sentences, its scored_at and its job row are
+written in one transaction, so an interrupted backfill resumes exactly
+where it stopped and never redoes a finished transcript.
+
+Rescoring is idempotent: complete() replaces any sentences the
+transcript already has, stamps them with the model version and refreshes
+the transcript's row in transcript_scores. Content is never rewritten
+after ingest (save_to_db is insert-only), so stored spans stay valid.
+"""
+
+import os
+import socket
+from psycopg2.extras import execute_values
+
+JOB_LEASE_SECONDS = int(os.getenv("SCORING_JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("SCORING_JOB_MAX_ATTEMPTS", "3"))
+
+STATES = ("pending", "in_progress", "done", "failed")
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_unscored(conn):
+    """Create pending jobs for transcripts the scrapers added since the last run (near-duplicates excluded)."""
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO scoring_jobs (transcript_id)
+            SELECT id FROM transcripts WHERE scored_at IS NULL AND duplicate_of IS NULL
+            ON CONFLICT (transcript_id) DO NOTHING;
+        """)
+        return cur.rowcount
+
+
+def pending_count(conn):
+    """Jobs a worker could claim right now (pending, or leased and expired)."""
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) FROM scoring_jobs
+            WHERE state = 'pending'
+               OR (state = 'in_progress' AND lease_expires_at < now());
+        """)
+        return cur.fetchone()[0]
+
+
+def claim(conn, limit, worker=None, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+    Lease up to `limit` jobs for `worker`; returns [(transcript_id, content)].
+
+    Expired leases whose holder used the last attempt are marked failed
+    first, so a transcript that keeps crashing workers stops being retried.
+    """
+    worker = worker or worker_id()
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE scoring_jobs
+            SET state = 'failed', leased_by = NULL, lease_expires_at = NULL,
+                last_error = 'lease expired on the last attempt', updated_at = now()
+            WHERE state = 'in_progress' AND lease_expires_at < now() AND attempts >= %s;
+        """, (max_attempts,))
+        cur.execute("""
+            WITH claimable AS (
+                SELECT transcript_id FROM scoring_jobs
+                WHERE state = 'pending'
+                   OR (state = 'in_progress' AND lease_expires_at < now())
+                ORDER BY transcript_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE scoring_jobs j
+            SET state = 'in_progress', leased_by = %s, attempts = j.attempts + 1,
+                lease_expires_at = now() + make_interval(secs => %s), updated_at = now()
+            FROM claimable c
+            WHERE j.transcript_id = c.transcript_id
+            RETURNING j.transcript_id;
+        """, (limit, worker, lease_seconds))
+        ids = sorted(row[0] for row in cur.fetchall())
+        if not ids:
+            return []
+        cur.execute("SELECT id, content FROM transcripts WHERE id = ANY(%s) ORDER BY id;", (ids,))
+        return cur.fetchall()
+
+
+def refresh_scores(cur, transcript_ids):
+    """Recompute transcript_scores for just these transcripts (inside the caller's transaction)."""
+    cur.execute("""
+        INSERT INTO transcript_scores
+            (transcript_id, sentence_count, score_sum, weighted_sum, weight_sum, updated_at)
+        SELECT t.id, COUNT(s.id), COALESCE(SUM(s.stance_score), 0),
+               COALESCE(SUM(s.stance_score * s.impact_weight), 0), COALESCE(SUM(s.impact_weight), 0), now()
+        FROM transcripts t
+        LEFT JOIN transcript_sentences s ON s.transcript_id = t.id
+        WHERE t.id = ANY(%s)
+        GROUP BY t.id
+        ON CONFLICT (transcript_id) DO UPDATE
+        SET sentence_count = EXCLUDED.sentence_count, score_sum = EXCLUDED.score_sum,
+            weighted_sum = EXCLUDED.weighted_sum, weight_sum = EXCLUDED.weight_sum,
+            updated_at = EXCLUDED.updated_at;
+    """, (list(transcript_ids),))
+
+
+def complete(conn, transcript_id, sentences, model_version, worker=None):
+    """
+    Store a transcript's sentences and mark its job done, atomically.
+
+    `sentences` are (text, topic, score, weight, reasoning, start, end)
+    tuples. A sentence with offsets is stored as that span of the
+    transcript's content (schema version 6) and its text is not copied;
+    without offsets the text is stored. Returns False (and writes nothing)
+    if the lease was lost to another worker.
+    """
+    worker = worker or worker_id()
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE scoring_jobs
+            SET state = 'done', leased_by = NULL, lease_expires_at = NULL, last_error = NULL,
+                model_version = %s, sentence_count = %s, updated_at = now()
+            WHERE transcript_id = %s AND state = 'in_progress' AND leased_by = %s;
+        """, (model_version, len(sentences), transcript_id, worker))
+        if cur.rowcount != 1:
+            return False
+        cur.execute("DELETE FROM transcript_sentences WHERE transcript_id = %s;", (transcript_id,))
+        execute_values(cur, """
+            INSERT INTO transcript_sentences
+            (transcript_id, sentence_text, topic, stance_score, impact_weight, reasoning, model_version,
+             start_offset, end_offset)
+            VALUES %s;
+        """, [
+            (transcript_id, None if start is not None else text, topic, score, weight, reasoning,
+             model_version, start, end)
+            for text, topic, score, weight, reasoning, start, end in sentences
+        ])
+        cur.execute("UPDATE transcripts SET scored_at = now() WHERE id = %s;", (transcript_id,))
+        refresh_scores(cur, [transcript_id])
+        return True
+
+
+def fail(conn, transcript_id, error, worker=None, permanent=False, max_attempts=JOB_MAX_ATTEMPTS):
+    """Record a failed attempt: back to pending while attempts remain, else failed."""
+    worker = worker or worker_id()
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE scoring_jobs
+            SET state = CASE WHEN %s OR attempts >= %s THEN 'failed' ELSE 'pending' END,
+                leased_by = NULL, lease_expires_at = NULL, last_error = %s, updated_at = now()
+            WHERE transcript_id = %s AND state = 'in_progress' AND leased_by = %s;
+        """, (permanent, max_attempts, str(error)[:1000], transcript_id, worker))
+
+
+def release(conn, transcript_ids, worker=None):
+    """Hand leased jobs back untouched (e.g. the model failed to load)."""
+    worker = worker or worker_id()
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE scoring_jobs
+            SET state = 'pending', attempts = GREATEST(attempts - 1, 0),
+                leased_by = NULL, lease_expires_at = NULL, updated_at = now()
+            WHERE transcript_id = ANY(%s) AND state = 'in_progress' AND leased_by = %s;
+        """, (list(transcript_ids), worker))
+
+
+def retry_failed(conn):
+    """Put every failed job back in the queue with a fresh attempt budget."""
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE scoring_jobs SET state = 'pending', attempts = 0, last_error = NULL, updated_at = now()
+            WHERE state = 'failed';
+        """)
+        return cur.rowcount
+
+
+def status(conn):
+    """{state: count} over all jobs."""
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT state, COUNT(*) FROM scoring_jobs GROUP BY state;")
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(dict(cur.fetchall()))
+        return counts
@@ -7,20 +7,18 @@ return types) so that batch_processor.py works without changes.
 """
 
 import os
-import re
-import torch
-from typing import List
+import sys
+from typing import List, Optional
 from pydantic import BaseModel, Field
-from transformers import DistilBertTokenizer
 
-from model.distilbert_model import (
-    MultiTaskDistilBERT,
-    TOPIC_LABELS,
-    TOPIC_TO_WEIGHT,
-)
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
 
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "model", "export")
-MAX_SEQ_LEN = 128
+from text_normalizer import normalize_text
+from segmenter import segment, split_sentences
+from model.distilbert_model import TOPIC_LABELS, TOPIC_TO_WEIGHT
+from model_registry import get_model
 
 # ---------------------------------------------------------------------------
 # Pydantic schemas (unchanged from GPT version)
@@ -32,6 +30,8 @@ class SentenceAnalysis(BaseModel):
     score: float = Field(description="Hawkish/Dovish score (-1.0 to 1.0)")
     weight: float = Field(description="Importance weight from 0.0 to 1.0 based on market impact")
     reasoning: str = Field(description="Brief logic for the classification")
+    start: Optional[int] = Field(default=None, description="Character offset of the sentence in the analysed text")
+    end: Optional[int] = Field(default=None, description="Character offset just past the sentence")
 
 
 class ParagraphAnalysis(BaseModel):
@@ -42,13 +42,17 @@ class ParagraphAnalysis(BaseModel):
 # Helper utilities
 # ---------------------------------------------------------------------------
 
-_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+def _split_sentences(text: str, normalized: bool = False) -> List[str]:
+    """
+    Split a paragraph into sentences (see segmenter.py).
 
-
-def _split_sentences(text: str) -> List[str]:
-    """Split a paragraph into sentences using regex."""
-    sentences = _SENTENCE_SPLIT_RE.split(text.strip())
-    return [s.strip() for s in sentences if s.strip()]
+    Text is first run through the scrapers' normalize_text. Transcript
+    content was already normalised by clean_text at ingest, so callers
+    passing it can set normalized=True to skip the second scan.
+    """
+    if not normalized:
+        text = normalize_text(text)
+    return split_sentences(text)
 
 
 def _stance_label(score: float) -> str:
@@ -76,47 +80,24 @@ def _stance_label(score: float) -> str:
 # ---------------------------------------------------------------------------
 
 class ToneAnalyzer:
-    """Runs inference with the fine-tuned DistilBERT model."""
-
-    def __init__(self):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-        # Load tokenizer
-        tokenizer_path = os.path.join(MODEL_DIR, "tokenizer")
-        self.tokenizer = DistilBertTokenizer.from_pretrained(tokenizer_path)
-
-        # Load model
-        self.model = MultiTaskDistilBERT()
-        state_dict = torch.load(
-            os.path.join(MODEL_DIR, "model.pt"),
-            map_location=self.device,
-            weights_only=False,
-        )
-        self.model.load_state_dict(state_dict)
-        self.model.to(self.device)
-        self.model.eval()
-
-        print("DistilBERT sentiment model loaded successfully")
-
-    def _predict_sentence(self, text: str) -> SentenceAnalysis:
-        """Run a single sentence through the model."""
-        encoding = self.tokenizer(
-            text,
-            max_length=MAX_SEQ_LEN,
-            padding="max_length",
-            truncation=True,
-            return_tensors="pt",
-        )
-
-        input_ids = encoding["input_ids"].to(self.device)
-        attention_mask = encoding["attention_mask"].to(self.device)
-
-        with torch.no_grad():
-            score, topic_logits = self.model(input_ids, attention_mask)
-
-        score_val = round(float(score.item()), 3)
-        topic_idx = int(topic_logits.argmax(dim=1).item())
-        topic_name = TOPIC_LABELS[topic_idx]
+    """
+    Runs inference with the fine-tuned DistilBERT model or its distilled student.
+
+    The weights come from model_registry, so every ToneAnalyzer in a process
+    shares one loaded model and constructing one is essentially free.
+    """
+
+    def __init__(self, variant: str = None):
+        self.loaded = get_model(variant)
+        self.variant = self.loaded.variant
+        self.model = self.loaded.model
+        self.tokenizer = self.loaded.tokenizer
+        self.device = self.loaded.device
+
+    @staticmethod
+    def _to_analysis(text: str, score: float, topic_idx: int) -> SentenceAnalysis:
+        score_val = round(float(score), 3)
+        topic_name = TOPIC_LABELS[int(topic_idx)]
         weight = TOPIC_TO_WEIGHT[topic_name]
 
         reasoning = (
@@ -132,11 +113,29 @@ class ToneAnalyzer:
             reasoning=reasoning,
         )
 
-    def analyze_paragraph(self, text: str) -> ParagraphAnalysis:
-        """Analyse a paragraph sentence-by-sentence (same API as GPT version)."""
-        sentences = _split_sentences(text)
-        if not sentences:
-            return ParagraphAnalysis(sentences=[])
+    def predict_batch(self, texts: List[str]) -> List[SentenceAnalysis]:
+        """Score many sentences with batched forward passes."""
+        if not texts:
+            return []
+        scores, topics = self.loaded.predict(texts)
+        return [self._to_analysis(t, s, k) for t, s, k in zip(texts, scores, topics)]
 
-        results = [self._predict_sentence(s) for s in sentences]
-        return ParagraphAnalysis(sentences=results)
\ No newline at end of file
+    def _predict_sentence(self, text: str) -> SentenceAnalysis:
+        """Run a single sentence through the model."""
+        return self.predict_batch([text])[0]
+
+    def analyze_paragraph(self, text: str, normalized: bool = False) -> ParagraphAnalysis:
+        """
+        Analyse a paragraph sentence-by-sentence (same API as GPT version).
+
+        With normalized=True each sentence also carries its start/end offsets
+        into `text`, so stored transcript content can be scored and the
+        sentences kept as spans into it.
+        """
+        if not normalized:
+            return ParagraphAnalysis(sentences=self.predict_batch(_split_sentences(text)))
+        spans = segment(text)
+        analyses = self.predict_batch([text[start:end] for start, end in spans])
+        for analysis, (start, end) in zip(analyses, spans):
+            analysis.start, analysis.end = start, end
+        return ParagraphAnalysis(sentences=analyses)
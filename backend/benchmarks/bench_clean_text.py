@@ -0,0 +1,133 @@
+"""
+Equivalence check and micro-benchmark for text_normalizer.normalize_text.
+
+normalize_text replaced the multi-pass CentralBankScraper.clean_text; the
+original implementation is kept here as the reference. The script first
+checks both agree on a seeded fuzz corpus built from the characters the
+passes treat specially, then times both on transcript-sized documents.
+Exits non-zero on any mismatch.
+
+    python backend/benchmarks/bench_clean_text.py [--cases 20000] [--out clean_text.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import unicodedata
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(_BACKEND_DIR)
+
+from text_normalizer import normalize_text  # noqa: E402
+
+
+def legacy_clean_text(text):
+    """CentralBankScraper.clean_text before the single-pass rewrite."""
+    if not text:
+        return ""
+
+    text = unicodedata.normalize('NFKC', text)
+    text = re.sub(r'[\x00-\x1F\x7F-\x9F]', ' ', text)
+    text = text.replace('\xa0', ' ').replace('\u200b', ' ')
+    text = re.sub(r'[-–—]{2,}', ' ', text)
+    text = re.sub(r'[_*#]{2,}', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+
+    return text.strip()
+
+
+# Characters that exercise every pass, plus compatibility forms NFKC rewrites
+ALPHABET = (
+    list("abcXYZ019.,;:%()") +
+    [" ", "  ", "\t", "\n", "\r", "\x00", "\x0b", "\x1f", "\x7f", "\x85", "\x9f",
+     "\xa0", "\u200b", "\u2009", "\u3000", "\u2028",
+     "-", "\u2011", "\u2013", "\u2014", "_", "*", "#", "**", "--", "__",
+     "\ufb01", "\u2460", "\uff21", "\xbd", "\u2024", "\ufe58", "\uff3f", "\ufe4d"]
+)
+
+SAMPLE_SENTENCES = [
+    "The Committee seeks to achieve maximum employment and inflation at the rate of 2 percent over the longer run.",
+    "Recent indicators suggest that economic activity has continued to expand at a solid pace.",
+    "The Bank of Canada today held its target for the overnight rate at 4½%, with the Bank Rate at 4¾%.",
+    "Inflation remains elevated — reflecting supply and demand imbalances —— and higher prices.",
+    "In support of its goals, the Committee decided to maintain the target range –– for the federal funds rate.",
+    "*** Voting for the monetary policy action were ___ Jerome H. Powell, Chair; John C. Williams, Vice Chair.",
+    "Governing Council will continue to assess\u200b whether monetary policy is sufficiently restrictive.",
+]
+
+
+def fuzz_cases(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+
+
+def make_documents(n_docs=50, sentences_per_doc=120, seed=1):
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        parts = []
+        for _ in range(sentences_per_doc):
+            parts.append(rng.choice(SAMPLE_SENTENCES))
+            parts.append(rng.choice([" ", "\n", "\n\n", "  \t", "\r\n", " -- ", " ** "]))
+        docs.append("".join(parts))
+    return docs
+
+
+def check_equivalence(cases):
+    mismatches = []
+    for case in cases:
+        expected, got = legacy_clean_text(case), normalize_text(case)
+        if expected != got:
+            mismatches.append({"input": case, "legacy": expected, "new": got})
+    return mismatches
+
+
+def time_fn(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark normalize_text")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    docs = make_documents()
+    cases = list(fuzz_cases(args.cases)) + SAMPLE_SENTENCES + docs
+    mismatches = check_equivalence(cases)
+    print(f"Equivalence: {len(cases) - len(mismatches)}/{len(cases)} cases identical")
+    for m in mismatches[:5]:
+        print(f"  MISMATCH {m!r}")
+
+    total_mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+    legacy_s = time_fn(legacy_clean_text, docs, args.repeat)
+    new_s = time_fn(normalize_text, docs, args.repeat)
+    print(f"legacy clean_text : {legacy_s * 1000:8.2f} ms  ({total_mb / legacy_s:6.1f} MB/s)")
+    print(f"normalize_text    : {new_s * 1000:8.2f} ms  ({total_mb / new_s:6.1f} MB/s)")
+    print(f"speedup           : {legacy_s / new_s:.2f}x")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "cases": len(cases),
+                "mismatches": len(mismatches),
+                "documents": len(docs),
+                "megabytes": round(total_mb, 3),
+                "legacy_ms": round(legacy_s * 1000, 3),
+                "normalize_ms": round(new_s * 1000, 3),
+                "speedup": round(legacy_s / new_s, 2),
+            }, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
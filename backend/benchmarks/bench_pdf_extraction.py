@@ -0,0 +1,160 @@
+"""
+Benchmark PDF text extraction backends over a corpus of saved Fed PDFs.
+
+For every installed backend, serially and with the process pool, reports
+pages/sec and MB/sec, plus text fidelity against the PyPDF2 reference as
+a word-level F1 (after whitespace/case normalisation).
+
+The corpus lives in benchmarks/fixtures/fed_pdfs/ (not committed). Fill it
+from the scraper HTTP cache (after a scrape with SCRAPER_CACHE_BODIES=1,
+which stores PDFs) or by downloading the default SEP tables:
+
+    python backend/benchmarks/bench_pdf_extraction.py --from-cache
+    python backend/benchmarks/bench_pdf_extraction.py --download
+    python backend/benchmarks/bench_pdf_extraction.py --out pdf_bench.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+from collections import Counter
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(_BACKEND_DIR, "scrapers"))
+
+import pdf_text  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fed_pdfs")
+REFERENCE_BACKEND = "pypdf2"
+
+# Summary of Economic Projections tables: the longest PDFs the Fed scraper sees
+DEFAULT_PDF_URLS = [
+    "https://www.federalreserve.gov/monetarypolicy/files/fomcprojtabl20230614.pdf",
+    "https://www.federalreserve.gov/monetarypolicy/files/fomcprojtabl20231213.pdf",
+    "https://www.federalreserve.gov/monetarypolicy/files/fomcprojtabl20240320.pdf",
+    "https://www.federalreserve.gov/monetarypolicy/files/fomcprojtabl20240612.pdf",
+    "https://www.federalreserve.gov/monetarypolicy/files/fomcprojtabl20241218.pdf",
+]
+
+
+def populate_from_cache(fixture_dir):
+    """Copy every cached response body that is a PDF into the fixture dir."""
+    from http_cache import CACHE_DIR
+    os.makedirs(fixture_dir, exist_ok=True)
+    copied = 0
+    for body_path in glob.glob(os.path.join(CACHE_DIR, "*.body")):
+        with open(body_path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                continue
+        name = os.path.basename(body_path).replace(".body", ".pdf")
+        shutil.copyfile(body_path, os.path.join(fixture_dir, name))
+        copied += 1
+    print(f"Copied {copied} PDFs from {CACHE_DIR}")
+
+
+def download(fixture_dir, urls=DEFAULT_PDF_URLS):
+    import requests
+    os.makedirs(fixture_dir, exist_ok=True)
+    with requests.Session() as session:
+        for url in urls:
+            resp = session.get(url, timeout=30)
+            resp.raise_for_status()
+            with open(os.path.join(fixture_dir, url.rsplit("/", 1)[-1]), "wb") as f:
+                f.write(resp.content)
+            print(f"Saved {url}")
+
+
+def _words(text):
+    return Counter(text.lower().split())
+
+
+def word_f1(reference, candidate):
+    ref, cand = _words(reference), _words(candidate)
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def run(fixture_dir, processes, repeat):
+    paths = sorted(glob.glob(os.path.join(fixture_dir, "*.pdf")))
+    if not paths:
+        raise SystemExit(f"No PDFs in {fixture_dir}; use --from-cache or --download first")
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+    total_mb = sum(len(data) for _, data in corpus) / 1e6
+
+    backends = pdf_text.available_backends()
+    reference = {}
+    if REFERENCE_BACKEND in backends:
+        reference = {name: pdf_text.extract_text(data, REFERENCE_BACKEND, processes=1)
+                     for name, data in corpus}
+    total_pages = sum(pdf_text.BACKENDS[backends[0]][0](data) for _, data in corpus)
+
+    results = []
+    for backend in backends:
+        for procs in sorted({1, processes}):
+            # Warm-up pass also spins up the process pool
+            texts = {name: pdf_text.extract_text(data, backend, procs) for name, data in corpus}
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for _, data in corpus:
+                    pdf_text.extract_text(data, backend, procs)
+            elapsed = (time.perf_counter() - start) / repeat
+
+            fidelity = None
+            if reference:
+                fidelity = round(sum(word_f1(reference[n], texts[n]) for n in texts) / len(texts), 4)
+            row = {
+                "backend": backend,
+                "processes": procs,
+                "seconds": round(elapsed, 4),
+                "pages_per_sec": round(total_pages / elapsed, 1),
+                "mb_per_sec": round(total_mb / elapsed, 2),
+                "word_f1_vs_reference": fidelity,
+            }
+            results.append(row)
+            print(
+                f"{backend:8s} procs={procs:<2d} {row['seconds']:8.3f}s  "
+                f"{row['pages_per_sec']:8.1f} pages/s  {row['mb_per_sec']:6.2f} MB/s  "
+                f"F1={fidelity}"
+            )
+    pdf_text.shutdown_pool()
+
+    return {
+        "documents": len(corpus),
+        "pages": total_pages,
+        "megabytes": round(total_mb, 2),
+        "reference_backend": REFERENCE_BACKEND if reference else None,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction backends")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--processes", type=int, default=pdf_text.PDF_PROCESSES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--from-cache", action="store_true", help="copy PDFs from the scraper HTTP cache")
+    parser.add_argument("--download", action="store_true", help="download the default SEP PDFs")
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.from_cache:
+        populate_from_cache(args.fixtures)
+    if args.download:
+        download(args.fixtures)
+
+    report = run(args.fixtures, args.processes, args.repeat)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
@@ -0,0 +1,121 @@
+"""
+Accuracy check and micro-benchmark for analysis/segmenter.py.
+
+Every case in fixtures/segmenter_cases.json is split by the segmenter and
+by the regex sentiment_eng used before it ("(?<=[.!?])\\s+"), and compared
+with the hand-labelled sentences. The segmenter must get every case right
+and its spans must slice back to exactly the sentences it returns. Both
+are then timed on transcript-sized documents built from the labelled
+sentences, and the number of fragments each produces is reported (every
+fragment is one forward pass). Exits non-zero on any failure.
+
+    python backend/benchmarks/bench_segmenter.py [--docs 200] [--repeat 5] [--out segmenter.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(_BACKEND_DIR, "analysis"))
+
+from segmenter import segment, split_sentences  # noqa: E402
+
+CASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "segmenter_cases.json")
+
+_LEGACY_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def legacy_split(text):
+    """sentiment_eng._split_sentences before the segmenter (minus normalisation)."""
+    return [s.strip() for s in _LEGACY_SPLIT_RE.split(text.strip()) if s.strip()]
+
+
+def load_cases(path=CASES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_spans(text):
+    """Spans are ordered, non-overlapping, trimmed, and slice back to split_sentences()."""
+    spans = segment(text)
+    last_end = 0
+    for start, end in spans:
+        if start < last_end or end <= start:
+            return False
+        if text[start].isspace() or text[end - 1].isspace():
+            return False
+        last_end = end
+    return [text[s:e] for s, e in spans] == split_sentences(text)
+
+
+def accuracy(fn, cases):
+    failures = [c for c in cases if fn(c["text"]) != c["sentences"]]
+    return len(cases) - len(failures), failures
+
+
+def make_documents(cases, n_docs, sentences_per_doc=120, seed=1):
+    """Normalised, transcript-shaped text: labelled sentences in seeded order."""
+    rng = random.Random(seed)
+    pool = [s.replace("\n", " ") for c in cases for s in c["sentences"]]
+    return [" ".join(rng.choice(pool) for _ in range(sentences_per_doc)) for _ in range(n_docs)]
+
+
+def time_fn(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark the sentence segmenter")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    seg_ok, seg_failures = accuracy(split_sentences, cases)
+    legacy_ok, _ = accuracy(legacy_split, cases)
+    bad_spans = [c["name"] for c in cases if not check_spans(c["text"])]
+    print(f"Accuracy: segmenter {seg_ok}/{len(cases)} cases, legacy regex {legacy_ok}/{len(cases)}")
+    for c in seg_failures:
+        print(f"  FAIL {c['name']}: expected {c['sentences']!r}, got {split_sentences(c['text'])!r}")
+    for name in bad_spans:
+        print(f"  BAD SPANS {name}")
+
+    docs = make_documents(cases, args.docs)
+    total_mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+    seg_fragments = sum(len(segment(d)) for d in docs)
+    legacy_fragments = sum(len(legacy_split(d)) for d in docs)
+    legacy_s = time_fn(legacy_split, docs, args.repeat)
+    seg_s = time_fn(segment, docs, args.repeat)
+    print(f"legacy regex : {legacy_s * 1000:8.2f} ms  ({total_mb / legacy_s:6.1f} MB/s, {legacy_fragments} fragments)")
+    print(f"segmenter    : {seg_s * 1000:8.2f} ms  ({total_mb / seg_s:6.1f} MB/s, {seg_fragments} fragments)")
+    print(f"forward passes saved: {legacy_fragments - seg_fragments} "
+          f"({100 * (legacy_fragments - seg_fragments) / legacy_fragments:.1f}%)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "cases": len(cases),
+                "segmenter_correct": seg_ok,
+                "legacy_correct": legacy_ok,
+                "bad_spans": len(bad_spans),
+                "documents": len(docs),
+                "megabytes": round(total_mb, 3),
+                "legacy_ms": round(legacy_s * 1000, 3),
+                "segmenter_ms": round(seg_s * 1000, 3),
+                "legacy_fragments": legacy_fragments,
+                "segmenter_fragments": seg_fragments,
+            }, f, indent=2)
+
+    sys.exit(1 if seg_failures or bad_spans else 0)
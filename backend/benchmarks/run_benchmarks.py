@@ -0,0 +1,643 @@
+"""
+Reproducible benchmarks for the scoring, API and scraping hot paths.
+
+Everything runs against fixed inputs so numbers are comparable across
+commits on the same machine:
+
+  - saved Fed/BoC pages and a projections PDF in benchmarks/fixtures/
+  - a synthetic transcripts/transcript_sentences table (seeded) loaded
+    into a throwaway SQLite file, or into a scratch schema on the Postgres
+    at BENCH_DATABASE_URL (--postgres)
+  - a tiny randomly initialised MultiTaskDistilBERT plus a tokenizer built
+    from the fixture vocabulary, loaded through model_registry, so CPU runs
+    need neither the 266MB checkpoint nor a download
+
+Suites:
+  scoring   sentences/sec for predict_batch and analyze_paragraph, model load
+  api       p50/p99 latency per endpoint handler (DB endpoints, the score
+            snapshot's aggregates and its incremental refresh, /api/score)
+  scrapers  parse throughput for the BoC/Fed pages, normalize_text, PDF text
+
+Results are written as JSON keyed by the current git commit; --compare
+prints the change against an earlier results file and exits non-zero when
+anything regressed by more than --fail-over percent.
+
+    python backend/benchmarks/run_benchmarks.py [--only scoring,api] [--out results.json]
+        [--compare benchmarks/results/<sha>.json] [--fail-over 15] [--postgres]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import tempfile
+import platform
+import datetime
+import argparse
+import subprocess
+import numpy as np
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for _path in (_BACKEND_DIR, os.path.join(_BACKEND_DIR, "scrapers"), os.path.join(_BACKEND_DIR, "analysis")):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+from text_normalizer import normalize_text  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+SEED = 1234
+N_TRANSCRIPTS = 120
+SENTENCES_PER_TRANSCRIPT = 40
+SCORE_SENTENCES = 2000
+API_REQUESTS = 50
+SCORE_CONCURRENCY = 128
+PARSE_REPEAT = 30
+
+TOPICS = ["Inflation", "Growth", "Employment", "Guidance", "Boilerplate"]
+WEIGHTS = {"Inflation": 1.0, "Guidance": 1.0, "Employment": 0.7, "Growth": 0.7, "Boilerplate": 0.0}
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+def read_fixture(name, binary=False):
+    with open(os.path.join(FIXTURE_DIR, name), "rb" if binary else "r", encoding=None if binary else "utf-8") as f:
+        return f.read()
+
+
+def fixture_scrapers(conn):
+    from boc_scraper import BoCScraper
+    from fed_scraper import FedScraper
+    return BoCScraper(conn=conn), FedScraper(conn=conn)
+
+
+def sentence_pool(conn):
+    """Sentences from the fixture pages, via the real scraper parsers."""
+    boc, fed = fixture_scrapers(conn)
+    _, boc_text = boc.parse_article(read_fixture("boc_press_release.html"))
+    _, fed_text = fed.parse_release_page("https://www.federalreserve.gov/", read_fixture("fed_statement.html"))
+    boc.close()
+    fed.close()
+    text = normalize_text(boc_text + " " + fed_text)
+    return sorted({s for s in _SENTENCE_RE.split(text) if len(s) > 20})
+
+
+def synthetic_rows(pool, seed=SEED):
+    """Seeded transcripts and scored sentences shaped like the production tables."""
+    rng = random.Random(seed)
+    start = datetime.date(2022, 1, 5)
+    transcripts, sentences = [], []
+    sid = 1
+    for tid in range(1, N_TRANSCRIPTS + 1):
+        bank = "Fed" if tid % 2 else "BoC"
+        date = start + datetime.timedelta(days=7 * (tid // 2) + rng.randint(0, 3))
+        body = [rng.choice(pool) for _ in range(SENTENCES_PER_TRANSCRIPT)]
+        transcripts.append((tid, bank, date, " ".join(body), f"https://example.test/{bank.lower()}/release-{tid}"))
+        for text in body:
+            topic = rng.choice(TOPICS)
+            score = round(rng.uniform(-1, 1), 3)
+            sentences.append((sid, tid, text, topic, score, WEIGHTS[topic], f"{topic} ({score:+.3f})"))
+            sid += 1
+    return transcripts, sentences
+
+
+# ---------------------------------------------------------------------------
+# Database stand-ins
+# ---------------------------------------------------------------------------
+# SQLite rendering of schema.py (no INCLUDE columns; the Postgres path runs the real migrations)
+SQLITE_SCHEMA = [
+    """CREATE TABLE transcripts (
+        id INTEGER PRIMARY KEY, bank_name TEXT, publish_date DATE, content TEXT, url TEXT UNIQUE,
+        scored_at TIMESTAMP, duplicate_of INTEGER)""",
+    """CREATE TABLE transcript_sentences (
+        id INTEGER PRIMARY KEY, transcript_id INTEGER, sentence_text TEXT, topic TEXT,
+        stance_score REAL, impact_weight REAL, reasoning TEXT, model_version TEXT,
+        start_offset INTEGER, end_offset INTEGER)""",
+    """CREATE TABLE transcript_scores (
+        transcript_id INTEGER PRIMARY KEY, sentence_count INTEGER, score_sum REAL, weighted_sum REAL,
+        weight_sum REAL, updated_at TIMESTAMP)""",
+    "CREATE INDEX transcript_sentences_transcript_id_idx ON transcript_sentences (transcript_id, id)",
+    "CREATE INDEX transcripts_bank_date_idx ON transcripts (bank_name, publish_date)",
+    "CREATE INDEX transcripts_publish_date_idx ON transcripts (publish_date)",
+    "CREATE INDEX transcripts_unscored_idx ON transcripts (id) WHERE scored_at IS NULL",
+]
+
+
+class _SQLiteCursor:
+    def __init__(self, cur):
+        self._cur = cur
+
+    @staticmethod
+    def _translate(sql):
+        # The Postgres dialect bits the app's queries use
+        sql = sql.replace("%s", "?").replace("::text", "")
+        return re.sub(r"\bILIKE\b", "LIKE", sql, flags=re.I)
+
+    def execute(self, sql, params=()):
+        self._cur.execute(self._translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        self._cur.executemany(self._translate(sql), rows)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size) if size else self._cur.fetchmany()
+
+    def close(self):
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteStandIn:
+    """Just enough of a psycopg2 connection over sqlite3 for the API handlers."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self.closed = 0
+
+    def cursor(self):
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+        self.closed = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+def _load(conn, transcripts, sentences):
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO transcripts (id, bank_name, publish_date, content, url, scored_at) "
+        "VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)", transcripts)
+    cur.executemany(
+        "INSERT INTO transcript_sentences (id, transcript_id, sentence_text, topic, stance_score, "
+        "impact_weight, reasoning) VALUES (%s, %s, %s, %s, %s, %s, %s)", sentences)
+    cur.execute("""
+        INSERT INTO transcript_scores (transcript_id, sentence_count, score_sum, weighted_sum, weight_sum, updated_at)
+        SELECT transcript_id, COUNT(*), SUM(stance_score), SUM(stance_score * impact_weight), SUM(impact_weight),
+               CURRENT_TIMESTAMP
+        FROM transcript_sentences GROUP BY transcript_id
+    """)
+    conn.commit()
+
+
+def sqlite_database(workdir, transcripts, sentences):
+    """Returns (connect, cleanup) for a seeded SQLite file."""
+    path = os.path.join(workdir, "bench.sqlite3")
+    conn = SQLiteStandIn(path)
+    cur = conn.cursor()
+    for ddl in SQLITE_SCHEMA:
+        cur.execute(ddl)
+    _load(conn, transcripts, sentences)
+    conn.close()
+    return (lambda: SQLiteStandIn(path)), (lambda: None)
+
+
+def postgres_database(url, transcripts, sentences):
+    """Returns (connect, cleanup) for a scratch schema on a real Postgres."""
+    import psycopg2
+    from schema import migrate
+
+    schema = f"bench_{os.getpid()}"
+    options = f"-c search_path={schema}"
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+    conn = psycopg2.connect(url, options=options)
+    migrate(conn, verbose=False)
+    _load(conn, transcripts, sentences)
+    conn.close()
+
+    def cleanup():
+        admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+    return (lambda: psycopg2.connect(url, options=options)), cleanup
+
+
+# ---------------------------------------------------------------------------
+# Tiny model
+# ---------------------------------------------------------------------------
+def build_tiny_export(export_dir, pool, seed=SEED):
+    """Random 2-layer model + fixture-vocab tokenizer, saved as the student variant."""
+    import torch
+    from transformers import DistilBertConfig, DistilBertTokenizerFast
+    from model.distilbert_model import MultiTaskDistilBERT
+
+    words = sorted({w for s in pool for w in re.findall(r"\w+|[^\w\s]", s.lower())})
+    chars = sorted({c for w in words for c in w})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words + [f"##{c}" for c in chars if c not in words]
+    tok_dir = os.path.join(export_dir, "tokenizer")
+    os.makedirs(tok_dir, exist_ok=True)
+    vocab_file = os.path.join(tok_dir, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(vocab))
+    DistilBertTokenizerFast(vocab_file=vocab_file).save_pretrained(tok_dir)
+
+    torch.manual_seed(seed)
+    config = DistilBertConfig(vocab_size=len(vocab), n_layers=2, dim=64, n_heads=4, hidden_dim=256)
+    model = MultiTaskDistilBERT(config=config)
+    student_dir = os.path.join(export_dir, "student")
+    os.makedirs(student_dir, exist_ok=True)
+    torch.save(model.state_dict(), os.path.join(student_dir, "model.pt"))
+    config.to_json_file(os.path.join(student_dir, "config.json"))
+
+
+def use_export(export_dir, variant):
+    import model_registry
+    model_registry.MODEL_DIR = export_dir
+    model_registry.MODEL_VARIANT = variant
+    model_registry.reset()
+    return model_registry
+
+
+# ---------------------------------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------------------------------
+def latency_summary(latencies_ms):
+    arr = np.asarray(latencies_ms)
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+        "n": int(len(arr)),
+    }
+
+
+def time_calls(fn, n, *args):
+    fn(*args)  # warm-up
+    out = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(*args)
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def throughput(fn, units, repeat=3):
+    """Best-of-`repeat` units/sec for fn()."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return units / best
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+def bench_scoring(registry, pool, transcripts):
+    start = time.perf_counter()
+    registry.get_model()
+    cold_load_ms = (time.perf_counter() - start) * 1000
+
+    from sentiment_eng import ToneAnalyzer
+    analyzer = ToneAnalyzer()
+    rng = random.Random(SEED)
+    sentences = [rng.choice(pool) for _ in range(SCORE_SENTENCES)]
+    paragraphs = [t[3] for t in transcripts[:20]]
+    n_para_sentences = sum(len(analyzer.analyze_paragraph(p, normalized=True).sentences) for p in paragraphs)
+
+    return {
+        "model_parameters": sum(p.numel() for p in analyzer.model.parameters()),
+        "model_cold_load_ms": round(cold_load_ms, 2),
+        "analyzer_init_ms": latency_summary(time_calls(ToneAnalyzer, 20)),
+        "predict_batch_sentences_per_sec": round(
+            throughput(lambda: analyzer.predict_batch(sentences), len(sentences)), 1),
+        "analyze_paragraph_sentences_per_sec": round(throughput(
+            lambda: [analyzer.analyze_paragraph(p, normalized=True) for p in paragraphs], n_para_sentences), 1),
+        "single_sentence_latency": latency_summary(time_calls(analyzer.predict_batch, 100, sentences[:1])),
+    }
+
+
+def sql_date_bank_means(connect):
+    """{(date, bank): mean stance} straight from transcript_sentences, to check the snapshot against."""
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t.publish_date, t.bank_name, AVG(ts.stance_score)
+        FROM transcript_sentences ts
+        JOIN transcripts t ON t.id = ts.transcript_id
+        GROUP BY t.publish_date, t.bank_name
+    """)
+    rows = cur.fetchall()
+    conn.close()
+    return {(d, bank): float(mean) for d, bank, mean in rows}
+
+
+def check_snapshot(snapshot, connect):
+    expected = sql_date_bank_means(connect)
+    got = {(r["date"], r["bank"]): r["sentiment"] for r in snapshot.by_date_bank()}
+    if got.keys() != expected.keys() or any(abs(got[k] - expected[k]) > 1e-6 for k in expected):
+        raise RuntimeError("score snapshot disagrees with the database")
+
+
+def bench_snapshot_refresh(connect, snapshot, transcript_id):
+    """Rescore one transcript in the database, then time the incremental refresh that picks it up."""
+    import score_snapshot
+
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute("UPDATE transcript_sentences SET stance_score = -stance_score WHERE transcript_id = %s",
+                (transcript_id,))
+    cur.execute("UPDATE transcript_scores SET updated_at = %s WHERE transcript_id = %s",
+                (datetime.datetime(2100, 1, 1), transcript_id))
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    refreshed = score_snapshot.refresh(connect, snapshot)
+    elapsed = (time.perf_counter() - start) * 1000
+    if refreshed is snapshot:
+        raise RuntimeError("score snapshot refresh missed a rescored transcript")
+    check_snapshot(refreshed, connect)
+    return {"ms": round(elapsed, 3), "sentences": len(refreshed)}
+
+
+def bench_api(connect, transcripts):
+    import main
+    import score_snapshot
+
+    main.get_db_connection = connect
+    score_snapshot.SNAPSHOT_REFRESH_SECONDS = 0  # refreshed explicitly below
+    ids = [t[0] for t in transcripts]
+    rng = random.Random(SEED)
+
+    # First call loads the snapshot and builds the response; later ones are memoised
+    start = time.perf_counter()
+    main.get_divergence()
+    cold_ms = (time.perf_counter() - start) * 1000
+    snapshot = score_snapshot.current()
+    check_snapshot(snapshot, connect)
+
+    results = {
+        "/api/health": latency_summary(time_calls(main.health, API_REQUESTS)),
+        "/api/divergence": latency_summary(time_calls(main.get_divergence, API_REQUESTS)),
+        "/api/divergence (snapshot load)": {"ms": round(cold_ms, 3), "sentences": len(snapshot)},
+        "/api/topics": latency_summary(time_calls(main.get_topics, API_REQUESTS)),
+        "/api/banks": latency_summary(time_calls(main.get_banks, API_REQUESTS)),
+        "/api/topics (uncached, by bank and dates)": latency_summary(time_calls(
+            lambda: snapshot.by_topic(rng.choice(["Fed", "BoC"]), "2022-03-01", "2023-06-30"), API_REQUESTS)),
+        "/api/transcripts": latency_summary(time_calls(main.get_transcripts, API_REQUESTS)),
+        "/api/transcripts/{id}/sentences": latency_summary(
+            time_calls(lambda: main.get_transcript_sentences(rng.choice(ids)), API_REQUESTS)),
+    }
+    if not main.get_divergence() or not main.get_transcripts() or not main.get_topics():
+        raise RuntimeError("API handlers returned no rows from the fixture database")
+    results["snapshot refresh (1 transcript)"] = bench_snapshot_refresh(connect, snapshot, ids[0])
+
+    texts = [t[3][:2000] for t in transcripts[:API_REQUESTS]]
+
+    async def score_suite():
+        await main.score_endpoint(main.ScoreRequest(text=texts[0]))  # loads the model
+        sequential = []
+        for text in texts:
+            start = time.perf_counter()
+            await main.score_endpoint(main.ScoreRequest(text=text))
+            sequential.append((time.perf_counter() - start) * 1000)
+
+        async def one(text):
+            start = time.perf_counter()
+            await main.score_endpoint(main.ScoreRequest(text=text))
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        concurrent = await asyncio.gather(*[one(texts[i % len(texts)]) for i in range(SCORE_CONCURRENCY)])
+        elapsed = time.perf_counter() - start
+        return sequential, concurrent, elapsed
+
+    sequential, concurrent, elapsed = asyncio.run(score_suite())
+    results["/api/score"] = latency_summary(sequential)
+    results["/api/score (concurrent)"] = {
+        **latency_summary(concurrent),
+        "requests_per_sec": round(len(concurrent) / elapsed, 1),
+        "concurrency": SCORE_CONCURRENCY,
+        "batcher": main._score_batcher.stats(),
+    }
+    return results
+
+
+def bench_scrapers(conn):
+    import pdf_text
+
+    boc, fed = fixture_scrapers(conn)
+    boc_html = read_fixture("boc_press_release.html")
+    fed_html = read_fixture("fed_statement.html")
+    link_html = read_fixture("fed_projections_link.html")
+    pdf = read_fixture("fed_projections.pdf", binary=True)
+    page_url = "https://www.federalreserve.gov/newsevents/pressreleases/monetary20231213a.htm"
+
+    if fed.parse_release_page(page_url, link_html)[0] != "pdf" or not boc.parse_article(boc_html)[1]:
+        raise RuntimeError("Scraper parsers no longer recognise the fixture pages")
+
+    raw_text = boc_html + fed_html
+    results = {
+        "boc_parse_article_pages_per_sec": round(
+            throughput(lambda: [boc.parse_article(boc_html) for _ in range(PARSE_REPEAT)], PARSE_REPEAT), 1),
+        "fed_parse_release_pages_per_sec": round(
+            throughput(lambda: [fed.parse_release_page(page_url, fed_html) for _ in range(PARSE_REPEAT)],
+                       PARSE_REPEAT), 1),
+        "normalize_text_mb_per_sec": round(
+            throughput(lambda: [normalize_text(raw_text) for _ in range(PARSE_REPEAT)],
+                       len(raw_text.encode()) * PARSE_REPEAT / 1e6), 2),
+    }
+    for backend in pdf_text.available_backends():
+        n_pages = pdf_text.BACKENDS[backend][0](pdf)
+        results[f"pdf_{backend}_pages_per_sec"] = round(
+            throughput(lambda: pdf_text.extract_text(pdf, backend=backend, processes=1), n_pages), 1)
+    boc.close()
+    fed.close()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------------------
+def git_sha():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    env = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+    try:
+        import torch
+        env["torch"] = torch.__version__
+        env["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return env
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def _higher_is_better(name):
+    return name.endswith("_per_sec")
+
+
+def _lower_is_better(name):
+    return name.endswith("_ms")
+
+
+def compare(current, base, fail_over):
+    """Print per-metric change vs a base run; returns the regressed metric names."""
+    cur, old = flatten(current["results"]), flatten(base["results"])
+    print(f"\nChange vs {base.get('git_sha', '?')} ({base.get('timestamp', '?')})")
+    print(f"{'metric':70s} {'base':>12s} {'now':>12s} {'change':>8s}")
+    regressions = []
+    for name in sorted(cur.keys() & old.keys()):
+        if not (_higher_is_better(name) or _lower_is_better(name)) or not old[name]:
+            continue
+        change = (cur[name] - old[name]) / old[name] * 100
+        worse = -change if _higher_is_better(name) else change
+        flag = ""
+        if worse > fail_over:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:70s} {old[name]:12.3f} {cur[name]:12.3f} {change:+7.1f}%{flag}")
+    return regressions
+
+
+def main(args):
+    suites = set(args.only.split(",")) if args.only else {"scoring", "api", "scrapers"}
+    workdir = tempfile.mkdtemp(prefix="finsent-bench-")
+
+    # Fixture DB first: the scrapers need a connection to construct
+    bootstrap = SQLiteStandIn(os.path.join(workdir, "bootstrap.sqlite3"))
+    pool = sentence_pool(bootstrap)
+    transcripts, sentences = synthetic_rows(pool)
+    if args.postgres:
+        url = os.getenv("BENCH_DATABASE_URL")
+        if not url:
+            raise SystemExit("--postgres needs BENCH_DATABASE_URL (a scratch database, not production)")
+        connect, cleanup = postgres_database(url, transcripts, sentences)
+    else:
+        connect, cleanup = sqlite_database(workdir, transcripts, sentences)
+
+    registry = None
+    if suites & {"scoring", "api"}:
+        if args.real_model:
+            import model_registry
+            registry = model_registry
+        else:
+            export_dir = os.path.join(workdir, "export")
+            build_tiny_export(export_dir, pool)
+            registry = use_export(export_dir, "student")
+
+    results = {}
+    try:
+        if "scoring" in suites:
+            print("Running scoring suite...")
+            results["scoring"] = bench_scoring(registry, pool, transcripts)
+        if "api" in suites:
+            print("Running API suite...")
+            results["api"] = bench_api(connect, transcripts)
+        if "scrapers" in suites:
+            print("Running scraper suite...")
+            results["scrapers"] = bench_scrapers(bootstrap)
+    finally:
+        bootstrap.close()
+        cleanup()
+
+    report = {
+        "git_sha": git_sha(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": environment(),
+        "fixtures": {
+            "seed": SEED,
+            "database": "postgres" if args.postgres else "sqlite",
+            "model": "export" if args.real_model else "tiny-random",
+            "transcripts": len(transcripts),
+            "sentences": len(sentences),
+        },
+        "results": results,
+    }
+
+    for name, value in flatten(results).items():
+        print(f"  {name:70s} {value}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['git_sha']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        regressions = compare(report, base, args.fail_over)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.fail_over:.0f}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoring, API and scraper hot paths")
+    parser.add_argument("--only", help="comma-separated suites: scoring,api,scrapers")
+    parser.add_argument("--out", help="results path (default benchmarks/results/<git sha>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--fail-over", type=float, default=15.0,
+                        help="exit 1 if any metric is this many percent worse than --compare")
+    parser.add_argument("--postgres", action="store_true",
+                        help="load fixtures into a scratch schema at BENCH_DATABASE_URL instead of SQLite")
+    parser.add_argument("--real-model", action="store_true",
+                        help="score with the exported checkpoint instead of the tiny random model")
+    main(parser.parse_args())
@@ -1,9 +1,21 @@
 import os
 import json
+import asyncio
+from decimal import Decimal
 import psycopg2
-from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    import metrics
+    import score_snapshot
+    from llm_client import get_llm_client
+    from schema import SENTENCE_TEXT_SQL
+except ImportError:
+    from backend import metrics
+    from backend import score_snapshot
+    from backend.llm_client import get_llm_client
+    from backend.schema import SENTENCE_TEXT_SQL
+
 load_dotenv()
 
 SYSTEM_PROMPT = """You are the FinSENT Policy Analyst, an expert on monetary policy sentiment for the Federal Reserve (Fed) and Bank of Canada (BoC).
@@ -112,39 +124,26 @@ def _query(sql, params=None):
     conn = _get_conn()
     try:
         cursor = conn.cursor()
-        cursor.execute(sql, params or ())
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
+        with metrics.timed("finsent_db_query_seconds", endpoint="chat"):
+            cursor.execute(sql, params or ())
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         return [dict(zip(columns, row)) for row in rows]
     finally:
         conn.close()
 
 
 def run_get_sentiment_summary(args):
-    bank = args["bank"]
-    conditions = ["t.bank_name = %s"]
-    params = [bank]
-    if args.get("start_date"):
-        conditions.append("t.publish_date >= %s")
-        params.append(args["start_date"])
-    if args.get("end_date"):
-        conditions.append("t.publish_date <= %s")
-        params.append(args["end_date"])
-    where = " AND ".join(conditions)
-    sql = f"""
-        SELECT t.publish_date::text as date, AVG(ts.stance_score) as avg_sentiment,
-               COUNT(*) as sentence_count
-        FROM transcript_sentences ts
-        JOIN transcripts t ON ts.transcript_id = t.id
-        WHERE {where}
-        GROUP BY t.publish_date
-        ORDER BY t.publish_date
-    """
-    return _query(sql, params)
+    # Served from the in-memory score snapshot (score_snapshot.py), shared with the API process
+    rows = score_snapshot.get(_get_conn).by_date_bank(args["bank"], args.get("start_date"), args.get("end_date"))
+    return [
+        {"date": row["date"].isoformat(), "avg_sentiment": row["sentiment"], "sentence_count": row["sentences"]}
+        for row in rows
+    ]
 
 
 def run_get_transcripts(args):
-    conditions = []
+    conditions = ["t.duplicate_of IS NULL"]
     params = []
     if args.get("bank"):
         conditions.append("t.bank_name = %s")
@@ -155,7 +154,7 @@ def run_get_transcripts(args):
     if args.get("end_date"):
         conditions.append("t.publish_date <= %s")
         params.append(args["end_date"])
-    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    where = "WHERE " + " AND ".join(conditions)
     limit = args.get("limit", 10)
     sql = f"""
         SELECT t.id, t.bank_name as bank, t.publish_date::text as date,
@@ -172,10 +171,11 @@ def run_get_transcripts(args):
 
 
 def run_get_transcript_sentences(args):
-    sql = """
-        SELECT ts.sentence_text as text, ts.stance_score as score,
+    sql = f"""
+        SELECT {SENTENCE_TEXT_SQL} as text, ts.stance_score as score,
                ts.impact_weight as impact, ts.topic, ts.reasoning
         FROM transcript_sentences ts
+        JOIN transcripts t ON ts.transcript_id = t.id
         WHERE ts.transcript_id = %s
         ORDER BY ts.id ASC
         LIMIT 50
@@ -184,7 +184,7 @@ def run_get_transcript_sentences(args):
 
 
 def run_search_sentences(args):
-    conditions = ["ts.sentence_text ILIKE %s"]
+    conditions = [f"{SENTENCE_TEXT_SQL} ILIKE %s"]
     params = [f"%{args['keyword']}%"]
     if args.get("bank"):
         conditions.append("t.bank_name = %s")
@@ -194,7 +194,7 @@ def run_search_sentences(args):
         params.append(args["topic"])
     where = " AND ".join(conditions)
     sql = f"""
-        SELECT ts.sentence_text as text, ts.stance_score as score,
+        SELECT {SENTENCE_TEXT_SQL} as text, ts.stance_score as score,
                ts.topic, t.bank_name as bank, t.publish_date::text as date
         FROM transcript_sentences ts
         JOIN transcripts t ON ts.transcript_id = t.id
@@ -206,29 +206,11 @@ def run_search_sentences(args):
 
 
 def run_get_divergence(args):
-    conditions = []
-    params = []
-    if args.get("start_date"):
-        conditions.append("t.publish_date >= %s")
-        params.append(args["start_date"])
-    if args.get("end_date"):
-        conditions.append("t.publish_date <= %s")
-        params.append(args["end_date"])
-    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
-    sql = f"""
-        SELECT t.publish_date::text as date, t.bank_name as bank,
-               AVG(ts.stance_score) as sentiment
-        FROM transcript_sentences ts
-        JOIN transcripts t ON ts.transcript_id = t.id
-        {where}
-        GROUP BY t.publish_date, t.bank_name
-        ORDER BY t.publish_date
-    """
-    rows = _query(sql, params)
+    rows = score_snapshot.get(_get_conn).by_date_bank(None, args.get("start_date"), args.get("end_date"))
     # Pivot into divergence format
     by_date = {}
     for row in rows:
-        d = row["date"]
+        d = row["date"].isoformat()
         if d not in by_date:
             by_date[d] = {"date": d}
         if row["bank"] == "Fed":
@@ -259,48 +241,194 @@ def execute_tool(name, arguments):
     if not fn:
         return json.dumps({"error": f"Unknown tool: {name}"})
     try:
-        result = fn(arguments)
-        return json.dumps(result, default=str)
+        with metrics.timed("finsent_chat_tool_seconds", tool=name):
+            result = fn(arguments)
+            return compact_tool_result(result)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
+# ---------------------------------------------------------------------------
+# Context budgeting
+# ---------------------------------------------------------------------------
+# Every iteration of the agent loop resends the whole conversation, so the
+# prompt is kept under a token budget: tool rows are sent as compact tables,
+# oversized tool outputs are truncated and the oldest history is dropped.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "12000"))
+TOOL_RESULT_TOKEN_LIMIT = int(os.getenv("CHAT_TOOL_RESULT_TOKEN_LIMIT", "1500"))
+MAX_CELL_CHARS = 160
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, else estimate ~4 chars/token."""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(msg: dict) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(msg.get("content") or "")
+    for tc in msg.get("tool_calls") or []:
+        tokens += count_tokens(tc["function"]["name"]) + count_tokens(tc["function"]["arguments"])
+    return tokens
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (float, Decimal)):
+        return f"{value:.3f}"
+    text = str(value).replace("|", "/").replace("\n", " ")
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, marking the cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(max_tokens, 1) * 4]
+    return cut.rsplit("\n", 1)[0] + "\n[truncated to fit context budget]"
+
+
+def compact_tool_result(result, max_tokens: int = TOOL_RESULT_TOKEN_LIMIT) -> str:
+    """
+    Serialise a tool result for the model.
+
+    Lists of row dicts become a pipe-separated table (one header line, one
+    line per row) instead of repeating every key per row as JSON. Columns
+    are every key that appears in any row; a row missing one leaves it empty. Rows past
+    the token limit are dropped and counted so the model knows they exist.
+    """
+    if not isinstance(result, list) or not result or not all(isinstance(r, dict) for r in result):
+        return truncate_to_tokens(json.dumps(result, default=str), max_tokens)
+
+    # Ordered union: rows need not share keys (a divergence date with no BoC score has no "boc")
+    columns = list(dict.fromkeys(key for row in result for key in row))
+    header = f"rows: {len(result)}\n" + "|".join(columns)
+    lines = [header]
+    used = count_tokens(header)
+    for i, row in enumerate(result):
+        line = "|".join(_format_cell(row.get(c)) for c in columns)
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > max_tokens:
+            lines.append(f"... {len(result) - i} more rows omitted")
+            break
+        lines.append(line)
+        used += line_tokens
+    return "\n".join(lines)
+
+
+class ConversationContext:
+    """
+    Holds the messages for one agent run and trims them to a token budget.
+
+    The system prompt and the current turn (user message, assistant tool
+    calls and tool results) are always kept so tool_call ids stay paired.
+    When over budget the oldest client history is dropped first, then tool
+    results of the current turn are shrunk, oldest first.
+    """
+
+    def __init__(self, system_prompt: str, history: list, user_message: str,
+                 budget: int = CONTEXT_TOKEN_BUDGET):
+        self.budget = budget
+        self.system = {"role": "system", "content": system_prompt}
+        self.history = [{"role": m["role"], "content": m["content"]} for m in history]
+        self.turn = [{"role": "user", "content": user_message}]
+        self.dropped = 0
+
+    def append(self, msg: dict):
+        self.turn.append(msg)
+
+    def total_tokens(self) -> int:
+        return sum(message_tokens(m) for m in [self.system, *self.history, *self.turn])
+
+    def messages(self) -> list:
+        self._fit()
+        messages = [self.system]
+        if self.dropped:
+            messages.append({
+                "role": "system",
+                "content": f"[{self.dropped} earlier messages omitted to fit the context budget]",
+            })
+        return messages + self.history + self.turn
+
+    def _fit(self):
+        total = self.total_tokens()
+        while self.history and total > self.budget:
+            total -= message_tokens(self.history.pop(0))
+            self.dropped += 1
+
+        # The newest tool result is what the model is about to reason over,
+        # so it is only cut once the older ones have been shrunk.
+        tool_msgs = [m for m in self.turn if m["role"] == "tool"]
+        for group in (tool_msgs[:-1], tool_msgs[-1:]):
+            limit = TOOL_RESULT_TOKEN_LIMIT // 2
+            while total > self.budget and group and limit >= 32:
+                for msg in group:
+                    before = message_tokens(msg)
+                    msg["content"] = truncate_to_tokens(msg["content"], limit)
+                    total += message_tokens(msg) - before
+                limit //= 2
+
+
 MAX_ITERATIONS = 5
+CHAT_MODEL = "gpt-4o-mini"
+
+
+def _append_assistant(context, assistant_msg):
+    """Append the assistant message to the conversation, keeping any tool calls."""
+    msg_dict = {"role": "assistant", "content": assistant_msg.content or ""}
+    if assistant_msg.tool_calls:
+        msg_dict["tool_calls"] = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.function.name, "arguments": tc.function.arguments}
+            }
+            for tc in assistant_msg.tool_calls
+        ]
+    context.append(msg_dict)
 
 
-def run_agent(user_message: str, history: list) -> dict:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _parse_tool_calls(tool_calls, tool_calls_made):
+    parsed = []
+    for tc in tool_calls:
+        fn_name = tc.function.name
+        fn_args = json.loads(tc.function.arguments)
+        tool_calls_made.append({"tool": fn_name, "args": fn_args})
+        parsed.append((tc.id, fn_name, fn_args))
+    return parsed
 
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for msg in history:
-        messages.append({"role": msg["role"], "content": msg["content"]})
-    messages.append({"role": "user", "content": user_message})
 
+def run_agent(user_message: str, history: list, client=None) -> dict:
+    client = client or get_llm_client()
+    context = ConversationContext(SYSTEM_PROMPT, history, user_message)
     tool_calls_made = []
 
     for _ in range(MAX_ITERATIONS):
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
+        response = client.complete(
+            model=CHAT_MODEL,
+            messages=context.messages(),
             tools=TOOLS,
             tool_choice="auto",
         )
-
-        choice = response.choices[0]
-        assistant_msg = choice.message
-
-        # Append assistant message to conversation
-        msg_dict = {"role": "assistant", "content": assistant_msg.content or ""}
-        if assistant_msg.tool_calls:
-            msg_dict["tool_calls"] = [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {"name": tc.function.name, "arguments": tc.function.arguments}
-                }
-                for tc in assistant_msg.tool_calls
-            ]
-        messages.append(msg_dict)
+        assistant_msg = response.choices[0].message
+        _append_assistant(context, assistant_msg)
 
         if not assistant_msg.tool_calls:
             return {
@@ -308,23 +436,56 @@ def run_agent(user_message: str, history: list) -> dict:
                 "tool_calls_made": tool_calls_made
             }
 
-        for tc in assistant_msg.tool_calls:
-            fn_name = tc.function.name
-            fn_args = json.loads(tc.function.arguments)
-            tool_calls_made.append({"tool": fn_name, "args": fn_args})
+        for call_id, fn_name, fn_args in _parse_tool_calls(assistant_msg.tool_calls, tool_calls_made):
+            context.append({
+                "role": "tool",
+                "tool_call_id": call_id,
+                "content": execute_tool(fn_name, fn_args)
+            })
 
-            result = execute_tool(fn_name, fn_args)
-            messages.append({
+    # Hit max iterations — get a final answer without tools
+    response = client.complete(model=CHAT_MODEL, messages=context.messages())
+    return {
+        "response": response.choices[0].message.content or "",
+        "tool_calls_made": tool_calls_made
+    }
+
+
+async def run_agent_async(user_message: str, history: list, client=None) -> dict:
+    """Async variant of run_agent: tool calls from one turn run concurrently in threads."""
+    client = client or get_llm_client()
+    context = ConversationContext(SYSTEM_PROMPT, history, user_message)
+    tool_calls_made = []
+
+    for _ in range(MAX_ITERATIONS):
+        response = await client.acomplete(
+            model=CHAT_MODEL,
+            messages=context.messages(),
+            tools=TOOLS,
+            tool_choice="auto",
+        )
+        assistant_msg = response.choices[0].message
+        _append_assistant(context, assistant_msg)
+
+        if not assistant_msg.tool_calls:
+            return {
+                "response": assistant_msg.content or "",
+                "tool_calls_made": tool_calls_made
+            }
+
+        calls = _parse_tool_calls(assistant_msg.tool_calls, tool_calls_made)
+        results = await asyncio.gather(*(
+            asyncio.to_thread(execute_tool, fn_name, fn_args)
+            for _, fn_name, fn_args in calls
+        ))
+        for (call_id, _, _), result in zip(calls, results):
+            context.append({
                 "role": "tool",
-                "tool_call_id": tc.id,
+                "tool_call_id": call_id,
                 "content": result
             })
 
-    # Hit max iterations — get a final answer without tools
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-    )
+    response = await client.acomplete(model=CHAT_MODEL, messages=context.messages())
     return {
         "response": response.choices[0].message.content or "",
         "tool_calls_made": tool_calls_made
@@ -0,0 +1,60 @@
+"""
+Process-wide Postgres connection pool.
+
+The hourly pipeline and the maintenance scripts (schema migrations,
+near-duplicate backfill) borrow connections from the same pool instead of
+opening a fresh Neon connection per scraper or batch.
+
+The API does not use it: main.get_db_connection and chat.py open a
+short-lived connection per request. Endpoints run on FastAPI's thread
+pool, which is wider than DB_POOL_MAX, and ThreadedConnectionPool raises
+instead of waiting when it runs out of connections.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from psycopg2.pool import ThreadedConnectionPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "5"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                db_url = os.getenv("DATABASE_URL")
+                if not db_url:
+                    raise ValueError("DATABASE_URL is missing from .env")
+                _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, db_url)
+    return _pool
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection; it is rolled back if left mid-transaction."""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed and conn.get_transaction_status() != 0:
+            conn.rollback()
+        pool.putconn(conn)
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
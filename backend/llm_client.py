@@ -0,0 +1,188 @@
+"""
+Shared LLM client for the chat agent.
+
+One OpenAI client (sync and async) is created per process and reused, so
+HTTP connections and TLS sessions stay pooled across chat requests instead
+of being rebuilt for every message. One semaphore, shared by the sync and
+async paths, caps the number of completions in flight; callers beyond the
+cap wait for a slot (up to LLM_QUEUE_TIMEOUT_SECONDS) rather than piling
+more requests onto the API.
+
+Tests and offline runs can swap in FakeLLMClient via set_llm_client().
+"""
+
+import os
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+
+try:
+    import metrics
+except ImportError:
+    from backend import metrics
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+SLOT_POLL_INTERVAL = 0.05  # how often a waiting async caller retries for a slot
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when no completion slot frees up within the queue timeout."""
+
+
+class LLMClient:
+    """Pooled, concurrency-limited wrapper around the OpenAI chat completions API."""
+
+    def __init__(self, api_key=None, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+                 max_concurrency=LLM_MAX_CONCURRENCY, max_connections=LLM_MAX_CONNECTIONS,
+                 queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._sync = None
+        self._async = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+    def _sync_client(self):
+        if self._sync is None:
+            with self._lock:
+                if self._sync is None:
+                    from openai import OpenAI, DefaultHttpxClient
+                    self._sync = OpenAI(
+                        api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=DefaultHttpxClient(limits=self._limits()),
+                    )
+        return self._sync
+
+    def _async_client(self):
+        if self._async is None:
+            with self._lock:
+                if self._async is None:
+                    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                    self._async = AsyncOpenAI(
+                        api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=DefaultAsyncHttpxClient(limits=self._limits()),
+                    )
+        return self._async
+
+    def complete(self, **kwargs):
+        """Blocking chat completion; kwargs go straight to chat.completions.create."""
+        client = self._sync_client()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMBusyError("Too many chat completions in flight, try again shortly")
+        try:
+            with metrics.timed("finsent_llm_request_seconds", mode="sync"):
+                return client.chat.completions.create(**kwargs)
+        except Exception:
+            metrics.inc("finsent_llm_errors_total", mode="sync")
+            raise
+        finally:
+            self._slots.release()
+
+    async def _acquire_slot(self):
+        # Polls the shared threading semaphore instead of blocking the event
+        # loop on it; a cancelled waiter never holds a slot
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        while not self._slots.acquire(blocking=False):
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        return True
+
+    async def acomplete(self, **kwargs):
+        """Async chat completion sharing the same pooled connections and slots."""
+        client = self._async_client()
+        if not await self._acquire_slot():
+            raise LLMBusyError("Too many chat completions in flight, try again shortly")
+        try:
+            with metrics.timed("finsent_llm_request_seconds", mode="async"):
+                return await client.chat.completions.create(**kwargs)
+        except Exception:
+            metrics.inc("finsent_llm_errors_total", mode="async")
+            raise
+        finally:
+            self._slots.release()
+
+
+# ---------------------------------------------------------------------------
+# Local fake for tests
+# ---------------------------------------------------------------------------
+
+def fake_response(content="", tool_calls=None):
+    """Build an object shaped like an OpenAI chat completion.
+
+    tool_calls is a list of (name, arguments_dict) pairs.
+    """
+    calls = None
+    if tool_calls:
+        calls = [
+            SimpleNamespace(
+                id=f"call_{i}",
+                type="function",
+                function=SimpleNamespace(name=name, arguments=json.dumps(args)),
+            )
+            for i, (name, args) in enumerate(tool_calls)
+        ]
+    message = SimpleNamespace(role="assistant", content=content, tool_calls=calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+class FakeLLMClient:
+    """Returns scripted responses in order and records every request."""
+
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.calls = []
+
+    def complete(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.responses:
+            return self.responses.pop(0)
+        return fake_response("")
+
+    async def acomplete(self, **kwargs):
+        return self.complete(**kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance
+# ---------------------------------------------------------------------------
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
+
+
+def set_llm_client(client):
+    """Replace the process-wide client (e.g. with a FakeLLMClient in tests)."""
+    global _client
+    _client = client
@@ -1,32 +1,146 @@
 
 import os
-import re
-import io
-import json
-import psycopg2
-import pandas as pd
-import yfinance as yf
+import sys
+import asyncio
 import warnings
-from fastapi import FastAPI
+import threading
+import importlib.util
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-
-# Import chat agent - handle both direct run and module-style run
-try:
-    from chat import run_agent
-except ImportError:
+from typing import Optional
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+from profiler import ProfileMiddleware  # noqa: E402
+from schema import SENTENCE_TEXT_SQL  # noqa: E402
+
+# pandas, yfinance, psycopg2 and the chat agent (OpenAI SDK) are imported
+# inside the endpoints that use them, so a cold start only pays for FastAPI
+# and /api/health answers as soon as the process is up.
+# See startup_profile.py for the import-time budget.
+
+_chat_agent = None
+
+
+def get_chat_agent():
+    """Import the chat agent on first use; returns run_agent_async or None."""
+    global _chat_agent
+    if _chat_agent is None:
+        # Handle both direct run and module-style run
+        try:
+            from chat import run_agent_async
+        except ImportError:
+            try:
+                from backend.chat import run_agent_async
+            except ImportError:
+                import traceback
+                traceback.print_exc()
+                run_agent_async = False
+        _chat_agent = run_agent_async
+    return _chat_agent or None
+
+
+def chat_available():
+    if _chat_agent is not None:
+        return bool(_chat_agent)
+    return importlib.util.find_spec("openai") is not None
+
+
+# The tone model (torch) is also loaded on first use, or in the background
+# at startup when SCORE_PRELOAD is set
+SCORE_PRELOAD = os.getenv("SCORE_PRELOAD", "").lower() in ("1", "true", "yes")
+MAX_SCORE_CHARS = int(os.getenv("MAX_SCORE_CHARS", "100000"))
+
+_scorer = None
+_score_batcher = None
+_scorer_lock = threading.Lock()
+_score_batcher_lock = threading.Lock()
+
+
+def load_scorer():
+    """Import and warm the shared tone model; returns (analyzer, split_sentences)."""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            analysis_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analysis")
+            if analysis_dir not in sys.path:
+                sys.path.append(analysis_dir)
+            from sentiment_eng import ToneAnalyzer, _split_sentences
+            analyzer = ToneAnalyzer()
+            analyzer.predict_batch(["Inflation remains elevated."])
+            _scorer = (analyzer, _split_sentences)
+    return _scorer
+
+
+async def get_score_batcher():
+    """The process-wide request coalescer, built after the model loads."""
+    global _score_batcher
+    if _score_batcher is None:
+        analyzer, _ = await asyncio.to_thread(load_scorer)
+        # Concurrent first requests all get here after the await; only one
+        # may build the batcher, or the others' worker threads leak and
+        # their requests queue on a batcher that is then dropped
+        with _score_batcher_lock:
+            if _score_batcher is None:
+                try:
+                    from score_batcher import MicroBatcher
+                except ImportError:
+                    from backend.score_batcher import MicroBatcher
+                _score_batcher = MicroBatcher(analyzer.predict_batch)
+    return _score_batcher
+
+
+def scoring_ready():
+    return _scorer is not None
+
+
+# Divergence, topic and bank aggregates are served from an in-memory
+# columnar snapshot of sentence scores (score_snapshot.py, NumPy), loaded in
+# the background at startup unless SNAPSHOT_PRELOAD=0 and kept up to date
+# by its own refresh thread
+SNAPSHOT_PRELOAD = os.getenv("SNAPSHOT_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+
+def get_score_snapshot():
     try:
-        from backend.chat import run_agent
+        import score_snapshot
     except ImportError:
-        run_agent = None
+        from backend import score_snapshot
+    return score_snapshot.get(get_db_connection)
+
+
+def _preload_score_snapshot():
+    try:
+        get_score_snapshot()
+    except Exception as e:
+        print(f"Score snapshot preload failed: {e}")
+
 
 # Suppress pandas SQLAlchemy warnings
 warnings.filterwarnings('ignore', message='.*pandas only supports SQLAlchemy.*')
 
 load_dotenv()
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm-ups run on background threads so the server accepts requests at once
+    if SCORE_PRELOAD:
+        threading.Thread(target=load_scorer, name="score-preload", daemon=True).start()
+    if SNAPSHOT_PRELOAD:
+        threading.Thread(target=_preload_score_snapshot, name="snapshot-preload", daemon=True).start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,56 +149,105 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=True,
 )
+# Opt-in per-request sampling profiler (X-Profile header, see profiler.py)
+app.add_middleware(ProfileMiddleware)
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok", "chat_available": run_agent is not None}
+    return {"status": "ok", "chat_available": chat_available(), "scoring_ready": scoring_ready()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape target: scoring, DB, chat and LLM timings for this process."""
+    return metrics.render()
 
 
 def get_db_connection():
+    import psycopg2
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise ValueError("DATABASE_URL is missing from .env")
     return psycopg2.connect(db_url)
 
+
+def _divergence_records(rows):
+    import pandas as pd
+
+    if not rows:
+        return []
+
+    df = pd.DataFrame(rows).pivot(index='date', columns='bank', values='sentiment')
+    all_dates = pd.date_range(start=df.index.min(), end=df.index.max(), freq='D')
+    df = df.reindex(all_dates)
+    df = df.ffill().fillna(0)
+
+    fed_col = 'Fed' if 'Fed' in df.columns else 'fed'
+    boc_col = 'BoC' if 'BoC' in df.columns else 'boc'
+
+    df['divergence'] = df[fed_col] - df[boc_col]
+    df = df.reset_index().rename(columns={'index': 'date'})
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    df = df.rename(columns={fed_col: 'fed', boc_col: 'boc'})
+
+    return df.to_dict(orient='records')
+
+
 @app.get("/api/divergence")
 def get_divergence():
     try:
-        conn = get_db_connection()
+        snapshot = get_score_snapshot()
+        return snapshot.memo("divergence", lambda: _divergence_records(snapshot.by_date_bank()))
 
-        query = """
-            SELECT publish_date as date, bank_name, AVG(stance_score) as sentiment
-            FROM transcript_sentences
-            JOIN transcripts ON transcript_sentences.transcript_id = transcripts.id
-            GROUP BY 1, 2
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
+    except Exception as e:
+        print(f"Server Error: {e}")
+        return []
 
-        if df.empty:
-            return []
 
-        df = df.pivot(index='date', columns='bank_name', values='sentiment')
-        all_dates = pd.date_range(start=df.index.min(), end=df.index.max(), freq='D')
-        df = df.reindex(all_dates)
-        df = df.ffill().fillna(0)
+def _rounded(records):
+    """Snapshot records with dates as YYYY-MM-DD and figures to 3 decimal places."""
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, float):
+                record[key] = round(value, 3)
+            elif hasattr(value, "isoformat"):
+                record[key] = value.isoformat()
+    return records
 
-        fed_col = 'Fed' if 'Fed' in df.columns else 'fed'
-        boc_col = 'BoC' if 'BoC' in df.columns else 'boc'
 
-        df['divergence'] = df[fed_col] - df[boc_col]
-        df = df.reset_index().rename(columns={'index': 'date'})
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-        df = df.rename(columns={fed_col: 'fed', boc_col: 'boc'})
+@app.get("/api/topics")
+def get_topics(bank: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Sentence count, mean stance and impact weight per bank and topic."""
+    try:
+        snapshot = get_score_snapshot()
+    except Exception as e:
+        print(f"Topics fetch error: {e}")
+        return []
+    try:
+        return snapshot.memo(("topics", bank, start_date, end_date),
+                             lambda: _rounded(snapshot.by_topic(bank, start_date, end_date)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad date: {e}")
 
-        return df.to_dict(orient='records')
 
+@app.get("/api/banks")
+def get_banks(start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Per-bank totals: transcripts, sentences, mean and impact-weighted stance, date range."""
+    try:
+        snapshot = get_score_snapshot()
     except Exception as e:
-        print(f"Server Error: {e}")
+        print(f"Banks fetch error: {e}")
         return []
+    try:
+        return snapshot.memo(("banks", start_date, end_date),
+                             lambda: _rounded(snapshot.by_bank(start_date, end_date)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad date: {e}")
 
 @app.get("/api/usdcad")
 def get_usdcad():
+    import pandas as pd
+    import yfinance as yf
     try:
         conn = get_db_connection()
         query = "SELECT MIN(publish_date) as min_date, MAX(publish_date) as max_date FROM transcripts"
@@ -133,6 +296,7 @@ def get_usdcad():
 
 @app.get("/api/transcripts")
 def get_transcripts():
+    import pandas as pd
     try:
         conn = get_db_connection()
 
@@ -143,14 +307,15 @@ def get_transcripts():
                 t.publish_date as date,
                 t.content,
                 t.url,
-                AVG(ts.stance_score) as sentiment
+                sc.score_sum / NULLIF(sc.sentence_count, 0) as sentiment
             FROM transcripts t
-            LEFT JOIN transcript_sentences ts ON t.id = ts.transcript_id
-            GROUP BY t.id, t.bank_name, t.publish_date, t.content, t.url
+            LEFT JOIN transcript_scores sc ON t.id = sc.transcript_id
+            WHERE t.duplicate_of IS NULL
             ORDER BY t.publish_date DESC
         """
 
-        df = pd.read_sql(query, conn)
+        with metrics.timed("finsent_db_query_seconds", endpoint="/api/transcripts"):
+            df = pd.read_sql(query, conn)
         conn.close()
 
         if df.empty:
@@ -188,23 +353,25 @@ def get_transcript_sentences(transcript_id: int):
     try:
         conn = get_db_connection()
 
-        query = """
+        query = f"""
             SELECT
                 ts.id,
-                ts.sentence_text,
+                {SENTENCE_TEXT_SQL} AS sentence_text,
                 ts.stance_score,
                 ts.impact_weight,
                 ts.topic,
                 ts.reasoning
             FROM transcript_sentences ts
+            JOIN transcripts t ON t.id = ts.transcript_id
             WHERE ts.transcript_id = %s
             ORDER BY ts.id ASC
         """
 
         cursor = conn.cursor()
-        cursor.execute(query, (transcript_id,))
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
+        with metrics.timed("finsent_db_query_seconds", endpoint="/api/transcripts/{id}/sentences"):
+            cursor.execute(query, (transcript_id,))
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         cursor.close()
         conn.close()
 
@@ -235,11 +402,12 @@ class ChatRequest(BaseModel):
     history: list = []
 
 @app.post("/api/chat")
-def chat_endpoint(req: ChatRequest):
-    if run_agent is None:
+async def chat_endpoint(req: ChatRequest):
+    run_agent_async = get_chat_agent()
+    if run_agent_async is None:
         return {"response": "Chat agent failed to load on the server. Check Render logs for import errors.", "tool_calls_made": []}
     try:
-        result = run_agent(req.message, req.history)
+        result = await run_agent_async(req.message, req.history)
         return result
     except Exception as e:
         import traceback
@@ -247,6 +415,47 @@ def chat_endpoint(req: ChatRequest):
         return {"response": f"Error: {str(e)}", "tool_calls_made": []}
 
 
+class ScoreRequest(BaseModel):
+    text: str
+
+@app.post("/api/score")
+async def score_endpoint(req: ScoreRequest):
+    """Stance profile for pasted text, scored through the micro-batcher."""
+    if len(req.text) > MAX_SCORE_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text longer than {MAX_SCORE_CHARS} characters")
+    try:
+        batcher = await get_score_batcher()
+    except Exception as e:
+        print(f"Scoring model failed to load: {e}")
+        raise HTTPException(status_code=503, detail="Scoring model is unavailable")
+
+    analyzer, split_sentences = _scorer
+    sentences = split_sentences(req.text)
+    results = await batcher.submit(sentences)
+
+    topics = {}
+    weighted, total_weight = 0.0, 0.0
+    for r in results:
+        t = topics.setdefault(r.topic, {"count": 0, "score_sum": 0.0})
+        t["count"] += 1
+        t["score_sum"] += r.score
+        weighted += r.score * r.weight
+        total_weight += r.weight
+
+    return {
+        "sentences": [r.model_dump() for r in results],
+        "summary": {
+            "sentences": len(results),
+            "weighted_score": round(weighted / total_weight, 3) if total_weight else None,
+            "topics": {
+                name: {"count": t["count"], "mean_score": round(t["score_sum"] / t["count"], 3)}
+                for name, t in topics.items()
+            },
+        },
+        "model_variant": analyzer.variant,
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     print("Starting Dovetail Terminal API...")
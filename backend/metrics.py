@@ -0,0 +1,196 @@
+"""
+In-process counters and histograms for the hot paths.
+
+Scoring (tokenizer / forward pass / batch size), DB queries per endpoint
+and chat tool, OpenAI round trips and scraper fetch/parse all record here.
+main.py serves the lot in Prometheus text format at /metrics and
+batch_processor prints summary() at the end of a run.
+
+Recording is a dict lookup and a couple of additions under a lock, so it
+is cheap enough to leave on everywhere. Set FINSENT_METRICS=0 to turn it
+off entirely.
+
+    with timed("finsent_db_query_seconds", endpoint="divergence"):
+        cur.execute(...)
+    observe("finsent_model_batch_size", len(chunk))
+    inc("finsent_scraper_fetch_errors_total", bank="Fed")
+"""
+
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("FINSENT_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Seconds, from sub-millisecond tokenizer calls up to slow OpenAI round trips
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+HELP = {
+    "finsent_tokenize_seconds": "Tokenizer time per scoring batch",
+    "finsent_forward_seconds": "Model forward-pass time per scoring batch",
+    "finsent_model_batch_size": "Sentences per forward pass",
+    "finsent_db_query_seconds": "Database query time",
+    "finsent_chat_tool_seconds": "Chat tool execution time (query plus formatting)",
+    "finsent_llm_request_seconds": "OpenAI chat completion round-trip time",
+    "finsent_llm_errors_total": "OpenAI chat completions that raised",
+    "finsent_scraper_fetch_seconds": "Scraper HTTP fetch time",
+    "finsent_scraper_parse_seconds": "Scraper HTML/PDF parse time",
+    "finsent_scraper_fetch_errors_total": "Scraper fetches that failed",
+    "finsent_scraper_near_duplicates_total": "Scraped transcripts matched to a stored near-duplicate",
+    "finsent_transcript_score_seconds": "Time to score and store one transcript",
+    "finsent_sentences_scored_total": "Sentences scored",
+    "finsent_rescore_page_seconds": "Model-upgrade rescore time per page of stored sentences",
+    "finsent_rescore_rows_total": "Stored sentences rescored, by whether the output changed",
+    "finsent_snapshot_refresh_seconds": "Time to fetch and rebuild the in-memory score snapshot",
+    "finsent_snapshot_transcripts_loaded_total": "Transcripts (re)loaded into the in-memory score snapshot",
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label set."""
+
+    def __init__(self, name, buckets):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, key):
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {HELP.get(self.name, self.name)}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, n) in sorted(self.series.items()):
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+    def quantile(self, key, q):
+        """Upper bucket bound containing quantile q (what Prometheus would estimate)."""
+        counts, _, n = self.series[key]
+        target, running = q * n, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    def __init__(self, name):
+        self.name = name
+        self.series = {}
+
+    def inc(self, amount, key):
+        self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {HELP.get(self.name, self.name)}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+_metrics = {}
+_lock = threading.Lock()
+
+
+def _get(name, cls, *args):
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics.setdefault(name, cls(name, *args))
+    return metric
+
+
+def observe(name, value, buckets=None, **labels):
+    """Record one value in histogram `name`."""
+    if not METRICS_ENABLED:
+        return
+    if buckets is None:
+        buckets = TIME_BUCKETS if name.endswith("_seconds") else SIZE_BUCKETS
+    with _lock:
+        _get(name, Histogram, buckets).observe(value, _key(labels))
+
+
+def inc(name, amount=1, **labels):
+    """Add to counter `name`."""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _get(name, Counter).inc(amount, _key(labels))
+
+
+@contextmanager
+def timed(name, **labels):
+    """Time the block into histogram `name` (seconds), even if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def render():
+    """Everything recorded so far, in Prometheus text exposition format."""
+    with _lock:
+        lines = []
+        for name in sorted(_metrics):
+            lines.extend(_metrics[name].render())
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """Human-readable table for end-of-run logs."""
+    with _lock:
+        lines = []
+        for name in sorted(_metrics):
+            metric = _metrics[name]
+            for key, value in sorted(metric.series.items()):
+                series = f"{name}{_format_labels(key)}"
+                if isinstance(metric, Counter):
+                    lines.append(f"  {series:70s} {value}")
+                    continue
+                _, total, n = value
+                if name.endswith("_seconds"):
+                    lines.append(
+                        f"  {series:70s} n={n:<6d} mean={total / n * 1000:8.1f}ms "
+                        f"p50<={metric.quantile(key, 0.5) * 1000:g}ms p99<={metric.quantile(key, 0.99) * 1000:g}ms"
+                    )
+                else:
+                    lines.append(f"  {series:70s} n={n:<6d} mean={total / n:8.1f} p99<={metric.quantile(key, 0.99):g}")
+    return "\n".join(lines) if lines else "  (nothing recorded)"
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
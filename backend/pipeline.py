@@ -0,0 +1,134 @@
+"""
+Hourly pipeline: scrape → clean → score → aggregate in a single process.
+
+Replaces running boc_scraper.py, fed_scraper.py and batch_processor.py as
+three separate processes. All stages borrow connections from one pool, and
+the DistilBERT model (and torch itself) is only loaded once there is
+unscored work, so an hour with no new releases never touches inference.
+
+    python backend/pipeline.py [--skip-scrape] [--batch-size 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for _sub in ("scrapers", "analysis"):
+    _path = os.path.join(_BACKEND_DIR, _sub)
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+from db import connection, close_pool  # noqa: E402
+from boc_scraper import BoCScraper  # noqa: E402
+from fed_scraper import FedScraper  # noqa: E402
+from batch_processor import process_transcript_sentences, load_analyzer, BATCH_LIMIT  # noqa: E402
+from pdf_text import shutdown_pool  # noqa: E402
+import metrics  # noqa: E402
+from schema import migrate  # noqa: E402
+import scoring_jobs  # noqa: E402
+
+
+class LazyAnalyzer:
+    """Builds the ToneAnalyzer on first use and keeps it for later batches."""
+
+    def __init__(self):
+        self.analyzer = None
+
+    def __call__(self):
+        if self.analyzer is None:
+            start = time.perf_counter()
+            self.analyzer = load_analyzer()
+            print(f"Model loaded in {time.perf_counter() - start:.1f}s")
+        return self.analyzer
+
+
+def run_scrapers():
+    """Run every scraper on a pooled connection; returns the number of new transcripts."""
+    new_items = 0
+    for scraper_cls in (BoCScraper, FedScraper):
+        with connection() as conn:
+            scraper = scraper_cls(conn=conn)
+            try:
+                scraper.run()
+            except Exception as e:
+                print(f"{scraper.bank_name} scraper failed: {e}")
+            finally:
+                scraper.close()
+            new_items += scraper.saved_count
+    shutdown_pool()
+    return new_items
+
+
+def count_pending(conn):
+    scoring_jobs.enqueue_unscored(conn)
+    return scoring_jobs.pending_count(conn)
+
+
+def run_scoring(batch_size=BATCH_LIMIT):
+    """Score pending transcripts batch by batch; returns the scored ids."""
+    get_analyzer = LazyAnalyzer()
+    scored = []
+    with connection() as conn:
+        # Until claims run out: a batch of jobs that all failed scores nothing
+        # but does not mean the queue is empty
+        while True:
+            claimed, batch = process_transcript_sentences(conn, get_analyzer=get_analyzer, limit=batch_size)
+            scored.extend(batch)
+            if not claimed:
+                break
+    return scored
+
+
+def aggregate(transcript_ids):
+    """Report the topic-weighted transcript score for each newly scored transcript."""
+    if not transcript_ids:
+        return
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT t.id, t.bank_name, t.publish_date,
+                   sc.weighted_sum / NULLIF(sc.weight_sum, 0), sc.sentence_count
+            FROM transcripts t
+            JOIN transcript_scores sc ON sc.transcript_id = t.id
+            WHERE t.id = ANY(%s)
+            ORDER BY t.publish_date;
+        """, (list(transcript_ids),))
+        for tid, bank, date, score, n in cur.fetchall():
+            score_txt = f"{score:+.3f}" if score is not None else "n/a"
+            print(f"  {bank} {date} (ID={tid}): score={score_txt} over {n} sentences")
+
+
+def main(args):
+    start = time.perf_counter()
+    try:
+        with connection() as conn:
+            migrate(conn)
+
+        new_items = 0
+        if not args.skip_scrape:
+            new_items = run_scrapers()
+            print(f"Scrapers saved {new_items} new transcripts")
+
+        with connection() as conn:
+            pending = count_pending(conn)
+        if not pending:
+            print("No unscored transcripts, skipping inference.")
+            return
+
+        print(f"{pending} transcripts to score")
+        scored = run_scoring(args.batch_size)
+        print(f"Scored {len(scored)} transcripts")
+        aggregate(scored)
+    finally:
+        close_pool()
+        print(f"Pipeline finished in {time.perf_counter() - start:.1f}s")
+        print("Timings:")
+        print(metrics.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the scrape → score pipeline in one process")
+    parser.add_argument("--skip-scrape", action="store_true", help="only score pending transcripts")
+    parser.add_argument("--batch-size", type=int, default=BATCH_LIMIT)
+    main(parser.parse_args())
@@ -0,0 +1,162 @@
+"""
+Opt-in sampling profiler for single requests and pipeline runs.
+
+A background thread snapshots every thread's Python stack with
+sys._current_frames() every PROFILE_INTERVAL_MS and counts identical
+stacks. The result is written in the folded format ("frame;frame;frame N"
+per line) that flamegraph.pl, speedscope and inferno all read, to
+PROFILE_DIR/<run id>.folded.
+
+Nothing runs unless asked for:
+  - API: send "X-Profile: <PROFILE_TOKEN>" on a request (main.py middleware);
+    the response carries X-Profile-Id. Ignored when PROFILE_TOKEN is unset.
+  - Scripts: batch_processor.py / rescore_all.py --profile
+
+Stacks are rooted at the thread name, so a request handled on a
+threadpool worker can be told apart from the event loop and from other
+requests in flight. Native time (torch kernels, libpq) shows up as the
+Python frame that called into it.
+
+    flamegraph.pl backend/profiles/<run id>.folded > flame.svg
+"""
+
+import os
+import sys
+import time
+import hmac
+import uuid
+import atexit
+import datetime
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+MAX_STACK_DEPTH = 128
+
+
+def new_run_id(label):
+    stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    return f"{label}-{stamp}-{uuid.uuid4().hex[:6]}"
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    # ';' separates frames in the folded format
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples all thread stacks on an interval until stop()."""
+
+    def __init__(self, run_id, interval_ms=PROFILE_INTERVAL_MS):
+        self.run_id = run_id
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def save(self, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.folded")
+        with open(path, "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
+        return path
+
+
+def _finish(profiler):
+    profiler.stop()
+    path = profiler.save()
+    print(f"Profile {profiler.run_id}: {profiler.samples} samples over {profiler.elapsed:.1f}s -> {path}")
+    return path
+
+
+@contextmanager
+def profile(label, enabled=True):
+    """Profile the block when enabled; yields the profiler (or None)."""
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler(new_run_id(label)).start()
+    try:
+        yield profiler
+    finally:
+        _finish(profiler)
+
+
+def profile_until_exit(label):
+    """Start profiling now and save at interpreter exit (for top-level scripts)."""
+    profiler = SamplingProfiler(new_run_id(label)).start()
+    atexit.register(_finish, profiler)
+    return profiler
+
+
+def request_wants_profile(header_value):
+    """True when an X-Profile header carries the configured token."""
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(header_value or "", PROFILE_TOKEN)
+
+
+class ProfileMiddleware:
+    """
+    ASGI middleware: profiles requests that send a matching X-Profile header.
+
+    Plain ASGI rather than @app.middleware("http"), so requests without the
+    header pay one dict lookup instead of an extra task and body stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILE_TOKEN:
+            return await self.app(scope, receive, send)
+        header = dict(scope["headers"]).get(b"x-profile", b"").decode("latin-1")
+        if not request_wants_profile(header):
+            return await self.app(scope, receive, send)
+
+        label = "request" + scope["path"].replace("/", "-").replace("{", "").replace("}", "")
+        with profile(label) as profiler:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", profiler.run_id.encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
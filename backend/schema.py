@@ -0,0 +1,260 @@
+"""
+Versioned database schema.
+
+Each migration is a list of SQL statements applied once, in order, inside
+its own transaction; the applied versions are recorded in
+schema_migrations. migrate() is cheap when everything is applied (one
+SELECT), so the pipeline and the scoring scripts run it on every start.
+
+Concurrent callers serialise on a transaction-level advisory lock, so two
+workers starting together cannot apply the same migration twice.
+
+Version 1 is the baseline (CREATE ... IF NOT EXISTS matches the tables the
+scrapers and batch_processor have always used). Later versions add the
+indexes behind the hot read paths:
+
+  - transcript_sentences (transcript_id, id): every join to transcripts
+    and the per-transcript "ORDER BY ts.id" listings; stance_score and
+    impact_weight are INCLUDEd so the aggregate queries can be index-only
+  - transcripts (bank_name, publish_date) / (publish_date): bank and date
+    range filters, ORDER BY publish_date
+  - transcripts.scored_at plus a partial index on unscored rows, so the
+    pending-work query is an index lookup instead of an anti-join over
+    every sentence
+
+Version 4 adds scoring_jobs, the per-transcript scoring state machine
+(see analysis/scoring_jobs.py). Version 5 stamps sentences with the model
+that produced them and keeps per-transcript score sums in
+transcript_scores, so aggregates read one row per transcript and a model
+upgrade only touches what changed (see analysis/rescore_model.py).
+Version 6 lets a sentence be stored as a character span into its
+transcript's content (see analysis/segmenter.py) instead of a copy of
+the text; read sentence text through SENTENCE_TEXT_SQL. Version 7 adds
+transcripts.duplicate_of and the MinHash index behind near-duplicate
+checks at ingest (see scrapers/near_duplicates.py).
+
+    python backend/schema.py [--status]
+"""
+
+import argparse
+
+SCHEMA_LOCK_ID = 0x46534E54  # pg_advisory_xact_lock key ("FSNT")
+
+# Text of a transcript_sentences row `ts` joined to its transcript `t`. Rows
+# scored since version 6 keep a span into t.content (0-based, end
+# exclusive) rather than a copy; older rows keep sentence_text.
+SENTENCE_TEXT_SQL = (
+    "COALESCE(ts.sentence_text, substr(t.content, ts.start_offset + 1, ts.end_offset - ts.start_offset))"
+)
+
+MIGRATIONS = [
+    (1, "baseline tables", [
+        """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            id SERIAL PRIMARY KEY,
+            bank_name TEXT NOT NULL,
+            publish_date DATE,
+            content TEXT,
+            url TEXT UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transcript_sentences (
+            id SERIAL PRIMARY KEY,
+            transcript_id INTEGER NOT NULL REFERENCES transcripts(id) ON DELETE CASCADE,
+            sentence_text TEXT,
+            topic TEXT,
+            stance_score DOUBLE PRECISION,
+            impact_weight DOUBLE PRECISION,
+            reasoning TEXT
+        )
+        """,
+    ]),
+    (2, "indexes for transcript/sentence joins and bank/date filters", [
+        """
+        CREATE INDEX IF NOT EXISTS transcript_sentences_transcript_id_idx
+            ON transcript_sentences (transcript_id, id) INCLUDE (stance_score, impact_weight)
+        """,
+        "CREATE INDEX IF NOT EXISTS transcripts_bank_date_idx ON transcripts (bank_name, publish_date)",
+        "CREATE INDEX IF NOT EXISTS transcripts_publish_date_idx ON transcripts (publish_date)",
+    ]),
+    (3, "transcripts.scored_at and an index on unscored rows", [
+        "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS scored_at TIMESTAMPTZ",
+        # Backfill: anything that already has sentences was scored before this column existed
+        """
+        UPDATE transcripts t SET scored_at = now()
+        WHERE scored_at IS NULL
+          AND EXISTS (SELECT 1 FROM transcript_sentences s WHERE s.transcript_id = t.id)
+        """,
+        "CREATE INDEX IF NOT EXISTS transcripts_unscored_idx ON transcripts (id) WHERE scored_at IS NULL",
+    ]),
+    (4, "scoring_jobs state machine", [
+        """
+        CREATE TABLE IF NOT EXISTS scoring_jobs (
+            transcript_id INTEGER PRIMARY KEY REFERENCES transcripts(id) ON DELETE CASCADE,
+            state TEXT NOT NULL DEFAULT 'pending'
+                CHECK (state IN ('pending', 'in_progress', 'done', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            leased_by TEXT,
+            lease_expires_at TIMESTAMPTZ,
+            model_version TEXT,
+            sentence_count INTEGER,
+            last_error TEXT,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        # Only pending and leased jobs are ever scanned by workers
+        """
+        CREATE INDEX IF NOT EXISTS scoring_jobs_open_idx
+            ON scoring_jobs (transcript_id) WHERE state IN ('pending', 'in_progress')
+        """,
+        """
+        INSERT INTO scoring_jobs (transcript_id, state, sentence_count)
+        SELECT t.id,
+               CASE WHEN t.scored_at IS NULL THEN 'pending' ELSE 'done' END,
+               (SELECT COUNT(*) FROM transcript_sentences s WHERE s.transcript_id = t.id)
+        FROM transcripts t
+        ON CONFLICT (transcript_id) DO NOTHING
+        """,
+    ]),
+    (5, "sentence model_version, transcript_scores and rescore_progress", [
+        "ALTER TABLE transcript_sentences ADD COLUMN IF NOT EXISTS model_version TEXT",
+        """
+        UPDATE transcript_sentences s SET model_version = j.model_version
+        FROM scoring_jobs j
+        WHERE j.transcript_id = s.transcript_id AND s.model_version IS NULL AND j.model_version IS NOT NULL
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transcript_scores (
+            transcript_id INTEGER PRIMARY KEY REFERENCES transcripts(id) ON DELETE CASCADE,
+            sentence_count INTEGER NOT NULL,
+            score_sum DOUBLE PRECISION NOT NULL,
+            weighted_sum DOUBLE PRECISION NOT NULL,
+            weight_sum DOUBLE PRECISION NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        INSERT INTO transcript_scores (transcript_id, sentence_count, score_sum, weighted_sum, weight_sum)
+        SELECT transcript_id, COUNT(*), COALESCE(SUM(stance_score), 0),
+               COALESCE(SUM(stance_score * impact_weight), 0), COALESCE(SUM(impact_weight), 0)
+        FROM transcript_sentences
+        GROUP BY transcript_id
+        ON CONFLICT (transcript_id) DO NOTHING
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rescore_progress (
+            model_version TEXT PRIMARY KEY,
+            last_sentence_id INTEGER NOT NULL DEFAULT 0,
+            scanned BIGINT NOT NULL DEFAULT 0,
+            changed BIGINT NOT NULL DEFAULT 0,
+            started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            finished_at TIMESTAMPTZ
+        )
+        """,
+    ]),
+    (6, "sentence spans into transcripts.content", [
+        "ALTER TABLE transcript_sentences ADD COLUMN IF NOT EXISTS start_offset INTEGER",
+        "ALTER TABLE transcript_sentences ADD COLUMN IF NOT EXISTS end_offset INTEGER",
+        # NOT VALID: enforced for new rows only; older rows may lack text entirely
+        """
+        ALTER TABLE transcript_sentences ADD CONSTRAINT transcript_sentences_text_or_span
+            CHECK (sentence_text IS NOT NULL OR COALESCE(start_offset >= 0 AND end_offset > start_offset, false))
+            NOT VALID
+        """,
+        # Uncompressed out-of-line storage lets substr() fetch only the chunks a span covers
+        "ALTER TABLE transcripts ALTER COLUMN content SET STORAGE EXTERNAL",
+    ]),
+    (7, "near-duplicate transcripts: duplicate_of and a MinHash band index", [
+        """
+        ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS duplicate_of INTEGER
+            REFERENCES transcripts(id) ON DELETE SET NULL
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transcript_minhash (
+            transcript_id INTEGER PRIMARY KEY REFERENCES transcripts(id) ON DELETE CASCADE,
+            signature BYTEA
+        )
+        """,
+        # Primary key order serves the (band, bucket) candidate lookup
+        """
+        CREATE TABLE IF NOT EXISTS transcript_minhash_bands (
+            band SMALLINT NOT NULL,
+            bucket BIGINT NOT NULL,
+            transcript_id INTEGER NOT NULL REFERENCES transcripts(id) ON DELETE CASCADE,
+            PRIMARY KEY (band, bucket, transcript_id)
+        )
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations')")
+        if cur.fetchone()[0] is None:
+            return set()
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+
+
+def migrate(conn, verbose=True):
+    """Apply every pending migration; returns the versions applied."""
+    if len(applied_versions(conn)) == len(MIGRATIONS):
+        conn.rollback()  # leave the borrowed connection idle
+        return []
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+                _ensure_table(cur)
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cur.fetchone():
+                    continue
+                for sql in statements:
+                    cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description),
+                )
+        applied.append(version)
+        if verbose:
+            print(f"Applied schema migration {version}: {description}")
+    return applied
+
+
+def main(args):
+    from db import connection, close_pool
+
+    try:
+        with connection() as conn:
+            if args.status:
+                done = applied_versions(conn)
+                for version, description, _ in MIGRATIONS:
+                    print(f"  [{'x' if version in done else ' '}] {version:3d} {description}")
+                return
+            applied = migrate(conn)
+            if not applied:
+                print(f"Schema is up to date (version {LATEST_VERSION})")
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether each is applied")
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+"""
+Request coalescing for on-demand sentence scoring.
+
+/api/score requests are queued rather than each running its own forward
+pass. A single worker task takes the first waiting request, keeps
+collecting more for up to SCORE_MAX_WAIT_MS (or until SCORE_MAX_BATCH
+sentences are queued), runs them all as one batched call in a worker
+thread and hands every caller its own slice of the results.
+
+With one request in flight this costs at most the wait window; under load
+the batches fill up and the model runs at batch throughput instead of
+sentence-at-a-time.
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+SCORE_MAX_BATCH = int(os.getenv("SCORE_MAX_BATCH", "64"))
+SCORE_MAX_WAIT_MS = float(os.getenv("SCORE_MAX_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls into batched predict_fn calls.
+
+    predict_fn takes a flat list of items and returns one result per item.
+    It runs on a single dedicated thread, so the model never sees two
+    batches at once and the event loop is never blocked.
+    """
+
+    def __init__(self, predict_fn, max_batch=SCORE_MAX_BATCH, max_wait_ms=SCORE_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="score-batch")
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, items):
+        """Queue a list of items; resolves to their results, in order."""
+        if not items:
+            return []
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((items, future))
+        return await future
+
+    async def _collect(self):
+        pending = [await self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(entry)
+            size += len(entry[0])
+        return pending
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect()
+            flat = [item for items, _ in pending for item in items]
+            try:
+                results = await loop.run_in_executor(self._executor, self.predict_fn, flat)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(flat)
+            offset = 0
+            for items, future in pending:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        self._executor.shutdown(wait=False)
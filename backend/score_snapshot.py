@@ -0,0 +1,307 @@
+"""
+Columnar in-memory snapshot of sentence scores for the analytics endpoints.
+
+/api/divergence and the chat's divergence and sentiment-summary tools used
+to send an aggregate query to Postgres on every call. The data behind them
+only changes when a transcript is scored or rescored, so the process keeps
+one row per scored sentence in NumPy columns instead:
+
+    transcript_id  int32     date   int32 (date ordinal)
+    bank           int8 code topic  int16 code
+    score          float32   weight float32
+
+Sentences with no score, with no publish date, or belonging to a flagged
+near-duplicate are left out. Bank and topic strings are stored once, in
+code tables.
+
+From the columns, a (transcript x topic) table of sentence counts and score
+and weight sums is built with np.bincount. Divergence, per-topic and
+per-bank figures are group-bys over that table's few thousand rows, so they
+take microseconds and never touch the database. ScoreSnapshot.memo()
+caches the formatted results until the next change.
+
+The data version is transcript_scores.updated_at. refresh_scores() stamps
+it whenever a transcript's sentences are written (scoring_jobs.complete,
+rescore_model), and flag_existing deletes the row. Every
+SNAPSHOT_REFRESH_SECONDS a background thread reads (transcript_id,
+updated_at) for all transcripts. Only the transcripts whose stamp changed
+are refetched. Their old rows are masked out and the new ones appended,
+and the refreshed snapshot replaces the old one in a single assignment, so
+readers never see a half-built one.
+
+main.py loads the snapshot in the background at startup (set
+SNAPSHOT_PRELOAD=0 to load it on first use instead). Set
+SNAPSHOT_REFRESH_SECONDS=0 to never refresh.
+"""
+
+import os
+import sys
+import time
+import datetime
+import threading
+import numpy as np
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "30"))
+# Transcript ids per IN (...) list when fetching changed sentences
+SNAPSHOT_FETCH_CHUNK = 1000
+# Formatted results kept per snapshot (distinct endpoint/argument combinations)
+SNAPSHOT_MEMO_SIZE = 256
+
+_VERSIONS_SQL = "SELECT transcript_id, updated_at FROM transcript_scores"
+
+_ROWS_SQL = """
+    SELECT ts.transcript_id, t.publish_date, t.bank_name, ts.topic, ts.stance_score, ts.impact_weight
+    FROM transcript_sentences ts
+    JOIN transcripts t ON t.id = ts.transcript_id
+    WHERE ts.stance_score IS NOT NULL AND t.publish_date IS NOT NULL AND t.duplicate_of IS NULL
+      AND ts.transcript_id IN ({ids})
+"""
+
+
+def _ordinal(value):
+    """Date ordinal of a date, datetime or 'YYYY-MM-DD' string."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = datetime.date.fromisoformat(value[:10])
+    return value.toordinal()
+
+
+def _group_sum(keys, *values):
+    """Sum each value array over equal keys; returns (sorted unique keys, [sums])."""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    return uniq, [np.bincount(inverse, weights=v, minlength=len(uniq)) for v in values]
+
+
+def _mean(total, count):
+    return float(total) / float(count) if count else None
+
+
+class ScoreSnapshot:
+    """
+    One immutable version of the sentence columns and the per-transcript
+    totals derived from them. refresh() returns a new instance.
+    """
+
+    def __init__(self, columns, banks, topics, versions):
+        (self.transcript_id, self.date, self.bank,
+         self.topic, self.score, self.weight) = columns
+        self.banks = banks        # code -> bank name
+        self.topics = topics      # code -> topic
+        self.bank_codes = {name: code for code, name in enumerate(banks)}
+        self.versions = versions  # transcript_id -> transcript_scores.updated_at
+        self.loaded_at = time.time()
+        self._memo = {}
+        self._build_totals()
+
+    def __len__(self):
+        return len(self.transcript_id)
+
+    def _build_totals(self):
+        ids, inverse = np.unique(self.transcript_id, return_inverse=True)
+        n, k = len(ids), max(len(self.topics), 1)
+        cell = inverse * k + self.topic
+
+        def total(weights=None):
+            return np.bincount(cell, weights=weights, minlength=n * k).reshape(n, k)
+
+        # Bank and date are properties of the transcript, so any of its rows will do
+        self.t_id = ids
+        self.t_date = np.zeros(n, dtype=np.int32)
+        self.t_date[inverse] = self.date
+        self.t_bank = np.zeros(n, dtype=np.int8)
+        self.t_bank[inverse] = self.bank
+        self.count = total()
+        self.score_sum = total(self.score)
+        self.weight_sum = total(self.weight)
+        self.weighted_sum = total(self.score.astype(np.float64) * self.weight)
+
+    def memo(self, key, build):
+        """build() once per snapshot and key; the result is shared, so callers must not mutate it."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if len(self._memo) >= SNAPSHOT_MEMO_SIZE:
+            self._memo.clear()
+        result = self._memo[key] = build()
+        return result
+
+    def _select(self, bank=None, start_date=None, end_date=None):
+        """Boolean mask over transcripts."""
+        mask = np.ones(len(self.t_id), dtype=bool)
+        if bank is not None:
+            code = self.bank_codes.get(bank)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.t_bank == code
+        if start_date:
+            mask &= self.t_date >= _ordinal(start_date)
+        if end_date:
+            mask &= self.t_date <= _ordinal(end_date)
+        return mask
+
+    # ------------------------------------------------------------------
+    # Aggregations
+    # ------------------------------------------------------------------
+    def by_date_bank(self, bank=None, start_date=None, end_date=None):
+        """Mean stance per (publish date, bank), ordered by date then bank."""
+        mask = self._select(bank, start_date, end_date)
+        keys = self.t_date[mask].astype(np.int64) * len(self.banks) + self.t_bank[mask]
+        uniq, (counts, sums) = _group_sum(keys, self.count[mask].sum(axis=1), self.score_sum[mask].sum(axis=1))
+        dates, codes = np.divmod(uniq, max(len(self.banks), 1))
+        return [
+            {"date": datetime.date.fromordinal(int(d)), "bank": self.banks[c],
+             "sentences": int(n), "sentiment": _mean(s, n)}
+            for d, c, n, s in zip(dates, codes, counts, sums)
+        ]
+
+    def by_topic(self, bank=None, start_date=None, end_date=None):
+        """Sentence count, mean stance and mean impact weight per (bank, topic)."""
+        mask = self._select(bank, start_date, end_date)
+        shape = (len(self.banks), len(self.topics))
+        totals = []
+        for table in (self.count, self.score_sum, self.weight_sum, self.weighted_sum):
+            out = np.zeros(shape)
+            np.add.at(out, self.t_bank[mask], table[mask])
+            totals.append(out)
+        counts, score_sums, weight_sums, weighted_sums = totals
+        return [
+            {"bank": self.banks[b], "topic": self.topics[k], "sentences": int(counts[b, k]),
+             "avg_score": _mean(score_sums[b, k], counts[b, k]),
+             "avg_weight": _mean(weight_sums[b, k], counts[b, k]),
+             "weighted_score": _mean(weighted_sums[b, k], weight_sums[b, k])}
+            for b in range(shape[0]) for k in range(shape[1]) if counts[b, k]
+        ]
+
+    def by_bank(self, start_date=None, end_date=None):
+        """Transcripts, sentences, mean and impact-weighted stance, and date range per bank."""
+        mask = self._select(None, start_date, end_date)
+        banks = self.t_bank[mask]
+        dates = self.t_date[mask]
+        uniq, (transcripts, counts, sums, weighted, weights) = _group_sum(
+            banks, np.ones(len(banks)), self.count[mask].sum(axis=1), self.score_sum[mask].sum(axis=1),
+            self.weighted_sum[mask].sum(axis=1), self.weight_sum[mask].sum(axis=1))
+        first = np.full(len(self.banks), np.iinfo(np.int32).max, dtype=np.int64)
+        last = np.zeros(len(self.banks), dtype=np.int64)
+        np.minimum.at(first, banks, dates)
+        np.maximum.at(last, banks, dates)
+        return [
+            {"bank": self.banks[b], "transcripts": int(t), "sentences": int(n),
+             "avg_score": _mean(s, n), "weighted_score": _mean(w, ws),
+             "first_date": datetime.date.fromordinal(int(first[b])),
+             "last_date": datetime.date.fromordinal(int(last[b]))}
+            for b, t, n, s, w, ws in zip(uniq, transcripts, counts, sums, weighted, weights)
+        ]
+
+
+def _encode(rows, banks, topics):
+    """Row tuples to columns, extending the bank and topic code tables in place."""
+    bank_codes = {name: code for code, name in enumerate(banks)}
+    topic_codes = {name: code for code, name in enumerate(topics)}
+
+    def code(table, codes, value):
+        if value not in codes:
+            codes[value] = len(table)
+            table.append(value)
+        return codes[value]
+
+    n = len(rows)
+    return (
+        np.fromiter((r[0] for r in rows), dtype=np.int32, count=n),
+        np.fromiter((_ordinal(r[1]) for r in rows), dtype=np.int32, count=n),
+        np.fromiter((code(banks, bank_codes, r[2]) for r in rows), dtype=np.int8, count=n),
+        np.fromiter((code(topics, topic_codes, r[3]) for r in rows), dtype=np.int16, count=n),
+        np.fromiter((r[4] for r in rows), dtype=np.float32, count=n),
+        np.fromiter((r[5] or 0.0 for r in rows), dtype=np.float32, count=n),
+    )
+
+
+def refresh(connect, snapshot=None):
+    """
+    Bring `snapshot` up to date (or load one from scratch when it is None).
+
+    Returns the same object when no transcript's updated_at has changed,
+    otherwise a new ScoreSnapshot.
+    """
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        with metrics.timed("finsent_db_query_seconds", endpoint="score_snapshot"):
+            cur.execute(_VERSIONS_SQL)
+            versions = dict(cur.fetchall())
+        old = snapshot.versions if snapshot is not None else {}
+        changed = [tid for tid, stamp in versions.items() if old.get(tid) != stamp]
+        removed = [tid for tid in old if tid not in versions]
+        if snapshot is not None and not changed and not removed:
+            return snapshot
+
+        start = time.perf_counter()
+        rows = []
+        for i in range(0, len(changed), SNAPSHOT_FETCH_CHUNK):
+            chunk = changed[i:i + SNAPSHOT_FETCH_CHUNK]
+            with metrics.timed("finsent_db_query_seconds", endpoint="score_snapshot"):
+                cur.execute(_ROWS_SQL.format(ids=", ".join(["%s"] * len(chunk))), chunk)
+                rows.extend(cur.fetchall())
+        cur.close()
+    finally:
+        conn.close()
+
+    banks = list(snapshot.banks) if snapshot is not None else []
+    topics = list(snapshot.topics) if snapshot is not None else []
+    new = _encode(rows, banks, topics)
+    if snapshot is None:
+        columns = new
+    else:
+        keep = ~np.isin(snapshot.transcript_id, np.asarray(changed + removed, dtype=np.int32))
+        old_columns = (snapshot.transcript_id, snapshot.date, snapshot.bank,
+                       snapshot.topic, snapshot.score, snapshot.weight)
+        columns = tuple(np.concatenate([col[keep], add]) for col, add in zip(old_columns, new))
+    refreshed = ScoreSnapshot(columns, banks, topics, versions)
+    metrics.observe("finsent_snapshot_refresh_seconds", time.perf_counter() - start)
+    metrics.inc("finsent_snapshot_transcripts_loaded_total", len(changed))
+    print(f"Score snapshot: {len(refreshed)} sentences, {len(changed)} transcripts "
+          f"{'loaded' if snapshot is None else 'refreshed'}, {len(removed)} dropped")
+    return refreshed
+
+
+# ---------------------------------------------------------------------------
+# Process-wide snapshot
+# ---------------------------------------------------------------------------
+_snapshot = None
+_lock = threading.Lock()
+
+
+def current():
+    """The loaded snapshot, or None before the first load."""
+    return _snapshot
+
+
+def get(connect):
+    """The process snapshot, loading it (and starting the refresher) on first use."""
+    global _snapshot
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = refresh(connect)
+                if SNAPSHOT_REFRESH_SECONDS > 0:
+                    threading.Thread(target=_refresh_loop, args=(connect,),
+                                     name="score-snapshot", daemon=True).start()
+    return _snapshot
+
+
+def _refresh_loop(connect):
+    global _snapshot
+    while True:
+        time.sleep(SNAPSHOT_REFRESH_SECONDS)
+        try:
+            _snapshot = refresh(connect, _snapshot)
+        except Exception as e:
+            print(f"Score snapshot refresh failed: {e}")
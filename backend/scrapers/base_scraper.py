@@ -1,14 +1,77 @@
 import os
-import re
-import unicodedata
+import sys
+import time
+import threading
 import psycopg2
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from http_cache import HttpCache
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+import near_duplicates  # noqa: E402
+from text_normalizer import normalize_text  # noqa: E402
 
 load_dotenv()
 
+SCRAPER_MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+# Minimum spacing between two requests to the same host, in seconds
+SCRAPER_HOST_INTERVAL = float(os.getenv("SCRAPER_HOST_INTERVAL", "0.25"))
+# Ignore cached validators for index pages, e.g. after moving SCRAPER_EARLIEST_DATE back
+SCRAPER_FORCE_REFRESH = os.getenv("SCRAPER_FORCE_REFRESH", "").lower() in ("1", "true", "yes")
+
+
+class HostRateLimiter:
+    """Spaces out requests to each host by a minimum interval, across threads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class CentralBankScraper:
-    def __init__(self, bank_name):
+    def __init__(self, bank_name, conn=None):
         self.bank_name = bank_name
+        self.saved_count = 0
+        self.max_workers = SCRAPER_MAX_WORKERS
+        self.rate_limiter = HostRateLimiter(SCRAPER_HOST_INTERVAL)
+
+        # One pooled session per scraper so pages and PDFs reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.cache = HttpCache()
+        self.force_refresh = SCRAPER_FORCE_REFRESH
+        self.fetch_failures = 0
+        self.save_failures = 0
+        self._failure_lock = threading.Lock()
+        self.duplicate_count = 0
+        self._near_dup_indexed = False
+
+        # A connection passed in (e.g. from the pipeline's pool) is borrowed, not owned
+        self.owns_conn = conn is None
+        if conn is not None:
+            self.conn = conn
+            self.cursor = self.conn.cursor()
+            return
 
         db_url = os.getenv("DATABASE_URL")
         
@@ -21,22 +84,77 @@ class CentralBankScraper:
             raise
 
     def clean_text(self, text):
-        if not text:
-            return ""
-        
-        text = unicodedata.normalize('NFKC', text)
-        text = re.sub(r'[\x00-\x1F\x7F-\x9F]', ' ', text)
-        text = text.replace('\xa0', ' ').replace('\u200b', ' ')
-        text = re.sub(r'[-–—]{2,}', ' ', text)
-        text = re.sub(r'[_*#]{2,}', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return normalize_text(text)
+
+    def fetch(self, url, timeout=15, store=None):
+        """GET a URL through the HTTP cache, respecting the per-host rate limit."""
+        if not self.cache.offline:
+            self.rate_limiter.wait(url)
+        with metrics.timed("finsent_scraper_fetch_seconds", bank=self.bank_name):
+            return self.cache.fetch(self.session, url, timeout, store=store)
+
+    def fetch_index(self, url, timeout=15):
+        """
+        Fetch a listing page (feed / press-release index) conditionally.
+
+        Returns None when the server answers 304, meaning nothing changed
+        since the last complete run. The entry is only stored by
+        finish_index() so an interrupted run is retried next time.
+        """
+        if not self.cache.offline:
+            self.rate_limiter.wait(url)
+        resp = self.cache.fetch(
+            self.session, url, timeout,
+            conditional=not self.force_refresh, store=False,
+        )
+        if resp.not_modified:
+            print(f"{self.bank_name} index unchanged since last run, nothing to do.")
+            return None
+        return resp
+
+    def finish_index(self, resp):
+        """Cache the index page once every candidate it listed was fetched and saved."""
+        if self.cache.offline:
+            return
+        if self.fetch_failures or self.save_failures:
+            print(
+                f"{self.fetch_failures} fetches and {self.save_failures} saves failed; "
+                "index not cached so they are retried next run"
+            )
+            return
+        self.cache.store(resp)
+
+    def fetch_all(self, items, worker):
+        """
+        Run worker(item) for every item on a bounded thread pool.
+
+        Results come back in input order; an item whose worker raises
+        yields None so one bad page does not abort the run.
+        """
+        if not items:
+            return []
+
+        def safe(item):
+            try:
+                return worker(item)
+            except Exception as err:
+                print(f"Fetch failed for {item}: {err}")
+                metrics.inc("finsent_scraper_fetch_errors_total", bank=self.bank_name)
+                with self._failure_lock:
+                    self.fetch_failures += 1
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(safe, items))
 
     # Saves scraped content to the Neon database
     def save_to_db(self, date, url, text):
         """
         Saves the scraped text to the 'transcripts' table.
+
+        Text that near-duplicates a transcript this bank published within a
+        few days (e.g. the PDF of an HTML statement) is flagged or skipped per
+        NEAR_DUP_ACTION, so it is never scored; see near_duplicates.py.
         """
         try:
             cleaned = self.clean_text(text)
@@ -44,33 +162,70 @@ class CentralBankScraper:
             if len(cleaned) < 100:
                 print(f"Text too short, skipping.")
                 return
-            
+
+            if not self._near_dup_indexed:
+                near_duplicates.index_missing(self.conn)
+                self._near_dup_indexed = True
+
+            sig, duplicate = near_duplicates.check(self.cursor, cleaned, self.bank_name, date)
+            duplicate_of = None
+            if duplicate:
+                self.duplicate_count += 1
+                print(f"{url} matches transcript {duplicate[0]} ({duplicate[1]:.0%} similar)")
+                if near_duplicates.NEAR_DUP_ACTION == "skip":
+                    self.conn.rollback()
+                    return
+                duplicate_of = duplicate[0]
+
             query = """
-            INSERT INTO transcripts (bank_name, publish_date, content, url)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (url) DO NOTHING;
+            INSERT INTO transcripts (bank_name, publish_date, content, url, duplicate_of)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (url) DO NOTHING
+            RETURNING id;
             """
-            self.cursor.execute(query, (self.bank_name, date, cleaned, url))
+            self.cursor.execute(query, (self.bank_name, date, cleaned, url, duplicate_of))
+            row = self.cursor.fetchone()
+            if row:
+                near_duplicates.store(self.cursor, row[0], sig)
             self.conn.commit()
-            print(f"Saved {self.bank_name} transcript for {date}")
+            if row and duplicate_of is None:
+                self.saved_count += 1
+                print(f"Saved {self.bank_name} transcript for {date}")
+            elif row:
+                print(f"Saved {self.bank_name} transcript for {date} as a duplicate, not scored")
             
         except Exception as e:
             print(f"DB error: {e}")
+            self.save_failures += 1
             self.conn.rollback()
 
-    def url_exists(self, url: str) -> bool:
-        """Return True if the given URL already exists in the transcripts table."""
+    def existing_urls(self, urls) -> set:
+        """Return the subset of urls already in the transcripts table, in one round trip."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return set()
         try:
-            q = "SELECT 1 FROM transcripts WHERE url = %s LIMIT 1;"
-            self.cursor.execute(q, (url,))
-            return self.cursor.fetchone() is not None
+            q = "SELECT url FROM transcripts WHERE url = ANY(%s);"
+            self.cursor.execute(q, (urls,))
+            return {row[0] for row in self.cursor.fetchall()}
         except Exception as e:
-            # On error, conservatively return False so scraping proceeds
-            print(f"DB check error for url_exists({url}): {e}")
-            return False
+            # On error, conservatively treat everything as new so scraping proceeds
+            print(f"DB check error for existing_urls ({len(urls)} urls): {e}")
+            self.conn.rollback()
+            return set()
+
+    def new_urls(self, urls) -> list:
+        """Filter urls down to the ones not stored yet, keeping their order."""
+        existing = self.existing_urls(urls)
+        return [u for u in urls if u not in existing]
+
+    def url_exists(self, url: str) -> bool:
+        """Return True if the given URL already exists in the transcripts table."""
+        return url in self.existing_urls([url])
 
     def close(self):
+        self.session.close()
         if self.cursor:
             self.cursor.close()
-        if self.conn:
+        if self.conn and self.owns_conn:
             self.conn.close()
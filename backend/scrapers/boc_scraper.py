@@ -1,11 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from base_scraper import CentralBankScraper
+from base_scraper import CentralBankScraper, metrics
 
 class BoCScraper(CentralBankScraper):
-    def __init__(self):
-        super().__init__(bank_name="BoC")
+    def __init__(self, conn=None):
+        super().__init__(bank_name="BoC", conn=conn)
 
     def get_article_text(self, soup):
         # Remove junk
@@ -26,21 +25,39 @@ class BoCScraper(CentralBankScraper):
 
         return ' '.join(paras)
 
+    def parse_article(self, html):
+        """Return (date, text) for a press-release page."""
+        with metrics.timed("finsent_scraper_parse_seconds", bank=self.bank_name, kind="html"):
+            return self._parse_article(html)
+
+    def _parse_article(self, html):
+        article_soup = BeautifulSoup(html, 'html.parser')
+
+        # Get date
+        date_meta = article_soup.find('meta', attrs={'name': 'publication_date'})
+        date = date_meta['content'][:10] if date_meta and date_meta.get('content') else '1970-01-01'
+
+        # Get text
+        return date, self.get_article_text(article_soup)
+
     def run(self): 
         url = "https://www.bankofcanada.ca/press/press-releases/"
         
         try:
-            r = requests.get(url, timeout=10)
-            r.raise_for_status()
+            r = self.fetch_index(url, timeout=10)
         except Exception as err:
             print(f"Error: {err}")
             return
+        if r is None:
+            return
         
         soup = BeautifulSoup(r.text, 'html.parser')
         articles = soup.find_all('h3', class_='media-heading')
         
         keywords = ["interest rate", "monetary policy", "statement", "policy rate"]
-        
+
+        # Collect every new candidate first, then fetch them concurrently
+        candidates = []
         for article in articles:
             link = article.find('a')
             if not link:
@@ -50,37 +67,30 @@ class BoCScraper(CentralBankScraper):
             if not any(k in title.lower() for k in keywords):
                 continue
             
-            article_url = urljoin(url, link['href'])
-            # Skip if already in DB
-            try:
-                if self.url_exists(article_url):
-                    continue
-            except Exception:
-                pass
+            candidates.append((title, urljoin(url, link['href'])))
 
+        # Skip anything already in DB, checked in one query
+        new = set(self.new_urls([article_url for _, article_url in candidates]))
+        candidates = [(title, article_url) for title, article_url in candidates if article_url in new]
+        for title, _ in candidates:
             print(f"Scraping: {title}")
 
-            try:
-                r = requests.get(article_url, timeout=15)
-                r.raise_for_status()
-            except Exception as err:
-                print(f"Failed to fetch {article_url}: {err}")
+        pages = self.fetch_all(
+            candidates,
+            lambda c: self.parse_article(self.fetch(c[1], timeout=15).text),
+        )
+
+        for (_, article_url), parsed in zip(candidates, pages):
+            if parsed is None:
                 continue
-            
-            article_soup = BeautifulSoup(r.text, 'html.parser')
-            
-            # Get date
-            date_meta = article_soup.find('meta', attrs={'name': 'publication_date'})
-            date = date_meta['content'][:10] if date_meta and date_meta.get('content') else '1970-01-01'
-            
-            # Get text
-            text = self.get_article_text(article_soup)
+            date, text = parsed
             
             if len(text) < 200:
                 continue
             
             self.save_to_db(date, article_url, text)
-        
+
+        self.finish_index(r)
         print("Done.")
 
 if __name__ == "__main__":
@@ -1,19 +1,16 @@
 import os
 import re
-import io
 import json
-import requests
-import PyPDF2
 import datetime
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from base_scraper import CentralBankScraper
+from base_scraper import CentralBankScraper, metrics
+from pdf_text import extract_text, shutdown_pool
 
 class FedScraper(CentralBankScraper):
-    def __init__(self):
-        super().__init__(bank_name="Fed")
+    def __init__(self, conn=None):
+        super().__init__(bank_name="Fed", conn=conn)
         self.feed_url = "https://www.federalreserve.gov/json/ne-press.json"
-        self.session = requests.Session()
 
         raw_cutoff = os.getenv('SCRAPER_EARLIEST_DATE', '2021-07-29')
         try:
@@ -21,26 +18,35 @@ class FedScraper(CentralBankScraper):
         except ValueError:
             self.cutoff = datetime.date(2024, 1, 1)
 
+    def extract_pdf_text(self, data):
+        with metrics.timed("finsent_scraper_parse_seconds", bank=self.bank_name, kind="pdf"):
+            return extract_text(data)
+
     def get_pdf_text(self, url):
         try:
-            resp = self.session.get(url, timeout=20)
-            resp.raise_for_status()
-            with io.BytesIO(resp.content) as f:
-                reader = PyPDF2.PdfReader(f)
-                return " ".join([page.extract_text() or "" for page in reader.pages]).strip()
+            return self.extract_pdf_text(self.fetch(url, timeout=20).content)
         except Exception:
             return None
 
-    def run(self):
-        try:
-            r = self.session.get(self.feed_url, timeout=15)
-            r.raise_for_status()
-            releases = json.loads(r.content.decode('utf-8-sig'))
-        except Exception as e:
-            print(f"Feed error: {e}")
-            return
+    def parse_release_page(self, page_url, html):
+        """Return ('pdf', url) if the page links a PDF, else ('text', article text)."""
+        with metrics.timed("finsent_scraper_parse_seconds", bank=self.bank_name, kind="html"):
+            return self._parse_release_page(page_url, html)
 
-        processed = 0
+    def _parse_release_page(self, page_url, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        pdf_btn = soup.find('a', href=re.compile(r'\.pdf$', re.I))
+        if pdf_btn:
+            return 'pdf', urljoin(page_url, pdf_btn['href'])
+        article = soup.find('div', id='article') or soup.find('div', class_='col-xs-12')
+        if article:
+            return 'text', " ".join([p.get_text() for p in article.find_all('p') if len(p.get_text()) > 30])
+        return 'text', None
+
+    def collect_candidates(self, releases):
+        """Filter the feed down to new (title, date_str, url) items, newest first."""
+        # The feed is newest-first, so stop at the cutoff date
+        candidates = []
         for item in releases:
             title = (item.get('t') or item.get('title') or "").strip()
             path = item.get('l', '')
@@ -61,34 +67,65 @@ class FedScraper(CentralBankScraper):
             date_str = f"{raw_d[:4]}-{raw_d[4:6]}-{raw_d[6:]}"
             if datetime.datetime.strptime(date_str, '%Y-%m-%d').date() < self.cutoff: break
 
-            if self.url_exists(full_url): continue
+            candidates.append((title, date_str, full_url))
 
+        new = set(self.new_urls([url for _, _, url in candidates]))
+        candidates = [c for c in candidates if c[2] in new]
+        for title, date_str, _ in candidates:
             print(f"Found: {title} ({date_str})")
-            content = None
+        return candidates
 
-            if full_url.endswith('.pdf'):
-                content = self.get_pdf_text(full_url)
+    def run(self):
+        try:
+            r = self.fetch_index(self.feed_url, timeout=15)
+            if r is None:
+                return
+            releases = json.loads(r.content.decode('utf-8-sig'))
+        except Exception as e:
+            print(f"Feed error: {e}")
+            return
+
+        candidates = self.collect_candidates(releases)
+        contents = {}
+
+        # Pass 1: fetch all HTML release pages concurrently
+        html_urls = [url for _, _, url in candidates if not url.endswith('.pdf')]
+        pages = self.fetch_all(
+            html_urls,
+            lambda url: self.parse_release_page(url, self.fetch(url, timeout=15).text),
+        )
+
+        pdf_jobs = [(url, url) for _, _, url in candidates if url.endswith('.pdf')]
+        linked_pdfs = []
+        for url, parsed in zip(html_urls, pages):
+            if parsed is None:
+                continue
+            kind, value = parsed
+            if kind == 'pdf':
+                linked_pdfs.append((url, value))
             else:
-                try:
-                    page = self.session.get(full_url, timeout=15)
-                    soup = BeautifulSoup(page.text, 'html.parser')
-                    pdf_btn = soup.find('a', href=re.compile(r'\.pdf$', re.I))
-                    if pdf_btn:
-                        pdf_url = urljoin(full_url, pdf_btn['href'])
-                        # Avoid re-downloading if URL already exists
-                        if not self.url_exists(pdf_url):
-                            content = self.get_pdf_text(pdf_url)
-                    else:
-                        article = soup.find('div', id='article') or soup.find('div', class_='col-xs-12')
-                        if article:
-                            content = " ".join([p.get_text() for p in article.find_all('p') if len(p.get_text()) > 30])
-                except Exception:
-                    continue
+                contents[url] = value
+
+        # Avoid re-downloading PDFs whose URL already exists
+        new_pdfs = set(self.new_urls([pdf_url for _, pdf_url in linked_pdfs]))
+        pdf_jobs += [job for job in linked_pdfs if job[1] in new_pdfs]
 
+        # Pass 2: download and extract all PDFs concurrently
+        pdf_texts = self.fetch_all(
+            pdf_jobs,
+            lambda job: self.extract_pdf_text(self.fetch(job[1], timeout=20).content),
+        )
+        for (url, _), text in zip(pdf_jobs, pdf_texts):
+            contents[url] = text
+
+        processed = 0
+        for title, date_str, full_url in candidates:
+            content = contents.get(full_url)
             if content and len(content) > 300:
                 self.save_to_db(date_str, full_url, f"Type: {title}\n\n{content}")
                 processed += 1
 
+        self.finish_index(r)
         print(f"Done. Processed {processed} new items.")
 
 if __name__ == "__main__":
@@ -96,4 +133,5 @@ if __name__ == "__main__":
     try:
         scraper.run()
     finally:
-        scraper.close()
\ No newline at end of file
+        scraper.close()
+        shutdown_pool()
\ No newline at end of file
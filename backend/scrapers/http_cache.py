@@ -0,0 +1,145 @@
+"""
+On-disk HTTP cache for the central bank scrapers.
+
+Index pages (the BoC listing, the Fed feed) are stored with their
+validators (ETag / Last-Modified), so the next run can send a conditional
+request and get a cheap 304 when nothing changed. Article pages and PDFs
+are not stored by default. Their URLs are checked against the database
+before fetching, so a stored copy would never be read again, and the
+hourly workflow would carry every PDF forward in its Actions cache.
+
+Set SCRAPER_CACHE_BODIES=1 to store every response. With
+SCRAPER_OFFLINE=1 the cache is replayed without touching the network,
+which lets the scrapers be exercised and benchmarked against pages saved
+that way.
+"""
+
+import os
+import json
+import hashlib
+
+CACHE_DIR = os.getenv(
+    "SCRAPER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"),
+)
+OFFLINE = os.getenv("SCRAPER_OFFLINE", "").lower() in ("1", "true", "yes")
+CACHE_BODIES = os.getenv("SCRAPER_CACHE_BODIES", "").lower() in ("1", "true", "yes")
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+class CachedResponse:
+    """The subset of requests.Response the scrapers use, plus cache status."""
+
+    def __init__(self, url, status_code, content, encoding=None,
+                 etag=None, last_modified=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.from_cache = from_cache
+
+    @property
+    def not_modified(self):
+        return self.status_code == 304
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpCache:
+    def __init__(self, cache_dir=CACHE_DIR, offline=OFFLINE, store_bodies=CACHE_BODIES):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.store_bodies = store_bodies
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def load(self, url):
+        """Return the cached CachedResponse for url, or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(
+            url, 200, body,
+            encoding=meta.get("encoding"),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            from_cache=True,
+        )
+
+    def store(self, response):
+        """Write body then metadata; the metadata file marks the entry complete."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(response.url)
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(response.content)
+        os.replace(body_path + ".tmp", body_path)
+        meta = {
+            "url": response.url,
+            "encoding": response.encoding,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+        }
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def fetch(self, session, url, timeout, conditional=True, store=None):
+        """
+        GET url through session, using the cache.
+
+        A 304 comes back with status_code 304 and the cached body, so callers
+        can both short-circuit on it and still read the content. The response
+        is stored when `store` is true; None (the default) leaves it to
+        SCRAPER_CACHE_BODIES. Pass store=False to decide later (via store())
+        whether to keep the entry.
+        """
+        cached = self.load(url)
+        if self.offline:
+            if cached is None:
+                raise CacheMiss(f"Not in offline cache: {url}")
+            return cached
+
+        headers = {}
+        if conditional and cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        resp = session.get(url, timeout=timeout, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            cached.status_code = 304
+            return cached
+        resp.raise_for_status()
+
+        # Charset detection reads the whole body (~0.2s per MB), so it only
+        # runs for text without a declared charset, never for PDFs
+        encoding = resp.encoding
+        if encoding is None and resp.headers.get("Content-Type", "").startswith("text/"):
+            encoding = resp.apparent_encoding
+        result = CachedResponse(
+            url, resp.status_code, resp.content,
+            encoding=encoding,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        if store is None:
+            store = self.store_bodies
+        if store:
+            self.store(result)
+        return result
@@ -0,0 +1,245 @@
+"""
+Near-duplicate detection for scraped transcripts (MinHash over word shingles).
+
+ON CONFLICT (url) only catches the same URL twice. The Fed feed often links
+an HTML statement and then a PDF of the same text, and both used to be
+stored, scored, and counted twice in that date's aggregates.
+
+Every stored transcript gets a MinHash signature: NUM_PERM minimums of
+hashed SHINGLE_WORDS-word shingles of its normalised text. Two signatures
+agree in a fraction of positions that estimates the Jaccard similarity
+of the shingle sets. The signature is split into BANDS bands, and each
+band is hashed into transcript_minhash_bands (schema.py version 7). A
+lookup only compares against transcripts that share at least one bucket
+with the new text, which is one indexed query however many are stored.
+
+CentralBankScraper.save_to_db checks each new transcript before inserting
+it. A match must come from the same bank, be published within
+NEAR_DUP_WINDOW_DAYS, and reach NEAR_DUP_THRESHOLD. The date window matters
+because consecutive FOMC statements can share most of their wording. A
+match is handled by NEAR_DUP_ACTION:
+
+  - flag (default): stored with duplicate_of set. It is never queued for
+    scoring and is left out of the transcript listing. Its URL is known,
+    so it is not fetched again.
+  - skip: not stored at all.
+
+Transcripts stored before version 7 are indexed on first use. Existing
+duplicates can be listed or flagged with
+
+    python backend/scrapers/near_duplicates.py [--flag]
+"""
+
+import os
+import re
+import sys
+import zlib
+import hashlib
+import argparse
+import numpy as np
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+import metrics  # noqa: E402
+
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", "3"))
+NEAR_DUP_ACTION = os.getenv("NEAR_DUP_ACTION", "flag").lower()
+
+SHINGLE_WORDS = 4
+NUM_PERM = 128
+# 32 bands of 4 rows: a pair at Jaccard 0.8 shares a bucket with
+# probability ~1, one at 0.3 about a quarter of the time (then rejected)
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MIN_WORDS = SHINGLE_WORDS * 4
+SHINGLE_CHUNK = 8192
+
+# h(x) = (a*x + b) mod p over 32-bit shingle hashes. p is the first prime
+# above 2**32 and a, b < 2**32, so a*x + b never overflows uint64. The seed
+# is fixed because stored signatures must stay comparable across runs.
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(0x46534E54)
+_A = _rng.randint(1, 2**32, size=(NUM_PERM, 1), dtype=np.uint64)
+_B = _rng.randint(0, 2**32, size=(NUM_PERM, 1), dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingle_hashes(text):
+    """Distinct 32-bit hashes of the text's SHINGLE_WORDS-word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+    hashes = {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode())
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint64), or None when the text is too short to judge."""
+    shingles = shingle_hashes(text)
+    if shingles is None:
+        return None
+    sig = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for i in range(0, len(shingles), SHINGLE_CHUNK):
+        chunk = shingles[i:i + SHINGLE_CHUNK]
+        np.minimum(sig, ((_A * chunk + _B) % _PRIME).min(axis=1), out=sig)
+    return sig
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def band_buckets(sig):
+    """(band, bucket) pairs; bucket is a signed 64-bit hash of the band's rows."""
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            "big", signed=True))
+        for band in range(BANDS)
+    ]
+
+
+def _to_bytes(sig):
+    return sig.astype("<u8").tobytes()
+
+
+def _from_bytes(raw):
+    return np.frombuffer(bytes(raw), dtype="<u8").astype(np.uint64)
+
+
+def find_duplicate(cur, sig, bank_name, publish_date, before_id=None):
+    """(transcript_id, similarity) of the closest stored original at or above the threshold, or None."""
+    bands, buckets = zip(*band_buckets(sig))
+    cur.execute("""
+        SELECT DISTINCT m.transcript_id, m.signature
+        FROM transcript_minhash_bands b
+        JOIN transcript_minhash m ON m.transcript_id = b.transcript_id
+        JOIN transcripts t ON t.id = b.transcript_id
+        WHERE (b.band, b.bucket) IN (SELECT * FROM unnest(%s::smallint[], %s::bigint[]))
+          AND t.bank_name = %s AND t.duplicate_of IS NULL
+          AND t.publish_date BETWEEN %s::date - %s AND %s::date + %s
+          AND (%s::integer IS NULL OR t.id < %s);
+    """, (list(bands), list(buckets), bank_name,
+          publish_date, NEAR_DUP_WINDOW_DAYS, publish_date, NEAR_DUP_WINDOW_DAYS, before_id, before_id))
+    best = None
+    for tid, raw in cur.fetchall():
+        score = similarity(sig, _from_bytes(raw))
+        if score >= NEAR_DUP_THRESHOLD and (best is None or score > best[1]):
+            best = (tid, score)
+    return best
+
+
+def store(cur, transcript_id, sig):
+    """
+    Index a transcript's signature (inside the caller's transaction).
+
+    A transcript too short to sign is recorded with no signature, so
+    index_missing() does not revisit it and it never matches anything.
+    """
+    cur.execute("""
+        INSERT INTO transcript_minhash (transcript_id, signature) VALUES (%s, %s)
+        ON CONFLICT (transcript_id) DO NOTHING;
+    """, (transcript_id, _to_bytes(sig) if sig is not None else None))
+    if cur.rowcount != 1 or sig is None:
+        return
+    cur.executemany(
+        "INSERT INTO transcript_minhash_bands (band, bucket, transcript_id) VALUES (%s, %s, %s);",
+        [(band, bucket, transcript_id) for band, bucket in band_buckets(sig)],
+    )
+
+
+def index_missing(conn, batch=200):
+    """Sign every transcript that has no signature yet; returns how many were indexed."""
+    indexed = 0
+    while True:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT t.id, t.content FROM transcripts t
+                WHERE NOT EXISTS (SELECT 1 FROM transcript_minhash m WHERE m.transcript_id = t.id)
+                ORDER BY t.id
+                LIMIT %s;
+            """, (batch,))
+            rows = cur.fetchall()
+            for tid, content in rows:
+                store(cur, tid, signature(content or ""))
+        indexed += len(rows)
+        if len(rows) < batch:
+            break
+    if indexed:
+        print(f"Indexed {indexed} stored transcripts for near-duplicate checks")
+    return indexed
+
+
+def check(cur, text, bank_name, publish_date):
+    """
+    Look up `text` before it is stored; returns (signature, duplicate).
+
+    duplicate is (original_id, similarity) or None. Records the outcome in
+    finsent_scraper_near_duplicates_total.
+    """
+    sig = signature(text)
+    if sig is None:
+        return None, None
+    duplicate = find_duplicate(cur, sig, bank_name, publish_date)
+    if duplicate:
+        metrics.inc("finsent_scraper_near_duplicates_total", bank=bank_name, action=NEAR_DUP_ACTION)
+    return sig, duplicate
+
+
+def flag_existing(conn, transcript_id, original_id):
+    """Mark a stored transcript as a duplicate and drop its scores so aggregates skip it."""
+    with conn, conn.cursor() as cur:
+        cur.execute("UPDATE transcripts SET duplicate_of = %s WHERE id = %s;", (original_id, transcript_id))
+        cur.execute("DELETE FROM transcript_sentences WHERE transcript_id = %s;", (transcript_id,))
+        cur.execute("DELETE FROM transcript_scores WHERE transcript_id = %s;", (transcript_id,))
+        cur.execute("DELETE FROM scoring_jobs WHERE transcript_id = %s;", (transcript_id,))
+
+
+def main(args):
+    from db import connection, close_pool
+    from schema import migrate
+
+    try:
+        with connection() as conn:
+            migrate(conn)
+            index_missing(conn)
+            with conn, conn.cursor() as cur:
+                cur.execute("""
+                    SELECT t.id, t.bank_name, t.publish_date, t.url, m.signature
+                    FROM transcripts t
+                    JOIN transcript_minhash m ON m.transcript_id = t.id
+                    WHERE t.duplicate_of IS NULL AND m.signature IS NOT NULL
+                    ORDER BY t.id;
+                """)
+                rows = cur.fetchall()
+
+            # Oldest first, flagging as we go, so every duplicate points at an original
+            found = 0
+            for tid, bank, date, url, raw in rows:
+                with conn, conn.cursor() as cur:
+                    match = find_duplicate(cur, _from_bytes(raw), bank, date, before_id=tid)
+                if not match:
+                    continue
+                found += 1
+                print(f"  {bank} {date} ID={tid} duplicates ID={match[0]} ({match[1]:.2f}): {url}")
+                if args.flag:
+                    flag_existing(conn, tid, match[0])
+            verb = "flagged" if args.flag else "found (use --flag to flag them)"
+            print(f"{found} near-duplicate transcripts {verb}")
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index stored transcripts and report near-duplicates")
+    parser.add_argument("--flag", action="store_true",
+                        help="mark duplicates (duplicate_of) and drop their sentences and scores")
+    main(parser.parse_args())
@@ -0,0 +1,163 @@
+"""
+PDF text extraction backends for the scrapers.
+
+pypdfium2 (PDFium bindings) extracts text several times faster than PyPDF2
+on long documents such as the Summary of Economic Projections; PyPDF2 stays
+available as the pure-Python fallback. Documents with many pages are split
+into page ranges that are extracted in parallel worker processes. Within
+one process, pdfium calls are serialised by a lock (PDFium is not
+thread-safe).
+
+    SCRAPER_PDF_BACKEND             auto | pdfium | pypdf2   (default auto)
+    SCRAPER_PDF_PROCESSES           worker processes for long PDFs
+    SCRAPER_PDF_PARALLEL_MIN_PAGES  page count from which the pool is used
+"""
+
+import io
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_BACKEND = os.getenv("SCRAPER_PDF_BACKEND", "auto")
+PDF_PROCESSES = int(os.getenv("SCRAPER_PDF_PROCESSES", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = int(os.getenv("SCRAPER_PDF_PARALLEL_MIN_PAGES", "12"))
+
+
+# ---------------------------------------------------------------------------
+# Backends: each has page_count(data) and extract(data, start, stop) -> [str]
+# ---------------------------------------------------------------------------
+
+def _pypdf2_page_count(data):
+    import PyPDF2
+    with io.BytesIO(data) as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _pypdf2_extract(data, start, stop):
+    import PyPDF2
+    with io.BytesIO(data) as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+# PDFium is not thread-safe, even across separate documents, and the
+# scrapers extract from several fetch threads at once. Every pdfium call in
+# a process goes through this lock; parallelism comes from the process pool.
+_pdfium_lock = threading.Lock()
+
+
+def _pdfium_page_count(data):
+    import pypdfium2 as pdfium
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def _pdfium_extract(data, start, stop):
+    import pypdfium2 as pdfium
+    texts = []
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            for i in range(start, stop):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    return texts
+
+
+BACKENDS = {
+    "pdfium": (_pdfium_page_count, _pdfium_extract),
+    "pypdf2": (_pypdf2_page_count, _pypdf2_extract),
+}
+
+_BACKEND_MODULES = {"pdfium": "pypdfium2", "pypdf2": "PyPDF2"}
+
+
+def available_backends():
+    """Backends whose library is installed, fastest first."""
+    names = []
+    for name, module in _BACKEND_MODULES.items():
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+def resolve_backend(name=None):
+    name = name or PDF_BACKEND
+    if name == "auto":
+        available = available_backends()
+        if not available:
+            raise RuntimeError("No PDF backend installed (need pypdfium2 or PyPDF2)")
+        return available[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name}")
+    return name
+
+
+# ---------------------------------------------------------------------------
+# Parallel extraction
+# ---------------------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(processes):
+    # spawn rather than fork: the scrapers call this from fetch threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _extract_range(backend, data, start, stop):
+    return BACKENDS[backend][1](data, start, stop)
+
+
+def extract_text(data, backend=None, processes=None):
+    """Extract the text of a PDF given as bytes, pages joined by spaces."""
+    backend = resolve_backend(backend)
+    processes = PDF_PROCESSES if processes is None else processes
+    page_count, extract = BACKENDS[backend]
+
+    n_pages = page_count(data)
+    if processes <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        pages = extract(data, 0, n_pages)
+    else:
+        chunk = -(-n_pages // processes)
+        pool = _get_pool(processes)
+        futures = [
+            pool.submit(_extract_range, backend, data, start, min(start + chunk, n_pages))
+            for start in range(0, n_pages, chunk)
+        ]
+        pages = [text for f in futures for text in f.result()]
+
+    return " ".join(p or "" for p in pages).strip()
@@ -0,0 +1,109 @@
+"""
+Cold-start profiler for the API server.
+
+Starts a fresh interpreter with `python -X importtime`, imports main and
+calls the /api/health handler, then reports:
+
+  - time to healthy (interpreter start → health() returned)
+  - self import time summed per top-level package, slowest first
+  - any heavy module that got imported at startup although main.py is
+    supposed to load it lazily
+
+Exits non-zero when the budget is exceeded or a heavy module leaks into
+startup, so it can run in CI to catch regressions.
+
+    python backend/startup_profile.py [--budget-ms 1500] [--top 15] [--out startup.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules main.py must not import until a request needs them
+LAZY_MODULES = ["pandas", "yfinance", "psycopg2", "openai", "torch", "transformers"]
+
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+main.health()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_main_ms": (t1 - t0) * 1000,
+    "health_ms": (t2 - t1) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def profile():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing main failed:\n{proc.stderr[-2000:]}")
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Sum each module's self time into its top-level package, so nested
+    # imports are attributed to the package that owns them
+    per_package = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            self_us, name = m.group(1), m.group(3)
+            per_package[name.split(".")[0]] += int(self_us) / 1000
+
+    loaded = set(probe["modules"])
+    return {
+        "time_to_healthy_ms": round(wall_ms, 1),
+        "import_main_ms": round(probe["import_main_ms"], 1),
+        "health_ms": round(probe["health_ms"], 3),
+        "packages_ms": dict(sorted(
+            ((k, round(v, 1)) for k, v in per_package.items()),
+            key=lambda kv: kv[1], reverse=True,
+        )),
+        "leaked_lazy_modules": [m for m in LAZY_MODULES if m in loaded],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile API cold start")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1500")))
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--out", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = profile()
+    print(f"Time to healthy: {report['time_to_healthy_ms']:.0f} ms "
+          f"(import main {report['import_main_ms']:.0f} ms, budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'package':30s} {'import ms':>10s}")
+    for name, ms in list(report["packages_ms"].items())[:args.top]:
+        print(f"{name:30s} {ms:10.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report["leaked_lazy_modules"]:
+        print(f"\nFAIL: imported at startup: {', '.join(report['leaked_lazy_modules'])}")
+        failed = True
+    if report["time_to_healthy_ms"] > args.budget_ms:
+        print(f"\nFAIL: time to healthy over budget ({report['time_to_healthy_ms']:.0f} > {args.budget_ms:.0f} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
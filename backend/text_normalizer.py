@@ -0,0 +1,42 @@
+"""
+Single-pass text normalisation shared by the scrapers and the sentence splitter.
+
+Gives exactly the output CentralBankScraper.clean_text used to build with
+NFKC plus five regex passes and two str.replace passes:
+
+  - NFKC normalisation
+  - control characters, NBSP and zero-width spaces become spaces
+  - runs of 2+ dashes, or 2+ of '_', '*', '#', become spaces
+  - whitespace runs collapse to a single space, ends are stripped
+
+Control characters that str.split() does not already treat as whitespace
+are replaced by one character-class regex, the dash and underscore runs by
+one combined regex, and whitespace is collapsed by str.split/join in C
+rather than by a regex substitution per gap. (str.translate was measured
+an order of magnitude slower than the regex on non-ASCII transcripts.)
+benchmarks/bench_clean_text.py checks the equivalence.
+"""
+
+import re
+import unicodedata
+
+_SPACE_CHARS = [*range(0x00, 0x20), *range(0x7F, 0xA0), 0xA0, 0x200B]
+# Whitespace is handled by str.split(), so only the rest needs replacing
+_CONTROL_RE = re.compile(
+    "[" + "".join(re.escape(chr(c)) for c in _SPACE_CHARS if not chr(c).isspace()) + "]"
+)
+
+# Matches [-–—]{2,} or [_*#]{2,}. Leading with a plain character class lets
+# the regex engine skip ahead with its charset prefix scan; the lookbehinds
+# then pick which run the first character started.
+_RUNS_RE = re.compile(r"[-–—_*#](?:(?<=[-–—])[-–—]+|(?<=[_*#])[_*#]+)")
+
+
+def normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    text = _CONTROL_RE.sub(" ", text)
+    text = _RUNS_RE.sub(" ", text)
+    return " ".join(text.split())